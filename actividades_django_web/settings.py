@@ -44,6 +44,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'biblioteca.limites.LimiteConcurrenciaMiddleware',
+    'biblioteca.instrumentacion.InstrumentacionSQLMiddleware',
+    'biblioteca.replicas.ReplicaLecturaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,13 +61,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Las plantillas se compilan una vez por proceso (con DEBUG el
+            # autoreload vacía el cache del loader al editarlas)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -75,13 +85,58 @@ WSGI_APPLICATION = 'actividades_django_web.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Perfil de SQLite para varios workers (gunicorn): pragmas que se ejecutan al
+# abrir cada conexión (ver README, "SQLite en Producción")
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',       # Los lectores no bloquean al escritor ni el escritor a los lectores
+    'synchronous': 'NORMAL',     # Con WAL no corrompe la base; fsync solo en los checkpoints
+    'busy_timeout': 5000,        # Milisegundos que una escritura espera el lock antes de fallar
+    'cache_size': -20000,        # Cache de páginas por conexión (negativo: KiB, 20 MB)
+    'mmap_size': 134217728,      # Lecturas con memoria mapeada (128 MB)
+}
+# Las réplicas se abren solo para lectura: no cambian el journal ni la sincronización
+SQLITE_PRAGMAS_LECTURA = {
+    nombre: valor for nombre, valor in SQLITE_PRAGMAS.items()
+    if nombre not in ('journal_mode', 'synchronous')
+}
+
+
+def sqlite_init_command(pragmas):
+    return '; '.join(f'PRAGMA {nombre}={valor}' for nombre, valor in pragmas.items())
+
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': {
+            'init_command': sqlite_init_command(SQLITE_PRAGMAS),
+            # BEGIN IMMEDIATE: una transacción toma el lock de escritura al
+            # empezar y espera busy_timeout si está ocupado, en lugar de fallar
+            # con "database is locked" al pasar de leer a escribir
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # Conexiones persistentes: cada worker reutiliza su conexión (y sus
+        # pragmas y cache de páginas) durante 10 minutos, verificándola antes
+        # de cada petición
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    },
+    # Réplica de lectura (ver biblioteca/replicas.py). En local es una copia de
+    # db.sqlite3 que mantiene `python manage.py sincronizar_replica --intervalo 2`.
+    # mode=ro: se abre solo para lectura y no se crea si el archivo no existe.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"{(BASE_DIR / 'db_replica.sqlite3').as_uri()}?mode=ro",
+        'OPTIONS': {'init_command': sqlite_init_command(SQLITE_PRAGMAS_LECTURA)},
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['biblioteca.replicas.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -126,7 +181,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Django REST Framework configuration
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'biblioteca.paginacion.PaginacionNumerada',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -134,7 +189,163 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # JSONRenderer que usa orjson (si está instalado) en la lectura rápida
+        'biblioteca.lectura_rapida.JSONRapidoRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMemCache es por proceso; con varios workers conviene usar Redis o Memcached
+# para que todos compartan las respuestas y los contadores de generación.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'biblioteca',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Cubetas de fichas del throttling (ver biblioteca/limites.py): siempre
+    # locales al proceso, separadas para que las respuestas cacheadas no las desalojen
+    'limites': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'biblioteca-limites',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
+# Cache de respuestas de la API (ver biblioteca/cache_api.py)
+BIBLIOTECA_CACHE_API = {
+    'ACTIVO': True,
+    'CACHE': 'default',  # Alias en CACHES
+    'TIMEOUT': 300,      # Segundos; las respuestas se invalidan antes si cambian los datos
+}
+
+# Cache de las páginas HTML (ver biblioteca/cache_html.py): páginas completas
+# para los visitantes anónimos y fragmentos de cada tarjeta de libro y autor
+BIBLIOTECA_CACHE_HTML = {
+    'ACTIVO': True,
+    'CACHE': 'default',          # Alias en CACHES
+    'TIMEOUT': 300,              # Segundos de una página; se invalida antes si cambian los datos
+    'TIMEOUT_FRAGMENTOS': 3600,  # Segundos de una tarjeta; la clave cambia al editar su objeto
+}
+
+# Rankings de libros (/api/books/top/ y /api/books/trending/, ver
+# ParametrosRanking). Los cambios se aplican con recalcular_ranking
+BIBLIOTECA_RANKING = {
+    'PESO_PRIOR': 10,       # Ratings "virtuales" con la media del catálogo en el puntaje bayesiano
+    'MEDIA_INICIAL': 2.5,   # Media a priori si todavía no hay ratings
+    'VIDA_MEDIA_DIAS': 7,   # Días en que una reseña pierde la mitad de su peso en la tendencia
+    'LIMITE': 10,           # Libros por respuesta (?limite=)
+    'LIMITE_MAXIMO': 100,
+}
+
+# Throttling por costo y límite de concurrencia (ver biblioteca/limites.py)
+BIBLIOTECA_LIMITES = {
+    'ACTIVO': True,
+    'CACHE': 'limites',      # Alias en CACHES de las cubetas de fichas
+    'CAPACIDAD': 60,         # Fichas de la cubeta de cada cliente (ráfaga máxima)
+    'RECARGA': 2.0,          # Fichas por segundo (ritmo sostenido)
+    # Fichas por acción de los ViewSets; las demás rutas de lectura cuestan
+    # COSTO_ACCION y las demás escrituras COSTO_ESCRITURA
+    'COSTOS': {'retrieve': 1, 'list': 2, 'bulk': 20},
+    'COSTO_ACCION': 2,
+    'COSTO_ESCRITURA': 3,
+    'COSTO_BUSQUEDA': 8,     # Adicional con ?search=
+    'PAGINAS_POR_FICHA': 10,  # ?page=N suma una ficha cada 10 páginas
+    'FILAS_POR_FICHA': 50,   # ?page_size= mayor que PAGE_SIZE suma una ficha cada 50 filas
+    'CONCURRENCIA_MAXIMA': 32,  # Peticiones en curso por proceso
+    'ESPERA_MAXIMA': 0.5,    # Segundos que espera una petición un lugar antes del 503
+    'RETRY_AFTER': 1,        # Segundos del encabezado Retry-After del 503
+    'PREFIJOS_LIMITADOS': ['/api/', '/libros/', '/autores/'],  # Y la raíz '/' (exacta)
+}
+
+# Creación de reseñas en lote (/api/reviews/bulk/)
+BIBLIOTECA_RESENAS_LOTE = {
+    'MAXIMO': 10000,     # Reseñas por petición
+    'BATCH_SIZE': 500,   # Filas por INSERT
+}
+
+# Ingesta diferida de reseñas (ver biblioteca/ingesta.py): con ACTIVO, POST
+# /api/reviews/ valida la reseña, la guarda en un spool durable y responde 202;
+# un hilo de fondo la inserta en lotes
+BIBLIOTECA_INGESTA_RESENAS = {
+    'ACTIVO': False,
+    'SPOOL': BASE_DIR / 'spool_resenas.sqlite3',  # Archivo SQLite aparte de la base principal
+    'LOTE': 500,         # Reseñas por transacción
+    'INTERVALO': 0.5,    # Segundos entre vaciados del spool
+    'HISTORIAL': 1000,   # Lotes que se guardan para las métricas
+}
+
+# Filas leídas por bloque en la exportación en streaming (/api/export/...)
+BIBLIOTECA_EXPORTACION_CHUNK = 2000
+
+# Cantidad de reseñas recientes incluidas en cada libro de la API (recent_reviews)
+BIBLIOTECA_RESENAS_RECIENTES = 5
+
+# Objetos por página de las vistas HTML (?page=)
+BIBLIOTECA_PAGINAS_HTML = {
+    'LIBROS': 24,
+    'AUTORES': 30,
+    'RESENAS': 20,
+}
+
+# Libros similares: /api/books/{id}/similar/ (ver biblioteca/similares.py)
+BIBLIOTECA_SIMILARES = {
+    'ACTIVO': True,
+    'DIRECTORIO': BASE_DIR / 'indice_similares',  # Segmentos del índice (.npy abiertos con mmap)
+    'DIMENSION': 2 ** 20,        # Columnas del hashing de términos
+    'PESO_TITULO': 2,            # Veces que cuentan las palabras del título
+    'MAX_DF': 0.5,               # Se ignoran los términos de más de esta fracción de libros
+    'TERMINOS_CONSULTA': 32,     # Términos de mayor peso del libro consultado
+    'SEGMENTOS_MAXIMOS': 16,     # Segmentos incrementales antes de fusionarlos
+    'LIMITE': 10,
+    'LIMITE_MAXIMO': 50,
+}
+
+# Changelists del admin (ver biblioteca/admin.py): con filtros o búsqueda el
+# total se cuenta hasta CONTEO_MAXIMO filas (sin filtros sale de las tablas
+# de resumen)
+BIBLIOTECA_ADMIN = {
+    'CONTEO_MAXIMO': 10000,
+}
+
+# Lectura rápida de list en la API: filas desde values() sin instancias de
+# los modelos ni serializadores (ver biblioteca/lectura_rapida.py)
+BIBLIOTECA_LECTURA_RAPIDA = {
+    'ACTIVO': True,
+}
+
+# Réplicas de lectura (ver biblioteca/replicas.py)
+BIBLIOTECA_REPLICAS = {
+    'ACTIVO': True,
+    'ALIAS': ['replica'],           # Alias en DATABASES de las réplicas
+    'APPS': ['biblioteca'],         # Apps cuyas lecturas van a las réplicas (sesiones y usuarios no)
+    'RETRASO_MAXIMO': 5,            # Segundos; una réplica más atrasada no se usa
+    'VERIFICACION': 1,              # Segundos entre mediciones del retraso (por proceso)
+    'COOKIE': 'biblioteca_escritura',  # Hora de la última escritura del cliente
+}
+
+# Instrumentación SQL por petición (ver biblioteca/instrumentacion.py)
+BIBLIOTECA_INSTRUMENTACION = {
+    'ACTIVO': True,
+    'MUESTREO': 1.0,         # Fracción de peticiones instrumentadas (0.0 a 1.0)
+    'CABECERA': True,        # Agrega el encabezado Server-Timing
+    'LENTA_MS': 500,         # Peticiones más lentas se registran en el log
+    'REPETICIONES_N1': 10,   # Una consulta repetida tantas veces se registra como N+1
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'biblioteca.instrumentacion': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+        'biblioteca.replicas': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+        'biblioteca.ingesta': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+        'biblioteca.similares': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
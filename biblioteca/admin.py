@@ -1,27 +1,202 @@
+import datetime
+
+from django.conf import settings
 from django.contrib import admin
-from .models import Autor, Libro, Resena
+from django.core.paginator import Paginator
+from django.db.models import Sum
+from django.utils.functional import cached_property
+
+from .busqueda import INDICES, construir_consulta, fts_disponible
+from .models import Autor, EstadisticaAnio, EstadisticaMes, EstadisticaNacionalidad, Libro, Resena
+
+
+# ═══════════════════════════════════════════════════════════════
+# CHANGELISTS PARA TABLAS GRANDES
+# ═══════════════════════════════════════════════════════════════
+
+class PaginadorAdmin(Paginator):
+    """
+    Paginador del admin que nunca cuenta toda la tabla.
+
+    ═══ EXPLICACIÓN ═══
+    El changelist pide paginator.count en cada página. Sin filtros ni
+    búsqueda, el total sale de `total` (las tablas de resumen que mantienen
+    los triggers, ver AdminTablaGrande.total_sin_filtros). Con filtros se
+    cuenta con un límite: COUNT sobre las primeras CONTEO_MAXIMO filas de
+    BIBLIOTECA_ADMIN, así que un filtro poco selectivo se detiene ahí y el
+    changelist muestra a lo sumo esa cantidad de resultados.
+    """
+
+    def __init__(self, object_list, per_page, total=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.total = total
+
+    @cached_property
+    def count(self):
+        if self.total is not None and not self.object_list.query.where:
+            return self.total()
+        limite = settings.BIBLIOTECA_ADMIN['CONTEO_MAXIMO']
+        # Solo la clave: sin las anotaciones (subconsultas, relevancia) del changelist
+        return self.object_list.order_by().values('pk')[:limite].count()
+
+
+class AdminTablaGrande(admin.ModelAdmin):
+    """
+    Base de los ModelAdmin de la biblioteca para tablas de cientos de miles
+    de filas:
+
+    - el total del changelist lo da PaginadorAdmin y no se cuenta aparte la
+      tabla completa ("N en total" junto a la búsqueda),
+    - sin facetas (contarían cada opción de cada filtro),
+    - date_hierarchy lee los años y meses de las tablas de resumen cuando el
+      changelist no tiene otros filtros (ver periodos_jerarquia y la
+      plantilla admin/biblioteca/change_list.html),
+    - la búsqueda usa el índice FTS5 del modelo si lo tiene (ver busqueda.py).
+    """
+    paginator = PaginadorAdmin
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    def total_sin_filtros(self):
+        """Cantidad de filas de la tabla sin recorrerla, o None para contarla"""
+        return None
+
+    def periodos_jerarquia(self, anio=None):
+        """
+        Fechas (datetime.date) de los años con filas, o de los meses con
+        filas de `anio`, leídas de las tablas de resumen. None si este nivel
+        se consulta en la tabla (como lo hace Django).
+        """
+        return None
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, total=self.total_sin_filtros,
+            orphans=orphans, allow_empty_first_page=allow_empty_first_page,
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        consulta = construir_consulta([search_term])
+        if not consulta or not fts_disponible(queryset):
+            return super().get_search_results(request, queryset, search_term)
+        # Sin LIKE '%término%' sobre cada columna de search_fields; las
+        # coincidencias son filas distintas, no hace falta DISTINCT
+        return INDICES[queryset.model].filtrar(queryset, consulta), False
+
+
+# ═══════════════════════════════════════════════════════════════
+# FILTROS
+# ═══════════════════════════════════════════════════════════════
+
+class FiltroTexto(admin.SimpleListFilter):
+    """
+    Filtro con un campo de texto en lugar de una lista de opciones (que en
+    un filtro por ForeignKey serían todas las filas de la tabla relacionada).
+    Filtra con `lookup` = el texto ingresado.
+    """
+    template = 'admin/biblioteca/filtro_texto.html'
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        # Los demás parámetros del changelist viajan ocultos en el formulario
+        yield {
+            'valor': self.value() or '',
+            'parametro': self.parameter_name,
+            'otros': [
+                (nombre, valor)
+                for nombre, valores in changelist.filter_params.items()
+                if nombre != self.parameter_name
+                for valor in valores
+            ],
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+        }
+
+    def queryset(self, request, queryset):
+        valor = (self.value() or '').strip()
+        if valor:
+            return queryset.filter(**{self.lookup: valor})
+        return queryset
+
+
+class FiltroAutor(FiltroTexto):
+    title = 'autor'
+    parameter_name = 'autor'
+    lookup = 'autor__nombre__icontains'
+
 
+class FiltroLibro(FiltroTexto):
+    title = 'libro'
+    parameter_name = 'libro'
+    lookup = 'libro__titulo__icontains'
+
+
+class FiltroNacionalidad(admin.SimpleListFilter):
+    """Nacionalidades de EstadisticaNacionalidad, sin SELECT DISTINCT sobre los autores"""
+    title = 'nacionalidad'
+    parameter_name = 'nacionalidad'
+
+    def lookups(self, request, model_admin):
+        nacionalidades = EstadisticaNacionalidad.objects.filter(cantidad_autores__gt=0)
+        return [(nacionalidad, nacionalidad) for nacionalidad in nacionalidades.values_list('nacionalidad', flat=True)]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(nacionalidad=self.value())
+        return queryset
+
+
+class FiltroCalificacion(admin.SimpleListFilter):
+    """Calificaciones del 1 al 5, sin SELECT DISTINCT sobre las reseñas"""
+    title = 'calificación'
+    parameter_name = 'calificacion'
+
+    def lookups(self, request, model_admin):
+        return [(str(calificacion), '★' * calificacion) for calificacion in range(1, 6)]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(calificacion=self.value())
+        return queryset
+
+
+# ═══════════════════════════════════════════════════════════════
+# MODELOS
+# ═══════════════════════════════════════════════════════════════
 
 @admin.register(Autor)
-class AutorAdmin(admin.ModelAdmin):
+class AutorAdmin(AdminTablaGrande):
     list_display = ('nombre', 'nacionalidad', 'cantidad_libros')
     search_fields = ('nombre', 'nacionalidad')
-    list_filter = ('nacionalidad',)
-    
+    list_filter = (FiltroNacionalidad,)
+
+    def get_queryset(self, request):
+        # Subconsulta correlacionada por fila: solo se evalúa para la página
+        return super().get_queryset(request).con_estadisticas('cantidad_libros', por_fila=True)
+
+    def total_sin_filtros(self):
+        return EstadisticaNacionalidad.objects.aggregate(total=Sum('cantidad_autores'))['total'] or 0
+
     def cantidad_libros(self, obj):
         """Muestra la cantidad de libros del autor"""
-        return obj.libros.count()
+        return obj.cantidad_libros
     cantidad_libros.short_description = 'Cantidad de Libros'
 
 
 @admin.register(Libro)
-class LibroAdmin(admin.ModelAdmin):
+class LibroAdmin(AdminTablaGrande):
     list_display = ('titulo', 'autor', 'fecha_publicacion', 'cantidad_resenas', 'calificacion_promedio')
     search_fields = ('titulo', 'autor__nombre', 'resumen')
-    list_filter = ('autor', 'fecha_publicacion')
+    list_filter = (FiltroAutor, 'fecha_publicacion')
     date_hierarchy = 'fecha_publicacion'
-    readonly_fields = ('calificacion_promedio',)
-    
+    autocomplete_fields = ('autor',)
+    readonly_fields = ('calificacion_promedio', 'puntaje_bayesiano')
+
     fieldsets = (
         ('Información Básica', {
             'fields': ('titulo', 'autor', 'fecha_publicacion')
@@ -30,33 +205,51 @@ class LibroAdmin(admin.ModelAdmin):
             'fields': ('resumen',)
         }),
         ('Estadísticas', {
-            'fields': ('calificacion_promedio',),
+            'fields': ('calificacion_promedio', 'puntaje_bayesiano'),
             'classes': ('collapse',)
         }),
     )
-    
+
+    def get_queryset(self, request):
+        # Libro.__str__ incluye el nombre del autor: lo muestran el changelist
+        # y el autocompletado de ResenaAdmin
+        return super().get_queryset(request).select_related('autor')
+
+    def total_sin_filtros(self):
+        return EstadisticaAnio.objects.aggregate(total=Sum('cantidad_libros'))['total'] or 0
+
+    def periodos_jerarquia(self, anio=None):
+        # Los meses de un año se leen en la tabla, acotados por libro_fecha_idx
+        if anio is not None:
+            return None
+        anios = EstadisticaAnio.objects.filter(cantidad_libros__gt=0).values_list('anio', flat=True)
+        return [datetime.date(anio, 1, 1) for anio in anios]
+
     def cantidad_resenas(self, obj):
         """Muestra la cantidad de reseñas del libro"""
-        return obj.resenas.count()
+        return obj.cantidad_resenas
     cantidad_resenas.short_description = 'Cantidad de Reseñas'
-    
+    cantidad_resenas.admin_order_field = 'cantidad_resenas'
+
     def calificacion_promedio(self, obj):
-        """Calcula y muestra la calificación promedio del libro"""
-        resenas = obj.resenas.all()
-        if resenas.exists():
-            promedio = sum(r.calificacion for r in resenas) / resenas.count()
+        """Muestra la calificación promedio del libro a partir de las estadísticas almacenadas"""
+        promedio = obj.calificacion_promedio
+        if promedio is not None:
             return f"{promedio:.2f}/5"
         return "Sin reseñas"
     calificacion_promedio.short_description = 'Calificación Promedio'
 
 
 @admin.register(Resena)
-class ResenaAdmin(admin.ModelAdmin):
+class ResenaAdmin(AdminTablaGrande):
     list_display = ('libro', 'calificacion', 'fecha', 'texto_preview')
+    # Libro.__str__ incluye el nombre del autor
+    list_select_related = ('libro__autor',)
     search_fields = ('libro__titulo', 'texto')
-    list_filter = ('calificacion', 'fecha')
+    list_filter = (FiltroCalificacion, FiltroLibro, 'fecha')
     date_hierarchy = 'fecha'
-    
+    autocomplete_fields = ('libro',)
+
     fieldsets = (
         ('Información de la Reseña', {
             'fields': ('libro', 'calificacion', 'fecha')
@@ -65,11 +258,26 @@ class ResenaAdmin(admin.ModelAdmin):
             'fields': ('texto',)
         }),
     )
-    
+
+    def total_sin_filtros(self):
+        return EstadisticaMes.objects.aggregate(total=Sum('cantidad_resenas'))['total'] or 0
+
+    def periodos_jerarquia(self, anio=None):
+        # EstadisticaMes agrupa por mes en UTC, la zona horaria del proyecto
+        if settings.TIME_ZONE != 'UTC':
+            return None
+        meses = EstadisticaMes.objects.filter(cantidad_resenas__gt=0)
+        if anio is not None:
+            meses = meses.filter(mes__startswith=f'{anio:04d}-')
+        fechas = {
+            datetime.date(int(mes[:4]), int(mes[5:]) if anio is not None else 1, 1)
+            for mes in meses.values_list('mes', flat=True).distinct()
+        }
+        return sorted(fechas)
+
     def texto_preview(self, obj):
         """Muestra un preview del texto de la reseña"""
         if len(obj.texto) > 100:
             return obj.texto[:100] + "..."
         return obj.texto
     texto_preview.short_description = 'Vista Previa'
-
@@ -0,0 +1,144 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework.response import Response
+
+from .lectura_rapida import JSONRapidoRenderer
+from .viewsets import AutorViewSet, LibroViewSet, ResenaViewSet
+
+
+class LecturaAsyncView(View):
+    """
+    Versión async de list y retrieve de un ViewSet, para servidores ASGI.
+
+    ═══════════════════════════════════════════════════════════════
+    RUTA DE LECTURA ASYNC - EXPLICACIÓN:
+    ═══════════════════════════════════════════════════════════════
+    DRF no tiene vistas async, así que esta vista de Django reutiliza el
+    ViewSet (get_queryset, filter_backends, paginación, serializador y
+    cache de respuestas) y solo reemplaza las lecturas de la base de datos
+    por el ORM async:
+
+    - list: acount() para el total de la paginación y aiterator() para la
+      página (las precargas de prefetch_related se resuelven por bloque).
+      La paginación por cursor (?cursor=) también usa aiterator().
+    - retrieve: aget().
+
+    La parte sincrónica de DRF (autenticación, permisos, negociación de
+    contenido y la validación de los filtros de django-filter, que consulta
+    la base de datos) se ejecuta en un solo salto con sync_to_async, junto
+    con la lectura del cache. La serialización no hace consultas porque los
+    querysets de los ViewSets ya traen anotaciones, select_related y
+    prefetch_related (según ?fields= y ?expand=, ver campos_dinamicos.py).
+
+    Las respuestas son las mismas que las del ViewSet, pero solo en JSON
+    (la Browsable API hace consultas sincrónicas al renderizar).
+    ═══════════════════════════════════════════════════════════════
+    """
+    viewset_class = None
+    basename = None  # El mismo del router (api_urls.py), lo usa el cache de respuestas
+
+    async def get(self, request, pk=None):
+        accion = 'list' if pk is None else 'retrieve'
+        kwargs = {} if pk is None else {'pk': pk}
+        view = self.viewset_class(
+            action_map={'get': accion}, basename=self.basename, format_kwarg=None,
+            args=(), kwargs=kwargs, renderer_classes=[JSONRapidoRenderer],
+        )
+        drf_request = view.initialize_request(request, **kwargs)
+        view.request = drf_request
+        view.headers = view.default_response_headers
+
+        try:
+            queryset, clave, data = await sync_to_async(self.preparar)(view, drf_request)
+            if data is not None:
+                response = Response(data, headers={'X-Cache': 'HIT'})
+            else:
+                if accion == 'list':
+                    response = await self.listar(view, drf_request, queryset)
+                else:
+                    response = await self.obtener(view, drf_request, queryset)
+                if clave is not None:
+                    response = view.guardar_cache(clave, response)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+
+        response = view.finalize_response(drf_request, response)
+        response.render()
+        # Se retorna un HttpResponse ya renderizado: si se retornara el Response
+        # de DRF, Django llamaría a render() en un hilo con sync_to_async
+        http = HttpResponse(response.content, status=response.status_code)
+        for encabezado, valor in response.items():
+            http[encabezado] = valor
+        return http
+
+    def preparar(self, view, request):
+        """
+        Parte sincrónica de la petición: DRF initial() (autenticación, permisos,
+        throttling y negociación), el queryset filtrado y la lectura del cache.
+        Retorna (queryset, clave de cache o None, data cacheada o None).
+        """
+        view.initial(request)
+        clave = data = None
+        if view.usa_cache(request):
+            clave, data = view.leer_cache(request)
+            if data is not None:
+                return None, clave, data
+        return view.filter_queryset(view.get_queryset()), clave, data
+
+    async def listar(self, view, request, queryset):
+        filas = view.get_filas_rapidas(request)
+        if filas is not None and filas.claves_disponibles(queryset):
+            return await self.listar_rapido(view, request, queryset, filas)
+        paginator = view.paginator
+        if paginator is not None:
+            pagina = await paginator.apaginate_queryset(queryset, request, view=view)
+            if pagina is not None:
+                serializer = view.get_serializer(pagina, many=True)
+                return paginator.get_paginated_response(serializer.data)
+        objetos = [objeto async for objeto in queryset.aiterator()]
+        return Response(view.get_serializer(objetos, many=True).data)
+
+    async def listar_rapido(self, view, request, queryset, filas):
+        """list con la lectura rápida del ViewSet (ver lectura_rapida.py)"""
+        valores = view.consulta_rapida(queryset, filas)
+        pagina = None
+        if view.paginator is not None:
+            pagina = await view.paginator.apaginate_queryset(valores, request, view=view)
+        paginada = pagina is not None
+        if not paginada:
+            pagina = [fila async for fila in valores.aiterator()]
+        pks = [fila['pk'] for fila in pagina]
+        cargados = {nombre: await anidado.acargar(pks) for nombre, anidado in filas.anidados}
+        return view.respuesta_rapida(filas, pagina, cargados, paginada)
+
+    async def obtener(self, view, request, queryset):
+        filtro = {view.lookup_field: view.kwargs[view.lookup_url_kwarg or view.lookup_field]}
+        # Mismas respuestas 404 que get_object_or_404 de DRF
+        try:
+            objeto = await queryset.aget(**filtro)
+        except queryset.model.DoesNotExist:
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        view.check_object_permissions(request, objeto)
+        return Response(view.get_serializer(objeto).data)
+
+
+class AutorLecturaAsync(LecturaAsyncView):
+    """GET /api/async/authors/ y /api/async/authors/{id}/"""
+    viewset_class = AutorViewSet
+    basename = 'author'
+
+
+class LibroLecturaAsync(LecturaAsyncView):
+    """GET /api/async/books/ y /api/async/books/{id}/"""
+    viewset_class = LibroViewSet
+    basename = 'book'
+
+
+class ResenaLecturaAsync(LecturaAsyncView):
+    """GET /api/async/reviews/ y /api/async/reviews/{id}/"""
+    viewset_class = ResenaViewSet
+    basename = 'review'
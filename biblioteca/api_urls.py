@@ -1,14 +1,30 @@
-from django.urls import path, include
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
-from .viewsets import AutorViewSet, LibroViewSet, ResenaViewSet
+from .api_async import AutorLecturaAsync, LibroLecturaAsync, ResenaLecturaAsync
+from .exportacion import ExportacionView
+from .viewsets import AutorViewSet, EstadisticasViewSet, LibroViewSet, ResenaViewSet
 
 # Crear el router y registrar los viewsets
 router = DefaultRouter()
 router.register(r'authors', AutorViewSet, basename='author')
 router.register(r'books', LibroViewSet, basename='book')
 router.register(r'reviews', ResenaViewSet, basename='review')
+router.register(r'stats', EstadisticasViewSet, basename='stats')
 
 urlpatterns = [
+    # Exportación completa en streaming: /api/export/books.ndjson, /api/export/reviews.csv, ...
+    re_path(
+        r'^export/(?P<recurso>books|authors|reviews)\.(?P<formato>ndjson|csv)$',
+        ExportacionView.as_view(),
+        name='export'
+    ),
+    # Lectura async (list y retrieve) para servidores ASGI: /api/async/books/, ...
+    path('async/authors/', AutorLecturaAsync.as_view(), name='async-author-list'),
+    path('async/authors/<str:pk>/', AutorLecturaAsync.as_view(), name='async-author-detail'),
+    path('async/books/', LibroLecturaAsync.as_view(), name='async-book-list'),
+    path('async/books/<str:pk>/', LibroLecturaAsync.as_view(), name='async-book-detail'),
+    path('async/reviews/', ResenaLecturaAsync.as_view(), name='async-review-list'),
+    path('async/reviews/<str:pk>/', ResenaLecturaAsync.as_view(), name='async-review-detail'),
     path('', include(router.urls)),
 ]
 
@@ -5,3 +5,14 @@ class BibliotecaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'biblioteca'
 
+    def ready(self):
+        # Registra los receptores de señales que invalidan el cache de la API
+        from . import cache_api  # noqa: F401
+        # ...y las versiones de los fragmentos cacheados de las páginas HTML
+        from . import cache_html  # noqa: F401
+        # Instala el wrapper de instrumentación SQL en cada conexión nueva
+        from . import instrumentacion  # noqa: F401
+        # Inicia el vaciado del spool de reseñas con la primera petición
+        from . import ingesta  # noqa: F401
+        # Actualiza el índice de libros similares al guardar o eliminar libros
+        from . import similares  # noqa: F401
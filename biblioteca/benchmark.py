@@ -0,0 +1,113 @@
+"""
+Utilidades para los benchmarks de la API (comandos benchmark_*).
+
+- Medidor: cuenta las consultas SQL y el tiempo pasado en la base de datos
+  usando connection.execute_wrapper.
+- base_de_datos_temporal: crea una base de datos de prueba (como el test
+  runner de Django) para poder sembrar datos sin tocar la base real.
+- medir: ejecuta una URL varias veces y retorna consultas, tiempo en base de
+  datos, tiempo fuera de ella (serialización/render) y percentiles de latencia.
+"""
+import contextlib
+import gc
+import statistics
+import time
+
+from django.db import connection, connections
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+
+class Medidor:
+    """execute_wrapper que acumula la cantidad de consultas y el tiempo en la base de datos"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+@contextlib.contextmanager
+def base_de_datos_temporal(verbosity=0, archivo=None):
+    """
+    Crea la base de datos de prueba, aplica las migraciones y la elimina al salir.
+
+    Con SQLite la base de prueba es en memoria; `archivo` indica una ruta para
+    crearla en disco, necesario cuando varios hilos abren sus propias conexiones.
+    """
+    test = connections['default'].settings_dict['TEST']
+    nombre_original = test.get('NAME')
+    if archivo is not None:
+        test['NAME'] = archivo
+    setup_test_environment()
+    config = setup_databases(verbosity=verbosity, interactive=False, aliases={'default'})
+    try:
+        yield
+    finally:
+        teardown_databases(config, verbosity=verbosity)
+        teardown_test_environment()
+        test['NAME'] = nombre_original
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) con interpolación lineal"""
+    ordenados = sorted(valores)
+    if len(ordenados) == 1:
+        return ordenados[0]
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+
+def medir(client, url, repeticiones=20, calentamiento=2, **extra):
+    """
+    Ejecuta GET url `repeticiones` veces (después de `calentamiento` llamadas
+    que no se miden) y retorna un dict con:
+    - status: código HTTP de la última respuesta
+    - consultas: consultas SQL por petición (máximo observado)
+    - db_ms / fuera_db_ms: mediana del tiempo en la base de datos y del resto
+      (vista, serialización y render)
+    - p50_ms, p95_ms, p99_ms: percentiles de la latencia total
+    """
+    for _ in range(calentamiento):
+        client.get(url, **extra)
+
+    totales, en_db, consultas = [], [], 0
+    status = None
+    for _ in range(repeticiones):
+        # Las pausas del recolector por basura de mediciones anteriores
+        # distorsionan el p95; se recolecta antes de cada petición medida
+        gc.collect()
+        medidor = Medidor()
+        with connection.execute_wrapper(medidor):
+            inicio = time.perf_counter()
+            response = client.get(url, **extra)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            total = time.perf_counter() - inicio
+        status = response.status_code
+        totales.append(total)
+        en_db.append(medidor.segundos)
+        consultas = max(consultas, medidor.consultas)
+
+    return {
+        'status': status,
+        'consultas': consultas,
+        'db_ms': statistics.median(en_db) * 1000,
+        'fuera_db_ms': statistics.median([t - d for t, d in zip(totales, en_db)]) * 1000,
+        'p50_ms': percentil(totales, 50) * 1000,
+        'p95_ms': percentil(totales, 95) * 1000,
+        'p99_ms': percentil(totales, 99) * 1000,
+    }
@@ -0,0 +1,106 @@
+import re
+
+from django.db import connections
+from django.db.models import F
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+from .models import Libro, Resena
+
+
+class IndiceFTS:
+    """
+    Índice de texto completo (SQLite FTS5) asociado a un modelo.
+
+    La tabla virtual se crea en la migración 0004_indices_busqueda_fts y se
+    mantiene sincronizada mediante triggers, por lo que también refleja las
+    operaciones masivas (bulk_create, update, delete) y las bajas en cascada.
+    El tokenizador `unicode61 remove_diacritics 2` ignora tildes y diéresis:
+    "cortazar" encuentra "Cortázar".
+
+    La tabla está mapeada por un modelo no administrado (LibroBusqueda,
+    ResenaBusqueda) relacionado 1 a 1 con el modelo, así la búsqueda es un
+    JOIN por rowid y la relevancia sale de la columna oculta `rank` (bm25 con
+    los pesos por columna configurados en la migración 0005).
+    """
+
+    def __init__(self, tabla, sql_reconstruir):
+        self.tabla = tabla
+        self.sql_reconstruir = sql_reconstruir
+
+    def filtrar(self, queryset, consulta):
+        """Filtra el queryset a las filas que coinciden y anota su relevancia en `busqueda_rank`"""
+        # bm25() retorna valores negativos: cuanto menor, más relevante
+        return queryset.filter(busqueda__consulta__match=consulta).annotate(
+            busqueda_rank=F('busqueda__rank')
+        )
+
+    def reconstruir(self, using='default'):
+        """Vacía la tabla virtual y la vuelve a llenar desde las tablas del modelo"""
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.tabla}')
+            cursor.execute(self.sql_reconstruir)
+            cursor.execute(f'SELECT COUNT(*) FROM {self.tabla}')
+            return cursor.fetchone()[0]
+
+
+INDICES = {
+    Libro: IndiceFTS(
+        tabla='biblioteca_libro_fts',
+        sql_reconstruir=(
+            'INSERT INTO biblioteca_libro_fts(rowid, titulo, resumen, autor_nombre) '
+            'SELECT l.id, l.titulo, l.resumen, a.nombre '
+            'FROM biblioteca_libro l JOIN biblioteca_autor a ON a.id = l.autor_id'
+        ),
+    ),
+    Resena: IndiceFTS(
+        tabla='biblioteca_resena_fts',
+        sql_reconstruir=(
+            'INSERT INTO biblioteca_resena_fts(rowid, texto, libro_titulo) '
+            'SELECT r.id, r.texto, l.titulo '
+            'FROM biblioteca_resena r JOIN biblioteca_libro l ON l.id = r.libro_id'
+        ),
+    ),
+}
+
+
+def construir_consulta(terminos):
+    """
+    Convierte los términos de búsqueda en una consulta MATCH de FTS5.
+
+    Cada palabra se entrecomilla (para que no se interprete como operador de
+    FTS5) y se busca por prefijo; todas las palabras deben aparecer (AND).
+    Retorna una cadena vacía si no queda ninguna palabra.
+    """
+    palabras = []
+    for termino in terminos:
+        palabras.extend(re.findall(r'\w+', termino))
+    return ' AND '.join(f'"{palabra}"*' for palabra in palabras)
+
+
+def fts_disponible(queryset):
+    """Indica si el queryset puede usar el índice FTS5 (modelo indexado y base SQLite)"""
+    return queryset.model in INDICES and connections[queryset.db].vendor == 'sqlite'
+
+
+class FTS5SearchFilter(SearchFilter):
+    """
+    Reemplazo de SearchFilter que usa los índices FTS5 en lugar de LIKE '%term%'.
+
+    - Acepta el mismo parámetro ?search= que SearchFilter.
+    - Si no se pide un ?ordering= explícito, ordena los resultados por
+      relevancia (bm25). Por eso debe ir después de OrderingFilter en
+      filter_backends.
+    - En bases de datos distintas de SQLite, o para modelos sin índice,
+      se comporta exactamente como SearchFilter (usa search_fields).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        consulta = construir_consulta(self.get_search_terms(request))
+        if not consulta or not fts_disponible(queryset):
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = INDICES[queryset.model].filtrar(queryset, consulta)
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('busqueda_rank', 'pk')
+        return queryset
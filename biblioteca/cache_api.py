@@ -0,0 +1,204 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.response import Response
+
+from .models import Autor, Libro, Resena
+from .replicas import datos_leidos_hasta
+from .signals import resenas_modificadas
+
+
+PREFIJO = 'biblioteca:api'
+
+
+def get_cache():
+    return caches[settings.BIBLIOTECA_CACHE_API['CACHE']]
+
+
+# ═══════════════════════════════════════════════════════════════
+# CONTADORES DE GENERACIÓN
+# ═══════════════════════════════════════════════════════════════
+# Cada modelo tiene un contador en el cache. Las claves de las respuestas
+# incluyen los contadores de los modelos de los que dependen, así que al
+# incrementar un contador todas las respuestas anteriores dejan de usarse
+# (expiran solas por TIMEOUT) sin tener que buscarlas ni borrarlas.
+# Junto al contador se guarda la hora del último incremento: una respuesta
+# leída de una réplica con datos anteriores no se cachea (ver replicas.py).
+
+def _clave_generacion(modelo):
+    return f'{PREFIJO}:gen:{modelo}'
+
+
+def _clave_invalidacion(modelo):
+    return f'{PREFIJO}:inv:{modelo}'
+
+
+def obtener_generaciones(modelos):
+    """Retorna {modelo: generación} para los nombres de modelo indicados"""
+    cache = get_cache()
+    claves = {_clave_generacion(modelo): modelo for modelo in modelos}
+    valores = cache.get_many(list(claves))
+    for clave in claves:
+        if clave not in valores:
+            cache.add(clave, 1, timeout=None)
+            valores[clave] = cache.get(clave, 1)
+    return {modelo: valores.get(clave, 1) for clave, modelo in claves.items()}
+
+
+def incrementar_generacion(*modelos):
+    """Invalida todas las respuestas cacheadas que dependen de los modelos indicados"""
+    cache = get_cache()
+    for modelo in modelos:
+        clave = _clave_generacion(modelo)
+        cache.add(clave, 1, timeout=None)
+        try:
+            cache.incr(clave)
+        except ValueError:
+            # La clave expiró o fue desalojada entre add() e incr()
+            cache.set(clave, 2, timeout=None)
+        cache.set(_clave_invalidacion(modelo), time.time(), timeout=None)
+
+
+def ultima_invalidacion(modelos):
+    """Hora (timestamp) del último incremento de los contadores de los modelos, 0 si no hubo"""
+    valores = get_cache().get_many([_clave_invalidacion(modelo) for modelo in modelos])
+    return max(valores.values(), default=0)
+
+
+def _invalidar_al_confirmar(modelo, using=None):
+    # Se incrementa al confirmar la transacción: antes de eso los lectores
+    # todavía ven los datos viejos y podrían volver a cachearlos
+    transaction.on_commit(lambda: incrementar_generacion(modelo), using=using)
+
+
+@receiver([post_save, post_delete], sender=Autor, dispatch_uid='cache_api_autor')
+@receiver([post_save, post_delete], sender=Libro, dispatch_uid='cache_api_libro')
+def invalidar_por_modelo(sender, using=None, **kwargs):
+    _invalidar_al_confirmar(sender._meta.model_name, using=using)
+
+
+@receiver(resenas_modificadas, dispatch_uid='cache_api_resenas')
+def invalidar_por_resenas(sender, using=None, **kwargs):
+    _invalidar_al_confirmar(Resena._meta.model_name, using=using)
+
+
+# ═══════════════════════════════════════════════════════════════
+# MÉTRICAS
+# ═══════════════════════════════════════════════════════════════
+
+def _clave_metrica(nombre, resultado):
+    return f'{PREFIJO}:metricas:{nombre}:{resultado}'
+
+
+def registrar_metrica(nombre, resultado):
+    cache = get_cache()
+    clave = _clave_metrica(nombre, resultado)
+    if not cache.add(clave, 1, timeout=None):
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, 1, timeout=None)
+
+
+def obtener_metricas(nombres):
+    """Retorna {nombre: {'hit': n, 'miss': n}} con los contadores acumulados"""
+    cache = get_cache()
+    claves = [_clave_metrica(nombre, resultado) for nombre in nombres for resultado in ('hit', 'miss')]
+    valores = cache.get_many(claves)
+    return {
+        nombre: {
+            resultado: valores.get(_clave_metrica(nombre, resultado), 0)
+            for resultado in ('hit', 'miss')
+        }
+        for nombre in nombres
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+# MIXIN PARA VIEWSETS
+# ═══════════════════════════════════════════════════════════════
+
+class CacheRespuestaMixin:
+    """
+    Cachea las respuestas de list y retrieve de un ViewSet.
+
+    Se activa por ViewSet con `cache_respuestas = True` y se declaran en
+    `cache_modelos` los modelos cuyos cambios invalidan las respuestas
+    (incluidas las dependencias entre modelos, por ejemplo una reseña
+    nueva cambia rating_promedio y recent_reviews de /api/books/).
+
+    La clave incluye el esquema y el host (los enlaces next/previous son
+    absolutos), la ruta, los parámetros de consulta normalizados, el formato
+    de la respuesta y las generaciones de los modelos. Se guarda el
+    resultado serializado (response.data), por lo que en un acierto no se
+    ejecutan consultas ni serialización. Solo se cachea JSON: la Browsable
+    API incluye formularios que dependen del usuario.
+
+    Cada respuesta incluye el encabezado X-Cache: HIT o MISS y se acumulan
+    contadores por ViewSet (ver el comando metricas_cache). Una respuesta
+    leída de una réplica que todavía no tiene el último cambio no se guarda:
+    quedaría cacheada con la generación nueva y datos viejos.
+    """
+    cache_respuestas = False
+    cache_modelos = ()
+    cache_formatos = ('json',)
+
+    def list(self, request, *args, **kwargs):
+        return self._respuesta_cacheada(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._respuesta_cacheada(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_nombre(self):
+        return self.basename
+
+    def get_cache_clave(self, request):
+        generaciones = obtener_generaciones(self.cache_modelos)
+        parametros = sorted(
+            (clave, request.query_params.getlist(clave)) for clave in request.query_params
+        )
+        firma = repr((
+            request.scheme, request.get_host(), request.path, parametros,
+            request.accepted_renderer.format, sorted(generaciones.items()),
+        ))
+        resumen = hashlib.sha1(firma.encode('utf-8')).hexdigest()
+        return f'{PREFIJO}:resp:{self.get_cache_nombre()}:{resumen}'
+
+    def usa_cache(self, request):
+        return (
+            self.cache_respuestas
+            and settings.BIBLIOTECA_CACHE_API['ACTIVO']
+            and request.accepted_renderer.format in self.cache_formatos
+        )
+
+    def leer_cache(self, request):
+        """Retorna (clave, data); data es None si no hay una respuesta cacheada"""
+        clave = self.get_cache_clave(request)
+        data = get_cache().get(clave)
+        registrar_metrica(self.get_cache_nombre(), 'miss' if data is None else 'hit')
+        return clave, data
+
+    def lectura_desactualizada(self):
+        """True si la respuesta se leyó de una réplica sin los últimos cambios de cache_modelos"""
+        datos = datos_leidos_hasta()
+        return datos is not None and datos < ultima_invalidacion(self.cache_modelos)
+
+    def guardar_cache(self, clave, response):
+        if response.status_code == 200 and not self.lectura_desactualizada():
+            get_cache().set(clave, response.data, timeout=settings.BIBLIOTECA_CACHE_API['TIMEOUT'])
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def _respuesta_cacheada(self, vista, request, *args, **kwargs):
+        if not self.usa_cache(request):
+            return vista(request, *args, **kwargs)
+
+        clave, data = self.leer_cache(request)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+        return self.guardar_cache(clave, vista(request, *args, **kwargs))
@@ -0,0 +1,170 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+from .cache_api import obtener_generaciones, registrar_metrica, ultima_invalidacion
+from .models import Autor, Libro
+from .replicas import datos_leidos_hasta
+from .signals import resenas_modificadas
+
+
+PREFIJO = 'biblioteca:html'
+
+# Nombres (para metricas_cache) de las vistas decoradas con cache_pagina
+PAGINAS_CACHEADAS = []
+
+
+def get_cache():
+    return caches[settings.BIBLIOTECA_CACHE_HTML['CACHE']]
+
+
+def lectura_desactualizada(modelos):
+    """True si la petición leyó de una réplica sin los últimos cambios de los modelos"""
+    datos = datos_leidos_hasta()
+    return datos is not None and datos < ultima_invalidacion(modelos)
+
+
+# ═══════════════════════════════════════════════════════════════
+# VERSIONES POR OBJETO (CACHE DE FRAGMENTOS)
+# ═══════════════════════════════════════════════════════════════
+# Cada objeto modificado guarda en el cache la hora de su último cambio.
+# Las claves de los fragmentos de las plantillas ({% cache %} de cada
+# tarjeta) incluyen el pk y esa hora, así que editar un libro solo vuelve a
+# renderizar su tarjeta. Un objeto que nunca cambió tiene versión 0.
+
+def _clave_version(modelo, pk):
+    return f'{PREFIJO}:ver:{modelo}:{pk}'
+
+
+def obtener_versiones(objetos):
+    """Retorna {(modelo, pk): versión} para los pares (modelo, pk) indicados"""
+    claves = {_clave_version(modelo, pk): (modelo, pk) for modelo, pk in objetos}
+    valores = get_cache().get_many(list(claves))
+    return {objeto: valores.get(clave, 0) for clave, objeto in claves.items()}
+
+
+def marcar_modificados(modelo, pks):
+    """Cambia la versión de los objetos: sus fragmentos cacheados dejan de usarse"""
+    ahora = time.time()
+    get_cache().set_many({_clave_version(modelo, pk): ahora for pk in pks}, timeout=None)
+
+
+def versionar_libros(libros):
+    """
+    Agrega a cada libro `version_html`, la versión de su tarjeta: la del
+    libro y la de su autor (la tarjeta muestra el nombre del autor).
+    """
+    versiones = obtener_versiones(
+        [('libro', libro.pk) for libro in libros] + [('autor', libro.autor_id) for libro in libros]
+    )
+    for libro in libros:
+        libro.version_html = (versiones['libro', libro.pk], versiones['autor', libro.autor_id])
+    return libros
+
+
+def versionar_autores(autores):
+    """Agrega a cada autor `version_html`, la versión de su tarjeta"""
+    versiones = obtener_versiones([('autor', autor.pk) for autor in autores])
+    for autor in autores:
+        autor.version_html = versiones['autor', autor.pk]
+    return autores
+
+
+def contexto_fragmentos(modelos):
+    """
+    Variables de las plantillas para {% cache %}: el alias del cache y el
+    timeout. Si la petición leyó de una réplica atrasada el timeout es 0:
+    se usan los fragmentos ya cacheados pero no se guardan los renderizados
+    con datos viejos (quedarían con la versión nueva). Con el cache
+    desactivado (ACTIVO) también es 0.
+    """
+    configuracion = settings.BIBLIOTECA_CACHE_HTML
+    guardar = configuracion['ACTIVO'] and not lectura_desactualizada(modelos)
+    timeout = configuracion['TIMEOUT_FRAGMENTOS'] if guardar else 0
+    return {'cache_html': configuracion['CACHE'], 'cache_html_timeout': timeout}
+
+
+def _marcar_al_confirmar(modelo, pks, using=None):
+    # Igual que los contadores de generación de cache_api: al confirmar la transacción
+    transaction.on_commit(lambda: marcar_modificados(modelo, pks), using=using)
+
+
+@receiver([post_save, post_delete], sender=Autor, dispatch_uid='cache_html_autor')
+@receiver([post_save, post_delete], sender=Libro, dispatch_uid='cache_html_libro')
+def marcar_por_modelo(sender, instance, using=None, **kwargs):
+    _marcar_al_confirmar(sender._meta.model_name, [instance.pk], using=using)
+
+
+@receiver(resenas_modificadas, dispatch_uid='cache_html_resenas')
+def marcar_por_resenas(sender, libro_ids, using=None, **kwargs):
+    # Las reseñas cambian cantidad_resenas en la tarjeta de sus libros
+    _marcar_al_confirmar(Libro._meta.model_name, list(libro_ids), using=using)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CACHE DE PÁGINAS COMPLETAS
+# ═══════════════════════════════════════════════════════════════
+
+def cache_pagina(*modelos):
+    """
+    Cachea la página completa de una vista HTML para los visitantes
+    anónimos (GET y HEAD).
+
+    La clave incluye la ruta, los parámetros de consulta normalizados y las
+    generaciones de cache_api de los modelos de los que depende la página:
+    los mismos receptores de señales que invalidan las respuestas de la API
+    invalidan las páginas. Los usuarios autenticados siempre reciben la
+    página renderizada. Una página leída de una réplica atrasada no se
+    guarda. Cada respuesta incluye X-Cache: HIT o MISS.
+    """
+    def decorador(vista):
+        nombre = f'html:{vista.__name__}'
+        PAGINAS_CACHEADAS.append(nombre)
+
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if not usa_cache_pagina(request):
+                return vista(request, *args, **kwargs)
+
+            cache = get_cache()
+            clave = clave_pagina(request, modelos)
+            guardada = cache.get(clave)
+            registrar_metrica(nombre, 'miss' if guardada is None else 'hit')
+            if guardada is not None:
+                contenido, content_type = guardada
+                response = HttpResponse(contenido, content_type=content_type)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response = vista(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not lectura_desactualizada(modelos):
+                cache.set(clave, (response.content, response['Content-Type']),
+                          timeout=settings.BIBLIOTECA_CACHE_HTML['TIMEOUT'])
+            response['X-Cache'] = 'MISS'
+            return response
+
+        return envoltura
+    return decorador
+
+
+def usa_cache_pagina(request):
+    return (
+        settings.BIBLIOTECA_CACHE_HTML['ACTIVO']
+        and request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+    )
+
+
+def clave_pagina(request, modelos):
+    generaciones = obtener_generaciones(modelos)
+    parametros = sorted((clave, request.GET.getlist(clave)) for clave in request.GET)
+    firma = repr((request.path, parametros, sorted(generaciones.items())))
+    resumen = hashlib.sha1(firma.encode('utf-8')).hexdigest()
+    return f'{PREFIJO}:pagina:{resumen}'
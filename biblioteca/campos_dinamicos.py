@@ -0,0 +1,234 @@
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+
+def parsear_campos(valor):
+    """
+    Convierte 'id,titulo,autor.nombre' en un árbol {'id': {}, 'titulo': {}, 'autor': {'nombre': {}}}.
+    Retorna None si el parámetro no se envió o está vacío.
+    """
+    if not valor:
+        return None
+    arbol = {}
+    for ruta in valor.split(','):
+        nodo = arbol
+        for parte in ruta.strip().split('.'):
+            if parte:
+                nodo = nodo.setdefault(parte, {})
+    return arbol or None
+
+
+class CamposDinamicosMixin:
+    """
+    Campos seleccionables para un ModelSerializer (?fields=, ?omit=, ?expand=).
+
+    ═══════════════════════════════════════════════════════════════
+    SPARSE FIELDSETS - EXPLICACIÓN:
+    ═══════════════════════════════════════════════════════════════
+    - fields: solo estos campos. Con punto se eligen los campos de un
+      serializador anidado: ?fields=id,titulo,autor.nombre
+    - omit: todos los campos menos estos: ?omit=resumen,recent_reviews.texto
+    - expand: reemplaza el id de una relación por el objeto completo:
+      ?expand=autor (pedir subcampos con fields también la expande)
+
+    resolver_seleccion() convierte los parámetros en una "selección":
+    {campo: None} para los campos simples y {campo: selección anidada}
+    para los serializadores anidados o expandidos. El serializador se
+    construye con seleccion=... y elimina los campos no pedidos.
+
+    preparar_queryset() aplica la misma selección al queryset: only() con
+    las columnas necesarias, Prefetch para las relaciones expandidas y las
+    anotaciones o precargas propias de cada serializador. Así los campos
+    que no se piden tampoco se leen de la base de datos.
+    ═══════════════════════════════════════════════════════════════
+
+    Atributos de cada serializador:
+    - anidados: {campo: función que retorna la clase} de los campos que
+      siempre son serializadores anidados.
+    - expandibles: {campo: función que retorna la clase} de las relaciones
+      que se pueden expandir con ?expand=.
+    - dependencias: {campo: [columnas]} de los campos que no son columnas
+      del modelo (por ejemplo year depende de fecha_publicacion).
+    """
+    anidados = {}
+    expandibles = {}
+    dependencias = {}
+
+    def __init__(self, *args, seleccion=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seleccion = seleccion
+        if seleccion is None:
+            return
+        for nombre in list(self.fields):
+            if nombre not in seleccion:
+                self.fields.pop(nombre)
+        for nombre, subseleccion in seleccion.items():
+            if subseleccion is None or nombre not in self.fields:
+                continue
+            # Los campos calculados (SerializerMethodField) leen su selección con subseleccion()
+            if nombre in self.expandibles or isinstance(self.fields[nombre], serializers.BaseSerializer):
+                self.fields[nombre] = self._clase_anidada(nombre)(read_only=True, seleccion=subseleccion)
+
+    def subseleccion(self, nombre):
+        """Selección del serializador anidado `nombre` (None = todos sus campos)"""
+        return self.seleccion.get(nombre) if self.seleccion is not None else None
+
+    @classmethod
+    def _clase_anidada(cls, nombre):
+        fabrica = cls.anidados.get(nombre) or cls.expandibles.get(nombre)
+        return fabrica() if fabrica else None
+
+    @classmethod
+    def resolver_seleccion(cls, campos=None, omitir=None, expandir=None):
+        """
+        Retorna la selección para los árboles de campos (ver parsear_campos).
+        Lanza ValidationError (400) si se nombra un campo que no existe.
+        """
+        omitir = omitir or {}
+        expandir = expandir or {}
+        disponibles = list(cls.Meta.fields)
+        desconocidos = [
+            nombre for arbol in (campos or {}, omitir, expandir) for nombre in arbol
+            if nombre not in disponibles
+        ]
+        desconocidos += [
+            nombre for nombre in expandir
+            if nombre in disponibles and nombre not in cls.expandibles and nombre not in cls.anidados
+        ]
+        if desconocidos:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f"Campo desconocido o no expandible: '{nombre}'." for nombre in desconocidos
+                ]
+            })
+
+        seleccion = {}
+        for nombre in disponibles:
+            if campos is not None and nombre not in campos:
+                continue
+            if nombre in omitir and not omitir[nombre]:
+                continue
+            subcampos = campos.get(nombre) if campos is not None else None
+            anidado = (
+                nombre in cls.anidados
+                or (nombre in cls.expandibles and (nombre in expandir or subcampos))
+            )
+            if anidado:
+                seleccion[nombre] = cls._clase_anidada(nombre).resolver_seleccion(
+                    subcampos or None, omitir.get(nombre), expandir.get(nombre)
+                )
+            elif subcampos or omitir.get(nombre) or expandir.get(nombre):
+                raise serializers.ValidationError({
+                    api_settings.NON_FIELD_ERRORS_KEY: [f"El campo '{nombre}' no tiene subcampos."]
+                })
+            else:
+                seleccion[nombre] = None
+        return seleccion
+
+    @classmethod
+    def columnas(cls, seleccion):
+        """Columnas del modelo que necesitan los campos seleccionados (siempre incluye el pk)"""
+        modelo = cls.Meta.model
+        concretos = {campo.name for campo in modelo._meta.concrete_fields}
+        columnas = {modelo._meta.pk.name}
+        for nombre in seleccion:
+            if nombre in cls.dependencias:
+                columnas.update(cls.dependencias[nombre])
+            elif nombre in concretos:
+                columnas.add(nombre)
+        return columnas
+
+    @classmethod
+    def preparar_queryset(cls, queryset, seleccion, columnas_extra=()):
+        """
+        Restringe el queryset a lo que necesita la selección y reemplaza sus
+        precargas por las de la selección:
+        - only() con las columnas de los campos pedidos.
+        - select_related() para las columnas de otra tabla (autor__nombre).
+        - Prefetch, con el preparar_queryset del serializador anidado, para
+          las relaciones expandidas (si la relación se precarga, sus columnas
+          se leen del objeto precargado y no con un JOIN).
+
+        `columnas_extra` agrega columnas que se leen fuera del serializador,
+        por ejemplo la clave de ordenamiento de la paginación por cursor.
+        """
+        columnas = cls.columnas(seleccion) | set(columnas_extra)
+        relaciones = {campo.name for campo in cls.Meta.model._meta.concrete_fields if campo.is_relation}
+        expandidas = {
+            nombre for nombre, subseleccion in seleccion.items()
+            if subseleccion is not None and nombre in relaciones
+        }
+
+        columnas_relacion = {}
+        for columna in list(columnas):
+            relacion, _, campo = columna.partition('__')
+            if campo and relacion in expandidas:
+                columnas.discard(columna)
+                columnas_relacion.setdefault(relacion, set()).add(campo)
+
+        precargas = []
+        for nombre in expandidas:
+            clase = cls._clase_anidada(nombre)
+            columnas.add(nombre)
+            precargas.append(Prefetch(nombre, queryset=clase.preparar_queryset(
+                clase.Meta.model._default_manager.all(), seleccion[nombre], columnas_relacion.get(nombre, ())
+            )))
+
+        unidas = {columna.partition('__')[0] for columna in columnas if '__' in columna}
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if unidas:
+            queryset = queryset.select_related(*sorted(unidas))
+        if precargas:
+            queryset = queryset.prefetch_related(*precargas)
+        return queryset.only(*sorted(columnas))
+
+
+class CamposDinamicosViewSetMixin:
+    """
+    Aplica ?fields=, ?omit= y ?expand= a list y retrieve de un ViewSet.
+
+    La selección se resuelve una vez por petición con el serializador del
+    ViewSet; se usa en filter_queryset() (preparar_queryset, después de los
+    filtros y el ordenamiento) y en get_serializer(). Las demás acciones
+    usan siempre todos los campos.
+    """
+    campos_param = 'fields'
+    omitir_param = 'omit'
+    expandir_param = 'expand'
+    acciones_campos_dinamicos = ('list', 'retrieve')
+
+    def usa_campos_dinamicos(self):
+        return self.action in self.acciones_campos_dinamicos
+
+    def get_seleccion(self):
+        if not hasattr(self, '_seleccion'):
+            parametros = self.request.query_params
+            self._seleccion = self.get_serializer_class().resolver_seleccion(
+                campos=parsear_campos(parametros.get(self.campos_param)),
+                omitir=parsear_campos(parametros.get(self.omitir_param)),
+                expandir=parsear_campos(parametros.get(self.expandir_param)),
+            )
+        return self._seleccion
+
+    def get_columnas_ordenamiento(self, queryset):
+        """Columnas de ordenamiento del queryset, que la paginación por cursor lee de cada fila"""
+        # El mismo criterio que PaginacionKeyset.get_ordenamiento
+        concretos = {campo.name for campo in queryset.model._meta.concrete_fields}
+        nombres = [c for c in queryset.query.order_by if isinstance(c, str)]
+        if not nombres:
+            nombres = list(getattr(self, 'ordering', None) or queryset.model._meta.ordering or [])
+        return {nombre.lstrip('-') for nombre in nombres} & concretos
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.usa_campos_dinamicos():
+            queryset = self.get_serializer_class().preparar_queryset(
+                queryset, self.get_seleccion(), self.get_columnas_ordenamiento(queryset)
+            )
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.usa_campos_dinamicos():
+            kwargs.setdefault('seleccion', self.get_seleccion())
+        return super().get_serializer(*args, **kwargs)
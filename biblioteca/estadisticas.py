@@ -0,0 +1,145 @@
+from django.db import connections
+from django.db.models import F, Sum
+
+from .models import EstadisticaAnio, EstadisticaMes, EstadisticaNacionalidad
+
+
+class TablaResumen:
+    """
+    Tabla de resumen de las estadísticas del catálogo (EstadisticaAnio,
+    EstadisticaNacionalidad, EstadisticaMes).
+
+    Los triggers de la migración 0008_estadisticas_catalogo la mantienen al
+    día en cada escritura de libros, autores y reseñas, incluidas las
+    operaciones masivas y las bajas en cascada. reconstruir() la vuelve a
+    calcular desde las tablas del catálogo: sirve para repararla o para
+    cargarla después de importar datos con los triggers desactivados.
+    """
+
+    def __init__(self, modelo, claves, sql_reconstruir):
+        self.modelo = modelo
+        self.claves = claves
+        self.sql_reconstruir = sql_reconstruir
+
+    @property
+    def tabla(self):
+        return self.modelo._meta.db_table
+
+    def reconstruir(self, using='default'):
+        """Vacía la tabla y la vuelve a llenar con un GROUP BY; retorna las filas"""
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.tabla}')
+            cursor.execute(self.sql_reconstruir)
+            cursor.execute(f'SELECT COUNT(*) FROM {self.tabla}')
+            return cursor.fetchone()[0]
+
+    def leer(self, using='default'):
+        """Filas de la tabla como {clave: (contadores...)}"""
+        valores = [
+            campo.attname for campo in self.modelo._meta.concrete_fields
+            if campo.attname not in self.claves and not campo.auto_created
+        ]
+        return {
+            tuple(fila[:len(self.claves)]): fila[len(self.claves):]
+            for fila in self.modelo.objects.using(using).values_list(*self.claves, *valores)
+        }
+
+
+# Mismas claves que los triggers: fecha_publicacion y fecha son texto ISO (fecha en UTC)
+TABLAS = [
+    TablaResumen(
+        EstadisticaAnio,
+        claves=('anio',),
+        sql_reconstruir=(
+            'INSERT INTO biblioteca_estadisticaanio(anio, cantidad_libros) '
+            "SELECT CAST(strftime('%Y', fecha_publicacion) AS INTEGER), COUNT(*) "
+            'FROM biblioteca_libro GROUP BY 1'
+        ),
+    ),
+    TablaResumen(
+        EstadisticaNacionalidad,
+        claves=('nacionalidad',),
+        sql_reconstruir=(
+            'INSERT INTO biblioteca_estadisticanacionalidad(nacionalidad, cantidad_autores, cantidad_libros) '
+            'SELECT a.nacionalidad, COUNT(*), SUM((SELECT COUNT(*) FROM biblioteca_libro l WHERE l.autor_id = a.id)) '
+            'FROM biblioteca_autor a GROUP BY a.nacionalidad'
+        ),
+    ),
+    TablaResumen(
+        EstadisticaMes,
+        claves=('mes', 'calificacion'),
+        sql_reconstruir=(
+            'INSERT INTO biblioteca_estadisticames(mes, calificacion, cantidad_resenas, rating_cantidad, rating_suma) '
+            "SELECT strftime('%Y-%m', fecha), calificacion, COUNT(*), COUNT(rating), coalesce(SUM(rating), 0.0) "
+            'FROM biblioteca_resena GROUP BY 1, 2'
+        ),
+    ),
+]
+
+
+# ═══════════════════════════════════════════════════════════════
+# LECTURAS (una fila por grupo)
+# ═══════════════════════════════════════════════════════════════
+
+def _promedio(suma, cantidad):
+    return round(suma / cantidad, 2) if cantidad else None
+
+
+def por_anio(desde=None, hasta=None):
+    """Libros publicados por año, del más antiguo al más reciente"""
+    filas = EstadisticaAnio.objects.all()
+    if desde is not None:
+        filas = filas.filter(anio__gte=desde)
+    if hasta is not None:
+        filas = filas.filter(anio__lte=hasta)
+    return list(filas.values('anio', 'cantidad_libros'))
+
+
+def por_nacionalidad():
+    """Autores y libros por nacionalidad de los autores"""
+    return list(EstadisticaNacionalidad.objects.values('nacionalidad', 'cantidad_autores', 'cantidad_libros'))
+
+
+def _meses(desde=None, hasta=None):
+    filas = EstadisticaMes.objects.all()
+    if desde is not None:
+        filas = filas.filter(mes__gte=desde)
+    if hasta is not None:
+        filas = filas.filter(mes__lte=hasta)
+    return filas
+
+
+def por_mes(desde=None, hasta=None):
+    """
+    Volumen de reseñas por mes (AAAA-MM, UTC) con la calificación y el rating
+    promedio: suma las filas de cada calificación del mes.
+    """
+    filas = _meses(desde, hasta).values('mes').annotate(
+        resenas=Sum('cantidad_resenas'),
+        calificacion_suma=Sum(F('calificacion') * F('cantidad_resenas')),
+        ratings=Sum('rating_cantidad'),
+        ratings_suma=Sum('rating_suma'),
+    ).order_by('mes')
+    return [
+        {
+            'mes': fila['mes'],
+            'cantidad_resenas': fila['resenas'],
+            'calificacion_promedio': _promedio(fila['calificacion_suma'], fila['resenas']),
+            'resenas_con_rating': fila['ratings'],
+            'rating_promedio': _promedio(fila['ratings_suma'], fila['ratings']),
+        }
+        for fila in filas
+    ]
+
+
+def distribucion_calificaciones(desde=None, hasta=None):
+    """Reseñas por calificación en los meses indicados: las cinco calificaciones, con 0 si no hay"""
+    cantidades = dict(
+        _meses(desde, hasta).values('calificacion').annotate(
+            resenas=Sum('cantidad_resenas'),
+        ).order_by().values_list('calificacion', 'resenas')
+    )
+    return [
+        {'calificacion': calificacion, 'cantidad_resenas': cantidades.get(calificacion, 0)}
+        for calificacion in range(1, 6)
+    ]
@@ -0,0 +1,144 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.views import APIView
+
+from .viewsets import AutorViewSet, LibroViewSet, ResenaViewSet
+
+
+class Exportacion:
+    """
+    Describe la exportación de un recurso de la API.
+
+    - viewset: ViewSet cuyo get_queryset() y filter_backends se reutilizan,
+      así la exportación acepta los mismos filtros, búsqueda y ordenamiento
+      que el endpoint de listado.
+    - columnas: lista de (nombre en la salida, campo para values_list()).
+      Los campos relacionados (autor__nombre) se resuelven con JOIN en SQL.
+    - anotaciones: agregados que se agregan al queryset antes de values_list().
+    """
+
+    def __init__(self, viewset, columnas, anotaciones=None):
+        self.viewset = viewset
+        self.columnas = columnas
+        self.anotaciones = anotaciones or {}
+
+    @property
+    def encabezados(self):
+        return [nombre for nombre, _ in self.columnas]
+
+    def get_filas(self, request):
+        """Retorna un iterador de tuplas con las filas filtradas, leídas por bloques"""
+        # La acción no es 'list' para que no se apliquen ?fields= ni la
+        # selección de columnas del serializador (ver campos_dinamicos.py)
+        view = self.viewset(request=request, format_kwarg=None, action='export', args=(), kwargs={})
+        queryset = view.filter_queryset(view.get_queryset())
+        # Las precargas no aplican a values_list(): los datos relacionados van en el JOIN
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if self.anotaciones:
+            queryset = queryset.annotate(**self.anotaciones)
+        queryset = queryset.values_list(*[campo for _, campo in self.columnas])
+        return queryset.iterator(chunk_size=settings.BIBLIOTECA_EXPORTACION_CHUNK)
+
+
+EXPORTACIONES = {
+    'books': Exportacion(
+        LibroViewSet,
+        columnas=[
+            ('id', 'id'),
+            ('titulo', 'titulo'),
+            ('autor', 'autor_id'),
+            ('author_name', 'autor__nombre'),
+            ('fecha_publicacion', 'fecha_publicacion'),
+            ('year', 'publication_year'),
+            ('resumen', 'resumen'),
+            ('cantidad_resenas', 'cantidad_resenas'),
+            ('rating_promedio', 'rating_promedio'),
+        ],
+    ),
+    'authors': Exportacion(
+        AutorViewSet,
+        columnas=[
+            ('id', 'id'),
+            ('nombre', 'nombre'),
+            ('nacionalidad', 'nacionalidad'),
+            ('cantidad_libros', 'cantidad_libros'),
+            ('cantidad_resenas', 'cantidad_resenas'),
+            ('rating_promedio', 'rating_promedio'),
+            ('primer_anio', 'primer_anio'),
+            ('ultimo_anio', 'ultimo_anio'),
+        ],
+    ),
+    'reviews': Exportacion(
+        ResenaViewSet,
+        columnas=[
+            ('id', 'id'),
+            ('libro', 'libro_id'),
+            ('libro_titulo', 'libro__titulo'),
+            ('texto', 'texto'),
+            ('calificacion', 'calificacion'),
+            ('rating', 'rating'),
+            ('fecha', 'fecha'),
+        ],
+    ),
+}
+
+
+class _Eco:
+    """Objeto tipo archivo para csv.writer que retorna lo escrito en lugar de guardarlo"""
+
+    def write(self, valor):
+        return valor
+
+
+def generar_ndjson(encabezados, filas):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for fila in filas:
+        yield encoder.encode(dict(zip(encabezados, fila))) + '\n'
+
+
+def generar_csv(encabezados, filas):
+    writer = csv.writer(_Eco())
+    yield writer.writerow(encabezados)
+    for fila in filas:
+        yield writer.writerow(fila)
+
+
+class ExportacionView(APIView):
+    """
+    Exportación completa del catálogo en streaming.
+
+    URL: /api/export/<recurso>.<formato>
+    - recurso: books, authors o reviews
+    - formato: ndjson (un objeto JSON por línea) o csv
+
+    Ejemplos:
+        GET /api/export/books.ndjson
+        GET /api/export/reviews.csv?libro=1&ordering=-fecha
+
+    Las filas se leen con queryset.iterator(chunk_size=...) y se envían con
+    StreamingHttpResponse a medida que se generan, por lo que el consumo de
+    memoria no depende de la cantidad de filas. Acepta los mismos filtros
+    que el listado correspondiente (sin paginación).
+    """
+    formatos = {
+        'ndjson': ('application/x-ndjson; charset=utf-8', generar_ndjson),
+        'csv': ('text/csv; charset=utf-8', generar_csv),
+    }
+
+    def get(self, request, recurso, formato):
+        exportacion = EXPORTACIONES.get(recurso)
+        if exportacion is None or formato not in self.formatos:
+            raise NotFound('Exportación no disponible.')
+
+        content_type, generador = self.formatos[formato]
+        # Se construye el iterador aquí para que los errores de filtros se
+        # respondan con 400 antes de empezar a enviar el cuerpo
+        filas = exportacion.get_filas(request)
+        response = StreamingHttpResponse(generador(exportacion.encabezados, filas), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{recurso}.{formato}"'
+        return response
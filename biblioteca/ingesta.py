@@ -0,0 +1,330 @@
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as tz
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections, router, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Libro, ProgresoIngesta, Resena
+from .serializers import rating_por_defecto
+
+
+logger = logging.getLogger('biblioteca.ingesta')
+
+
+def config():
+    return settings.BIBLIOTECA_INGESTA_RESENAS
+
+
+def activa():
+    return config()['ACTIVO']
+
+
+# ═══════════════════════════════════════════════════════════════
+# SPOOL DURABLE
+# ═══════════════════════════════════════════════════════════════
+# Archivo SQLite aparte de la base principal: agregar una reseña es un
+# INSERT de una fila en otro archivo, con su propio lock de escritura, en
+# lugar de una transacción en la base del catálogo (triggers, estadísticas
+# y ranking). Con synchronous=FULL cada entrada está en disco antes de
+# responder 202. Las entradas se numeran con AUTOINCREMENT, que no reutiliza
+# números: el orden de los id es el orden en que se aceptaron.
+
+ESQUEMA = [
+    'CREATE TABLE IF NOT EXISTS identidad (valor TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS pendientes ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT, datos TEXT NOT NULL, recibida REAL NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS vaciados ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT, fecha REAL NOT NULL, resenas INTEGER NOT NULL,'
+    ' descartadas INTEGER NOT NULL, duracion_ms REAL NOT NULL, espera_ms REAL NOT NULL)',
+]
+
+
+class Spool:
+    """
+    Cola durable de reseñas aceptadas y todavía no insertadas.
+
+    Cada hilo usa su propia conexión. `identificador` distingue este archivo
+    de otro que lo reemplace (ver ProgresoIngesta).
+    """
+
+    def __init__(self, ruta):
+        self.ruta = str(ruta)
+        self._local = threading.local()
+        self._identificador = None
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('PRAGMA synchronous=FULL')
+            for sql in ESQUEMA:
+                conexion.execute(sql)
+            self._local.conexion = conexion
+        return conexion
+
+    @property
+    def identificador(self):
+        if self._identificador is None:
+            conexion = self._conexion()
+            conexion.execute('BEGIN IMMEDIATE')
+            try:
+                fila = conexion.execute('SELECT valor FROM identidad').fetchone()
+                if fila is None:
+                    fila = (str(uuid.uuid4()),)
+                    conexion.execute('INSERT INTO identidad (valor) VALUES (?)', fila)
+                conexion.execute('COMMIT')
+            except BaseException:
+                conexion.execute('ROLLBACK')
+                raise
+            self._identificador = fila[0]
+        return self._identificador
+
+    def agregar(self, datos):
+        """Guarda una entrada (dict serializable a JSON) y retorna su id"""
+        cursor = self._conexion().execute(
+            'INSERT INTO pendientes (datos, recibida) VALUES (?, ?)', (json.dumps(datos), time.time())
+        )
+        return cursor.lastrowid
+
+    def leer(self, cantidad):
+        """Las `cantidad` entradas más antiguas como [(id, datos, recibida)]"""
+        filas = self._conexion().execute(
+            'SELECT id, datos, recibida FROM pendientes ORDER BY id LIMIT ?', (cantidad,)
+        ).fetchall()
+        return [(pk, json.loads(datos), recibida) for pk, datos, recibida in filas]
+
+    def confirmar(self, hasta, resenas, descartadas, duracion_ms, espera_ms):
+        """Elimina las entradas aplicadas (id <= hasta) y registra las métricas del lote"""
+        conexion = self._conexion()
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            conexion.execute('DELETE FROM pendientes WHERE id <= ?', (hasta,))
+            cursor = conexion.execute(
+                'INSERT INTO vaciados (fecha, resenas, descartadas, duracion_ms, espera_ms) VALUES (?, ?, ?, ?, ?)',
+                (time.time(), resenas, descartadas, duracion_ms, espera_ms),
+            )
+            conexion.execute('DELETE FROM vaciados WHERE id <= ?', (cursor.lastrowid - config()['HISTORIAL'],))
+            conexion.execute('COMMIT')
+        except BaseException:
+            conexion.execute('ROLLBACK')
+            raise
+
+    def profundidad(self):
+        """(entradas pendientes, timestamp de la más antigua o None)"""
+        return self._conexion().execute('SELECT COUNT(*), MIN(recibida) FROM pendientes').fetchone()
+
+    def vaciados(self):
+        """Métricas de los últimos lotes: [(fecha, resenas, descartadas, duracion_ms, espera_ms)]"""
+        return self._conexion().execute(
+            'SELECT fecha, resenas, descartadas, duracion_ms, espera_ms FROM vaciados ORDER BY id'
+        ).fetchall()
+
+
+_spools = {}
+_spools_lock = threading.Lock()
+
+
+def get_spool():
+    """El Spool del archivo configurado en BIBLIOTECA_INGESTA_RESENAS['SPOOL'] (uno por proceso)"""
+    ruta = str(config()['SPOOL'])
+    with _spools_lock:
+        if ruta not in _spools:
+            _spools[ruta] = Spool(ruta)
+        return _spools[ruta]
+
+
+def encolar(validated_data):
+    """
+    Agrega al spool una reseña ya validada por ResenaSerializer y retorna
+    el cuerpo de la respuesta 202. La fecha de la reseña es la de su
+    aceptación, no la de su inserción.
+    """
+    fecha = timezone.now()
+    datos = {
+        'libro_id': validated_data['libro'].pk,
+        'texto': validated_data['texto'],
+        'calificacion': validated_data['calificacion'],
+        'rating': validated_data.get('rating'),
+        'fecha': fecha.isoformat(),
+    }
+    spool_id = get_spool().agregar(datos)
+    vaciador.iniciar()
+    return {'estado': 'encolada', 'spool_id': spool_id, 'libro': datos['libro_id'], 'fecha': datos['fecha']}
+
+
+# ═══════════════════════════════════════════════════════════════
+# VACIADO EN LOTES
+# ═══════════════════════════════════════════════════════════════
+
+def aplicar_lote(spool, entradas, using):
+    """
+    Inserta las reseñas de `entradas` en una transacción y retorna
+    (creadas, descartadas).
+
+    ProgresoIngesta se lee y actualiza dentro de la misma transacción (con
+    BEGIN IMMEDIATE, que toma el lock de escritura): las entradas que otro
+    proceso o un intento anterior ya aplicó se saltan. Se descartan las
+    reseñas de libros eliminados después de aceptarlas.
+    """
+    with transaction.atomic(using=using):
+        progreso, _ = ProgresoIngesta.objects.using(using).get_or_create(spool=spool.identificador)
+        nuevas = [(pk, datos) for pk, datos, _ in entradas if pk > progreso.ultimo_id]
+        if not nuevas:
+            return 0, 0
+        existentes = set(
+            Libro.objects.using(using).filter(pk__in={datos['libro_id'] for _, datos in nuevas})
+            .values_list('pk', flat=True)
+        )
+        resenas = [
+            Resena(
+                libro_id=datos['libro_id'],
+                texto=datos['texto'],
+                calificacion=datos['calificacion'],
+                # El mismo valor por defecto que ResenaViewSet.perform_create
+                rating=rating_por_defecto(datos),
+                fecha=datetime.fromisoformat(datos['fecha']),
+            )
+            for _, datos in nuevas if datos['libro_id'] in existentes
+        ]
+        # ResenaQuerySet.bulk_create actualiza las estadísticas de los libros
+        # una vez por lote y dispara la invalidación de los caches al confirmar
+        Resena.objects.using(using).bulk_create(resenas, batch_size=settings.BIBLIOTECA_RESENAS_LOTE['BATCH_SIZE'])
+        progreso.ultimo_id = nuevas[-1][0]
+        progreso.save(using=using)
+    descartadas = len(nuevas) - len(resenas)
+    if descartadas:
+        logger.warning('Ingesta: %d reseñas descartadas (sus libros ya no existen)', descartadas)
+    return len(resenas), descartadas
+
+
+def vaciar(spool=None, using=None):
+    """
+    Aplica todas las entradas del spool en lotes de LOTE reseñas y retorna
+    cuántas reseñas se crearon. También reprocesa las entradas que quedaron
+    de una caída: las que ya estaban aplicadas se saltan (ver aplicar_lote).
+    """
+    spool = spool or get_spool()
+    using = using or router.db_for_write(Resena)
+    total = 0
+    while True:
+        entradas = spool.leer(config()['LOTE'])
+        if not entradas:
+            return total
+        inicio = time.perf_counter()
+        creadas, descartadas = aplicar_lote(spool, entradas, using)
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        # Espera de la entrada más antigua del lote: aceptación → commit
+        espera_ms = (time.time() - entradas[0][2]) * 1000
+        spool.confirmar(entradas[-1][0], creadas, descartadas, duracion_ms, espera_ms)
+        total += creadas
+
+
+class Vaciador:
+    """
+    Hilo de fondo (uno por proceso) que vacía el spool cada INTERVALO
+    segundos. Se inicia con la primera petición que atiende el proceso, así
+    que también reprocesa lo que quedó en el spool de una caída anterior. Al
+    terminar el proceso hace un último vaciado; lo que no alcance a aplicar
+    queda en el spool para la próxima vez.
+    """
+
+    def __init__(self):
+        self._hilo = None
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+
+    def iniciar(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._ejecutar, name='biblioteca-ingesta', daemon=True)
+            self._hilo.start()
+
+    def detener(self, timeout=10):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+
+    def _ejecutar(self):
+        try:
+            while not self._detener.is_set():
+                self._vaciar()
+                self._detener.wait(config()['INTERVALO'])
+            # Último vaciado al terminar el proceso
+            self._vaciar()
+        finally:
+            connections.close_all()
+
+    def _vaciar(self):
+        try:
+            vaciar()
+        except Exception:
+            # Las entradas siguen en el spool; se reintentan en la próxima vuelta
+            logger.exception('Ingesta: error al vaciar el spool de reseñas')
+
+
+vaciador = Vaciador()
+atexit.register(vaciador.detener)
+
+
+@receiver(request_started, dispatch_uid='ingesta_resenas')
+def iniciar_vaciador(sender, **kwargs):
+    if activa():
+        vaciador.iniciar()
+
+
+# ═══════════════════════════════════════════════════════════════
+# MÉTRICAS
+# ═══════════════════════════════════════════════════════════════
+
+def _percentiles(valores):
+    if not valores:
+        return {'p50': None, 'p95': None, 'max': None}
+    valores = sorted(valores)
+    return {
+        'p50': round(valores[len(valores) // 2], 2),
+        'p95': round(valores[min(int(len(valores) * 0.95), len(valores) - 1)], 2),
+        'max': round(valores[-1], 2),
+    }
+
+
+def estado(spool=None):
+    """
+    Profundidad de la cola y latencia de los últimos HISTORIAL lotes:
+    duración de la transacción y espera de la reseña más antigua de cada
+    lote (desde que se aceptó hasta que se confirmó).
+
+    Con la ingesta inactiva y sin spool no se abre el archivo (abrirlo lo
+    crea): no hay nada pendiente ni lotes.
+    """
+    if spool is None and not activa() and not os.path.exists(config()['SPOOL']):
+        pendientes, mas_antigua, lotes = 0, None, []
+    else:
+        spool = spool or get_spool()
+        pendientes, mas_antigua = spool.profundidad()
+        lotes = spool.vaciados()
+    return {
+        'activa': activa(),
+        'pendientes': pendientes,
+        'espera_mas_antigua_s': round(time.time() - mas_antigua, 3) if mas_antigua else None,
+        'lotes': len(lotes),
+        'resenas_creadas': sum(lote[1] for lote in lotes),
+        'resenas_descartadas': sum(lote[2] for lote in lotes),
+        'ultimo_lote': datetime.fromtimestamp(lotes[-1][0], tz.utc).isoformat() if lotes else None,
+        'duracion_lote_ms': _percentiles([lote[3] for lote in lotes]),
+        'espera_ms': _percentiles([lote[4] for lote in lotes]),
+    }
@@ -0,0 +1,201 @@
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+logger = logging.getLogger('biblioteca.instrumentacion')
+
+# Registro de la petición en curso. Es una variable de contexto (y no un
+# connection.execute_wrapper por petición) porque las conexiones son locales
+# a cada hilo: en las vistas async el ORM ejecuta las consultas en otro hilo
+# (sync_to_async), que hereda el contexto pero no la conexión.
+_registro_actual = ContextVar('biblioteca_instrumentacion', default=None)
+
+# Colapsa listas de parámetros (IN (%s, %s, ...)) para agrupar consultas similares
+_LISTA_PARAMETROS = re.compile(r'%s(?:, %s)+')
+
+
+class RegistroConsultas:
+    """
+    execute_wrapper que acumula las consultas de una petición.
+
+    Solo guarda contadores (por SQL y por SQL + parámetros) y el tiempo total,
+    para que el costo por consulta sea mínimo; la agrupación de consultas
+    similares se calcula una sola vez al final de la petición.
+    """
+
+    def __init__(self):
+        self.cantidad = 0
+        self.segundos = 0.0
+        self.por_sql = Counter()
+        self.duplicadas = 0
+        self._vistas = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.cantidad += 1
+            self.por_sql[sql] += 1
+            try:
+                firma = (sql, tuple(params) if params is not None else None)
+                if firma in self._vistas:
+                    self.duplicadas += 1
+                else:
+                    self._vistas.add(firma)
+            except TypeError:
+                # Parámetros no hasheables (executemany): no se cuentan como duplicados
+                pass
+
+    def similares(self, minimo):
+        """Retorna [(sql, veces)] de las consultas que se repiten `minimo` veces o más (firma de N+1)"""
+        grupos = Counter()
+        for sql, veces in self.por_sql.items():
+            grupos[_LISTA_PARAMETROS.sub('%s', sql)] += veces
+        return [(sql, veces) for sql, veces in grupos.most_common() if veces >= minimo]
+
+
+def _registrar_consulta(execute, sql, params, many, context):
+    registro = _registro_actual.get()
+    if registro is None:
+        return execute(sql, params, many, context)
+    return registro(execute, sql, params, many, context)
+
+
+@receiver(connection_created, dispatch_uid='biblioteca_instrumentacion')
+def instalar_wrapper(sender, connection, **kwargs):
+    """Agrega el wrapper de instrumentación a cada conexión nueva (equivale a un execute_wrapper permanente)"""
+    if _registrar_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_registrar_consulta)
+
+
+def nombre_vista(request):
+    """Retorna el ViewSet y la acción que atendió la petición, por ejemplo 'LibroViewSet.list'"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    clase = getattr(match.func, 'cls', None)
+    if clase is None:
+        return match.view_name or match._func_path
+    acciones = getattr(match.func, 'actions', None) or {}
+    accion = acciones.get(request.method.lower())
+    return f'{clase.__name__}.{accion}' if accion else clase.__name__
+
+
+class InstrumentacionSQLMiddleware:
+    """
+    Mide las consultas SQL y los tiempos de cada petición.
+
+    Por cada petición instrumentada:
+    - Cuenta las consultas y el tiempo en la base de datos (en todas las
+      conexiones y también en las vistas async) con un execute_wrapper que
+      se instala en cada conexión al crearse.
+    - Separa el tiempo de la vista (incluye la serialización) del tiempo
+      de render de las respuestas de DRF y de TemplateResponse.
+    - Agrega el encabezado Server-Timing, que se ve en la pestaña Network
+      de las herramientas de desarrollo del navegador:
+          Server-Timing: db;dur=4.1;desc="3 consultas", app;dur=8.0, render;dur=1.2, total;dur=13.3
+    - Si la petición supera LENTA_MS o alguna consulta se repite
+      REPETICIONES_N1 veces o más (N+1), escribe un log estructurado (JSON)
+      en el logger 'biblioteca.instrumentacion' con la vista/acción, los
+      tiempos y los grupos de consultas repetidas.
+
+    Configuración en settings.BIBLIOTECA_INSTRUMENTACION; con MUESTREO < 1
+    solo se instrumenta esa fracción de las peticiones y el resto no tiene
+    ningún costo adicional. En las respuestas en streaming (exportaciones)
+    solo se mide hasta que se envían los encabezados.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._muestrear():
+            return self.get_response(request)
+        registro, token, inicio = self._iniciar(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _registro_actual.reset(token)
+        return self._finalizar(request, response, registro, inicio)
+
+    async def __acall__(self, request):
+        if not self._muestrear():
+            return await self.get_response(request)
+        registro, token, inicio = self._iniciar(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _registro_actual.reset(token)
+        return self._finalizar(request, response, registro, inicio)
+
+    def _muestrear(self):
+        config = settings.BIBLIOTECA_INSTRUMENTACION
+        return config['ACTIVO'] and random.random() < config['MUESTREO']
+
+    def _iniciar(self, request):
+        registro = RegistroConsultas()
+        request._instrumentacion = {}
+        return registro, _registro_actual.set(registro), time.perf_counter()
+
+    def _finalizar(self, request, response, registro, inicio):
+        config = settings.BIBLIOTECA_INSTRUMENTACION
+        tiempos = request._instrumentacion
+        total_ms = (time.perf_counter() - inicio) * 1000
+        db_ms = registro.segundos * 1000
+        render_ms = 0.0
+        if 'fin_vista' in tiempos and 'fin_render' in tiempos:
+            render_ms = (tiempos['fin_render'] - tiempos['fin_vista']) * 1000
+        app_ms = max(total_ms - db_ms - render_ms, 0.0)
+
+        if config['CABECERA']:
+            response['Server-Timing'] = (
+                f'db;dur={db_ms:.1f};desc="{registro.cantidad} consultas", '
+                f'app;dur={app_ms:.1f}, render;dur={render_ms:.1f}, total;dur={total_ms:.1f}'
+            )
+
+        repetidas = registro.similares(config['REPETICIONES_N1'])
+        if total_ms >= config['LENTA_MS'] or repetidas:
+            datos = {
+                'evento': 'peticion_lenta' if total_ms >= config['LENTA_MS'] else 'consultas_repetidas',
+                'metodo': request.method,
+                'ruta': request.path,
+                'vista': nombre_vista(request),
+                'status': response.status_code,
+                'total_ms': round(total_ms, 1),
+                'db_ms': round(db_ms, 1),
+                'app_ms': round(app_ms, 1),
+                'render_ms': round(render_ms, 1),
+                'consultas': registro.cantidad,
+                'duplicadas': registro.duplicadas,
+                'repetidas': [{'sql': sql[:300], 'veces': veces} for sql, veces in repetidas[:5]],
+            }
+            logger.warning(json.dumps(datos, ensure_ascii=False), extra={'instrumentacion': datos})
+        return response
+
+    def process_template_response(self, request, response):
+        # Se llama al terminar la vista y antes del render (Response de DRF,
+        # TemplateResponse); render() ejecuta los callbacks al terminar
+        tiempos = getattr(request, '_instrumentacion', None)
+        if tiempos is not None:
+            tiempos['fin_vista'] = time.perf_counter()
+            response.add_post_render_callback(lambda _: tiempos.__setitem__('fin_render', time.perf_counter()))
+        return response
@@ -0,0 +1,278 @@
+import operator
+from itertools import groupby
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional: sin orjson se usa el módulo json
+    orjson = None
+
+
+# Campos de DRF cuyo to_representation no cambia el valor que retorna values()
+_SIN_CONVERSION = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class LecturaRapidaNoSoportada(Exception):
+    """La selección de campos incluye un campo que la lectura rápida no sabe leer de values()"""
+
+
+def _float_igual_en_orjson(valor):
+    # json (repr) y orjson escriben igual los floats salvo los que repr
+    # muestra en notación científica: 1e-05 en json y 0.00001 en orjson
+    return valor == 0 or 1e-4 <= abs(valor) < 1e16
+
+
+class FilasRapidas:
+    """
+    Construye las filas de un serializador a partir de values(), sin crear
+    instancias de los modelos ni recorrer los campos de DRF por cada fila.
+
+    ═══════════════════════════════════════════════════════════════
+    LECTURA RÁPIDA - EXPLICACIÓN:
+    ═══════════════════════════════════════════════════════════════
+    Al crearse recorre una vez los campos del serializador (con su
+    selección de ?fields=) y obtiene para cada uno:
+    - la clave de values(): 'titulo', 'autor__nombre' (author_name), una
+      anotación ('cantidad_libros') o 'fecha_publicacion' para year, que
+      luego lee el atributo .year;
+    - la conversión: ninguna para los campos que ya vienen como el tipo de
+      salida (textos, enteros, ids), to_representation del propio campo para
+      fechas y floats, o la de `valores_rapidos` del serializador para los
+      SerializerMethodField (rating_promedio).
+
+    Los campos anidados que declaran `anidados_rapidos` en el serializador
+    (recent_reviews) se leen con una consulta values() por página. Si algún
+    campo no se puede leer así (una relación expandida con ?expand=) se
+    lanza LecturaRapidaNoSoportada y la vista usa el serializador.
+    ═══════════════════════════════════════════════════════════════
+    """
+
+    def __init__(self, serializer_class, seleccion=None):
+        serializer = serializer_class(seleccion=seleccion)
+        self.modelo = serializer_class.Meta.model
+        self.columnas = []
+        self.anidados = []
+        valores_rapidos = getattr(serializer_class, 'valores_rapidos', {})
+        anidados_rapidos = getattr(serializer_class, 'anidados_rapidos', {})
+        for campo in serializer._readable_fields:
+            nombre = campo.field_name
+            if nombre in valores_rapidos:
+                # Los SerializerMethodField reciben siempre el valor, incluso None
+                clave, conversion = valores_rapidos[nombre]
+                self.columnas.append((nombre, clave, conversion, True))
+            elif nombre in anidados_rapidos:
+                self.anidados.append((nombre, anidados_rapidos[nombre](serializer.subseleccion(nombre))))
+                # Reserva la posición del campo: se completa con los anidados cargados
+                self.columnas.append((nombre, None, None, False))
+            else:
+                self.columnas.append(self._columna(campo))
+        self.claves = {'pk'} | {clave for _, clave, _, _ in self.columnas if clave is not None}
+
+    def _columna(self, campo):
+        if isinstance(campo, (serializers.SerializerMethodField, serializers.BaseSerializer)):
+            raise LecturaRapidaNoSoportada(campo.field_name)
+        if isinstance(campo, serializers.RelatedField) and (
+            not isinstance(campo, serializers.PrimaryKeyRelatedField) or campo.pk_field is not None
+        ):
+            raise LecturaRapidaNoSoportada(campo.field_name)
+
+        # source_attrs ['autor', 'nombre'] -> 'autor__nombre'; los atributos que
+        # no son campos del modelo (fecha_publicacion.year) se leen del valor
+        modelo, partes, atributos = self.modelo, [], list(campo.source_attrs)
+        while atributos:
+            try:
+                campo_modelo = modelo._meta.get_field(atributos[0])
+            except FieldDoesNotExist:
+                break
+            if campo_modelo.null and len(atributos) > 1:
+                # DRF omite el campo si un valor intermedio es None
+                raise LecturaRapidaNoSoportada(campo.field_name)
+            partes.append(atributos.pop(0))
+            if not campo_modelo.is_relation:
+                break
+            if atributos:
+                modelo = campo_modelo.related_model
+            elif not isinstance(campo, serializers.PrimaryKeyRelatedField):
+                # ReadOnlyField(source='autor') retornaría la instancia
+                raise LecturaRapidaNoSoportada(campo.field_name)
+        if not partes:
+            # Una anotación del queryset (cantidad_libros)
+            partes.append(atributos.pop(0))
+
+        funciones = []
+        if atributos:
+            funciones.append(operator.attrgetter('.'.join(atributos)))
+        if not isinstance(campo, _SIN_CONVERSION):
+            funciones.append(campo.to_representation)
+        if not funciones:
+            conversion = None
+        elif len(funciones) == 1:
+            conversion = funciones[0]
+        else:
+            def conversion(valor, atributo=funciones[0], representacion=funciones[1]):
+                return representacion(atributo(valor))
+        return campo.field_name, '__'.join(partes), conversion, False
+
+    def claves_disponibles(self, queryset):
+        """True si todas las anotaciones que usan las columnas están en el queryset"""
+        for clave in self.claves:
+            if clave == 'pk' or '__' in clave:
+                continue
+            try:
+                self.modelo._meta.get_field(clave)
+            except FieldDoesNotExist:
+                if clave not in queryset.query.annotations:
+                    return False
+        return True
+
+    def convertir(self, filas):
+        """
+        Convierte las filas de values() en las de la respuesta.
+        Retorna (filas, seguro_orjson): seguro_orjson es False si algún float
+        se escribiría distinto con orjson que con json.
+        """
+        columnas = self.columnas
+        resultado = []
+        seguro = True
+        for fila in filas:
+            salida = {}
+            for nombre, clave, conversion, siempre in columnas:
+                if clave is None:
+                    salida[nombre] = None
+                    continue
+                valor = fila[clave]
+                if conversion is not None and (siempre or valor is not None):
+                    valor = conversion(valor)
+                if type(valor) is float and not _float_igual_en_orjson(valor):
+                    seguro = False
+                salida[nombre] = valor
+            resultado.append(salida)
+        return resultado, seguro
+
+
+class AnidadoRapido:
+    """
+    Lectura rápida de un campo anidado de muchos objetos (por ejemplo las
+    reseñas recientes de cada libro): `consulta(pks)` retorna el queryset
+    ordenado por `clave_padre` y `filas` convierte cada fila.
+    """
+
+    def __init__(self, filas, consulta, clave_padre):
+        self.filas = filas
+        self.consulta = consulta
+        self.clave_padre = clave_padre
+
+    def queryset(self, pks):
+        return self.consulta(pks).values(*(self.filas.claves | {self.clave_padre}))
+
+    def agrupar(self, valores):
+        """Retorna ({pk del padre: [filas convertidas]}, seguro_orjson)"""
+        convertidas, seguro = self.filas.convertir(valores)
+        por_padre = {}
+        for padre, grupo in groupby(zip(valores, convertidas), key=lambda par: par[0][self.clave_padre]):
+            por_padre[padre] = [convertida for _, convertida in grupo]
+        return por_padre, seguro
+
+    def cargar(self, pks):
+        return self.agrupar(list(self.queryset(pks)))
+
+    async def acargar(self, pks):
+        return self.agrupar([fila async for fila in self.queryset(pks).aiterator()])
+
+
+class LecturaRapidaMixin:
+    """
+    Modo de lectura rápida para list de un ViewSet (ver FilasRapidas).
+
+    Se usa en las respuestas JSON de list si BIBLIOTECA_LECTURA_RAPIDA['ACTIVO']
+    y la selección de campos lo permite. El queryset es el mismo de la vista
+    (filtros, búsqueda, ordenamiento y paginación, incluida la paginación por
+    cursor) pero se lee con values(). La respuesta es idéntica byte a byte a
+    la del serializador (ver el comando verificar_lectura_rapida) y se marca
+    para que JSONRapidoRenderer la escriba con orjson.
+    """
+
+    def get_filas_rapidas(self, request):
+        """Retorna FilasRapidas para esta petición o None si se debe usar el serializador"""
+        if not (
+            settings.BIBLIOTECA_LECTURA_RAPIDA['ACTIVO']
+            and self.action == 'list'
+            and request.accepted_renderer.format == 'json'
+        ):
+            return None
+        try:
+            return FilasRapidas(self.get_serializer_class(), self.get_seleccion())
+        except LecturaRapidaNoSoportada:
+            return None
+
+    def consulta_rapida(self, queryset, filas):
+        """values() del queryset con las claves de las filas y las del ordenamiento (paginación por cursor)"""
+        ordenamiento = [c for c in queryset.query.order_by if isinstance(c, str)]
+        if not ordenamiento:
+            ordenamiento = list(getattr(self, 'ordering', None) or queryset.model._meta.ordering or [])
+        claves = filas.claves | {'pk' if c.lstrip('-') == 'id' else c.lstrip('-') for c in ordenamiento}
+        return queryset.prefetch_related(None).values(*sorted(claves))
+
+    def list(self, request, *args, **kwargs):
+        filas = self.get_filas_rapidas(request)
+        if filas is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        if not filas.claves_disponibles(queryset):
+            return super().list(request, *args, **kwargs)
+
+        valores = self.consulta_rapida(queryset, filas)
+        pagina = self.paginate_queryset(valores)
+        paginada = pagina is not None
+        if not paginada:
+            pagina = list(valores)
+        pks = [fila['pk'] for fila in pagina]
+        cargados = {nombre: anidado.cargar(pks) for nombre, anidado in filas.anidados}
+        return self.respuesta_rapida(filas, pagina, cargados, paginada)
+
+    def respuesta_rapida(self, filas, pagina, cargados, paginada):
+        """Response con las filas convertidas; `cargados` es {nombre: resultado de AnidadoRapido.cargar}"""
+        salida, seguro = filas.convertir(pagina)
+        for nombre, (por_pk, seguro_anidado) in cargados.items():
+            seguro = seguro and seguro_anidado
+            for fila, objeto in zip(pagina, salida):
+                objeto[nombre] = por_pk.get(fila['pk'], [])
+        response = self.get_paginated_response(salida) if paginada else Response(salida)
+        response.json_rapido = seguro
+        return response
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """
+    JSONRenderer que escribe con orjson las respuestas de la lectura rápida.
+
+    Solo se usa orjson si la respuesta viene marcada por LecturaRapidaMixin
+    (datos primitivos cuyos floats orjson escribe igual que json) y la salida
+    es compacta, con la misma salida que JSONRenderer: UTF-8 sin escapar y
+    con U+2028/U+2029 escapados. Las demás respuestas y las peticiones con
+    indent (application/json; indent=4) usan JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        response = renderer_context.get('response')
+        if (
+            orjson is None
+            or data is None
+            or not getattr(response, 'json_rapido', False)
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data).replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,215 @@
+import math
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+
+
+PREFIJO = 'biblioteca:limites'
+
+METODOS_ESCRITURA = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def config():
+    return settings.BIBLIOTECA_LIMITES
+
+
+# ═══════════════════════════════════════════════════════════════
+# COSTO DE CADA PETICIÓN
+# ═══════════════════════════════════════════════════════════════
+
+def costo_peticion(request, view):
+    """
+    Fichas que consume una petición a un ViewSet según su acción y sus
+    parámetros (ver BIBLIOTECA_LIMITES):
+    - la acción: COSTOS[acción], o COSTO_ACCION / COSTO_ESCRITURA,
+    - ?search= suma COSTO_BUSQUEDA (búsqueda de texto completo),
+    - ?page=N suma una ficha cada PAGINAS_POR_FICHA páginas: el OFFSET
+      recorre todas las filas anteriores (?cursor= no tiene ese costo),
+    - ?page_size= mayor que PAGE_SIZE suma una ficha cada FILAS_POR_FICHA filas.
+    Nunca supera CAPACIDAD, para que cualquier petición pueda pasar con la
+    cubeta llena.
+    """
+    configuracion = config()
+    accion = getattr(view, 'action', None)
+    if request.method in METODOS_ESCRITURA:
+        costo = configuracion['COSTOS'].get(accion, configuracion['COSTO_ESCRITURA'])
+    else:
+        costo = configuracion['COSTOS'].get(accion, configuracion['COSTO_ACCION'])
+
+    parametros = request.query_params
+    if parametros.get('search'):
+        costo += configuracion['COSTO_BUSQUEDA']
+    pagina = _entero(parametros.get('page'))
+    if pagina > 1:
+        costo += (pagina - 1) // configuracion['PAGINAS_POR_FICHA']
+    filas = _entero(parametros.get('page_size'))
+    if filas > settings.REST_FRAMEWORK['PAGE_SIZE']:
+        costo += filas // configuracion['FILAS_POR_FICHA']
+    return min(costo, configuracion['CAPACIDAD'])
+
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return 0
+
+
+# ═══════════════════════════════════════════════════════════════
+# CUBETAS DE FICHAS (TOKEN BUCKET) POR CLIENTE
+# ═══════════════════════════════════════════════════════════════
+# Cada cliente tiene una cubeta de CAPACIDAD fichas que se recarga a RECARGA
+# fichas por segundo. Una petición pasa si hay fichas para su costo: admite
+# ráfagas de hasta CAPACIDAD y un ritmo sostenido de RECARGA por segundo.
+# El estado (fichas, momento) se guarda en el cache local (LocMemCache, por
+# proceso) y vence cuando la cubeta ya estaría llena, así que los clientes
+# inactivos no ocupan memoria. El lock hace atómica la lectura y escritura
+# entre los hilos del proceso.
+
+_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[config()['CACHE']]
+
+
+def consumir(cliente, costo, ahora=None):
+    """
+    Descuenta `costo` fichas de la cubeta del cliente. Retorna (permitido,
+    segundos hasta que haya fichas suficientes).
+    """
+    capacidad = config()['CAPACIDAD']
+    recarga = config()['RECARGA']
+    ahora = time.monotonic() if ahora is None else ahora
+    clave = f'{PREFIJO}:cubeta:{cliente}'
+    cache = get_cache()
+    with _lock:
+        fichas, momento = cache.get(clave, (capacidad, ahora))
+        fichas = min(capacidad, fichas + (ahora - momento) * recarga)
+        if fichas < costo:
+            return False, (costo - fichas) / recarga
+        fichas -= costo
+        cache.set(clave, (fichas, ahora), timeout=math.ceil((capacidad - fichas) / recarga) + 1)
+    return True, 0.0
+
+
+class ThrottleCosto(BaseThrottle):
+    """
+    Throttling de DRF con cubetas de fichas por cliente ponderadas por el
+    costo de cada petición (ver costo_peticion). El cliente es el usuario
+    autenticado o, si no hay, la IP (get_ident respeta NUM_PROXIES). Al
+    rechazar, DRF responde 429 con Retry-After.
+    """
+
+    def allow_request(self, request, view):
+        if not config()['ACTIVO']:
+            return True
+        if request.user and request.user.is_authenticated:
+            cliente = f'usuario:{request.user.pk}'
+        else:
+            cliente = f'ip:{self.get_ident(request)}'
+        permitido, self.espera = consumir(cliente, costo_peticion(request, view))
+        return permitido
+
+    def wait(self):
+        # Retry-After va en segundos enteros
+        return math.ceil(self.espera)
+
+
+# ═══════════════════════════════════════════════════════════════
+# LÍMITE DE CONCURRENCIA (LOAD SHEDDING)
+# ═══════════════════════════════════════════════════════════════
+
+class Concurrencia:
+    """Peticiones en curso en el proceso, con un máximo"""
+
+    def __init__(self):
+        self._condicion = threading.Condition()
+        self.en_curso = 0
+        self.rechazadas = 0
+
+    def entrar(self, maximo, espera=0):
+        """
+        Ocupa un lugar si hay menos de `maximo` peticiones en curso, esperando
+        hasta `espera` segundos a que se libere uno. Retorna si lo ocupó.
+        """
+        with self._condicion:
+            if self.en_curso >= maximo and espera > 0:
+                self._condicion.wait_for(lambda: self.en_curso < maximo, timeout=espera)
+            if self.en_curso >= maximo:
+                self.rechazadas += 1
+                return False
+            self.en_curso += 1
+            return True
+
+    def salir(self):
+        with self._condicion:
+            self.en_curso -= 1
+            self._condicion.notify()
+
+
+concurrencia = Concurrencia()
+
+
+class LimiteConcurrenciaMiddleware:
+    """
+    Rechaza peticiones cuando el proceso ya atiende CONCURRENCIA_MAXIMA.
+
+    En lugar de encolar trabajo que no se alcanza a atender (y que hace
+    lentas a todas las peticiones), una petición que llega con el proceso
+    lleno espera hasta ESPERA_MAXIMA segundos a que se libere un lugar y si
+    no, recibe 503 con Retry-After. Solo se aplica a las rutas de
+    PREFIJOS_LIMITADOS y de la raíz (lista de libros): el admin y los
+    archivos estáticos siguen atendiéndose.
+    En las vistas async no se espera (bloquearía el event loop). Como en
+    la instrumentación, las respuestas en streaming ocupan su lugar hasta
+    que se envían los encabezados.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._limitada(request):
+            return self.get_response(request)
+        if not concurrencia.entrar(config()['CONCURRENCIA_MAXIMA'], config()['ESPERA_MAXIMA']):
+            return self._rechazar()
+        try:
+            return self.get_response(request)
+        finally:
+            concurrencia.salir()
+
+    async def __acall__(self, request):
+        if not self._limitada(request):
+            return await self.get_response(request)
+        if not concurrencia.entrar(config()['CONCURRENCIA_MAXIMA']):
+            return self._rechazar()
+        try:
+            return await self.get_response(request)
+        finally:
+            concurrencia.salir()
+
+    def _limitada(self, request):
+        # '/' (lista_libros) se compara exacto: como prefijo incluiría todas las rutas
+        return config()['ACTIVO'] and (
+            request.path == '/' or request.path.startswith(tuple(config()['PREFIJOS_LIMITADOS']))
+        )
+
+    def _rechazar(self):
+        response = JsonResponse(
+            {'error': 'El servidor está ocupado, intente de nuevo en unos segundos'}, status=503
+        )
+        response['Retry-After'] = str(config()['RETRY_AFTER'])
+        return response
@@ -0,0 +1,162 @@
+import asyncio
+import io
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+
+from biblioteca.benchmark import base_de_datos_temporal, percentil
+from biblioteca.management.commands.benchmark_endpoints import TAMANOS
+from biblioteca.models import Libro
+
+
+def endpoints(libro):
+    """Retorna {nombre: (url WSGI, url async)} con las rutas de lectura a comparar"""
+    return {
+        'authors-list': ('/api/authors/', '/api/async/authors/'),
+        'books-list': ('/api/books/', '/api/async/books/'),
+        'books-retrieve': (f'/api/books/{libro}/', f'/api/async/books/{libro}/'),
+        'books-search': ('/api/books/?search=casa', '/api/async/books/?search=casa'),
+        'reviews-list': ('/api/reviews/?page=5', '/api/async/reviews/?page=5'),
+        'reviews-cursor': ('/api/reviews/?ordering=-fecha&cursor=', '/api/async/reviews/?ordering=-fecha&cursor='),
+    }
+
+
+def _resumen(latencias, segundos):
+    return {
+        'rps': len(latencias) / segundos,
+        'p50_ms': percentil(latencias, 50) * 1000,
+        'p95_ms': percentil(latencias, 95) * 1000,
+    }
+
+
+def medir_wsgi(url, workers, peticiones, calentamiento=5):
+    """N hilos, cada uno con su Client (WSGIHandler), hasta completar `peticiones`"""
+    contador = itertools.count()
+
+    def worker():
+        client = Client(HTTP_ACCEPT='application/json')
+        latencias = []
+        try:
+            while next(contador) < peticiones:
+                inicio = time.perf_counter()
+                response = client.get(url)
+                latencias.append(time.perf_counter() - inicio)
+                if response.status_code != 200:
+                    raise CommandError(f'{url}: status {response.status_code}')
+        finally:
+            connections.close_all()
+        return latencias
+
+    client = Client(HTTP_ACCEPT='application/json')
+    for _ in range(calentamiento):
+        client.get(url)
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futuros = [executor.submit(worker) for _ in range(workers)]
+        latencias = [latencia for futuro in futuros for latencia in futuro.result()]
+    return _resumen(latencias, time.perf_counter() - inicio)
+
+
+async def _medir_asgi(url, workers, peticiones, calentamiento):
+    contador = itertools.count()
+
+    async def worker():
+        client = AsyncClient(HTTP_ACCEPT='application/json')
+        latencias = []
+        while next(contador) < peticiones:
+            inicio = time.perf_counter()
+            response = await client.get(url)
+            latencias.append(time.perf_counter() - inicio)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: status {response.status_code}')
+        return latencias
+
+    client = AsyncClient(HTTP_ACCEPT='application/json')
+    for _ in range(calentamiento):
+        await client.get(url)
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*[worker() for _ in range(workers)])
+    latencias = [latencia for propias in resultados for latencia in propias]
+    return _resumen(latencias, time.perf_counter() - inicio)
+
+
+def medir_asgi(url, workers, peticiones, calentamiento=5):
+    """Un event loop con N tareas concurrentes, cada una con su AsyncClient (ASGIHandler)"""
+    return asyncio.run(_medir_asgi(url, workers, peticiones, calentamiento))
+
+
+class Command(BaseCommand):
+    """
+    Compara el throughput concurrente de la lectura WSGI y la lectura async.
+
+    Con la misma cantidad de workers (concurrencia) mide:
+    - WSGI: los ViewSets (/api/books/, ...) servidos por WSGIHandler con
+      N hilos, como un servidor WSGI con N hilos por proceso.
+    - ASGI: las vistas async (/api/async/books/, ...) servidas por
+      ASGIHandler con N peticiones concurrentes en un solo event loop.
+
+    Ambos caminos corren en el mismo proceso, sobre la misma base de datos
+    temporal en disco (sembrada con generar_datos) y con el cache de
+    respuestas y la instrumentación SQL desactivados. Reporta peticiones
+    por segundo y latencia p50/p95 de cada endpoint y cantidad de workers.
+
+    Uso:
+        python manage.py benchmark_async
+        python manage.py benchmark_async --workers 1 --workers 8 --workers 32 --peticiones 1000
+        python manage.py benchmark_async --tamano grande --endpoint books-list
+    """
+    help = 'Compara el throughput concurrente de la lectura WSGI y la lectura async (ASGI)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano', choices=list(TAMANOS), default='mediano')
+        parser.add_argument('--workers', action='append', type=int,
+                            help='Concurrencia (se puede repetir). Por defecto: 1, 4 y 16')
+        parser.add_argument('--peticiones', type=int, default=300,
+                            help='Peticiones por endpoint y cantidad de workers')
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help='Medir solo estos endpoints (se puede repetir)')
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or [1, 4, 16]
+        if min(workers) < 1 or options['peticiones'] < 1:
+            raise CommandError('--workers y --peticiones deben ser mayores que 0.')
+
+        with tempfile.TemporaryDirectory() as directorio, base_de_datos_temporal(
+            archivo=os.path.join(directorio, 'benchmark.sqlite3')
+        ), override_settings(
+            BIBLIOTECA_CACHE_API={'ACTIVO': False, 'CACHE': 'default', 'TIMEOUT': 0},
+            BIBLIOTECA_LIMITES={**settings.BIBLIOTECA_LIMITES, 'ACTIVO': False},
+            BIBLIOTECA_INSTRUMENTACION={
+                'ACTIVO': False, 'MUESTREO': 0.0, 'CABECERA': False, 'LENTA_MS': 0, 'REPETICIONES_N1': 0,
+            },
+        ):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Dataset {options['tamano']}"))
+            call_command('generar_datos', limpiar=True, semilla=42, stdout=io.StringIO(),
+                         **TAMANOS[options['tamano']])
+            libro = Libro.objects.order_by('-cantidad_resenas', 'pk').values_list('pk', flat=True).first()
+            connections.close_all()
+
+            self.stdout.write(
+                f"{'endpoint':16} {'workers':>7} | {'WSGI req/s':>10} {'p50':>7} {'p95':>7} | "
+                f"{'ASGI req/s':>10} {'p50':>7} {'p95':>7} | {'ASGI/WSGI':>9}"
+            )
+            for nombre, (url_wsgi, url_async) in endpoints(libro).items():
+                if options['endpoints'] and nombre not in options['endpoints']:
+                    continue
+                for cantidad in workers:
+                    wsgi = medir_wsgi(url_wsgi, cantidad, options['peticiones'])
+                    asgi = medir_asgi(url_async, cantidad, options['peticiones'])
+                    self.stdout.write(
+                        f"{nombre:16} {cantidad:>7} | {wsgi['rps']:>10.1f} {wsgi['p50_ms']:>7.1f} "
+                        f"{wsgi['p95_ms']:>7.1f} | {asgi['rps']:>10.1f} {asgi['p50_ms']:>7.1f} "
+                        f"{asgi['p95_ms']:>7.1f} | {asgi['rps'] / wsgi['rps']:>8.2f}x"
+                    )
+            connections.close_all()
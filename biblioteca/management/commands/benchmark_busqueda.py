@@ -0,0 +1,61 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+
+from biblioteca.busqueda import FTS5SearchFilter
+from biblioteca.viewsets import LibroViewSet, ResenaViewSet
+
+
+class Command(BaseCommand):
+    """
+    Compara la búsqueda con LIKE (SearchFilter) contra el índice FTS5.
+
+    Para cada término ejecuta la búsqueda de libros y de reseñas con ambos
+    filtros y muestra la mediana de tiempo y la cantidad de resultados.
+
+    Uso:
+        python manage.py benchmark_busqueda
+        python manage.py benchmark_busqueda --termino cortazar --repeticiones 50
+    """
+    help = 'Compara el tiempo de búsqueda LIKE contra FTS5 en libros y reseñas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--termino',
+            action='append',
+            dest='terminos',
+            help='Término a buscar (se puede repetir)'
+        )
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--limite', type=int, default=10, help='Filas leídas por búsqueda (tamaño de página)')
+
+    def handle(self, *args, **options):
+        terminos = options['terminos'] or ['soledad', 'cortazar', 'realismo magico', 'novela']
+        factory = RequestFactory()
+
+        for viewset in (LibroViewSet, ResenaViewSet):
+            self.stdout.write(self.style.MIGRATE_HEADING(viewset.__name__))
+            for termino in terminos:
+                request = Request(factory.get('/', {'search': termino}))
+                view = viewset(request=request, format_kwarg=None, action='list')
+                resultados = []
+                for filtro in (SearchFilter(), FTS5SearchFilter()):
+                    tiempos = []
+                    for _ in range(options['repeticiones']):
+                        queryset = filtro.filter_queryset(request, view.get_queryset(), view)
+                        inicio = time.perf_counter()
+                        total = queryset.count()
+                        list(queryset[:options['limite']])
+                        tiempos.append(time.perf_counter() - inicio)
+                    resultados.append((statistics.median(tiempos) * 1000, total))
+
+                (like_ms, like_total), (fts_ms, fts_total) = resultados
+                mejora = like_ms / fts_ms if fts_ms else 0
+                self.stdout.write(
+                    f'  {termino!r:22} LIKE {like_ms:8.2f} ms ({like_total} filas) | '
+                    f'FTS5 {fts_ms:8.2f} ms ({fts_total} filas) | x{mejora:.1f}'
+                )
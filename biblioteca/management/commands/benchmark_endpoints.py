@@ -0,0 +1,196 @@
+import io
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from biblioteca.benchmark import base_de_datos_temporal, medir
+from biblioteca.models import Autor, Libro, Resena
+
+
+PRESUPUESTOS = Path(__file__).resolve().parents[2] / 'benchmark_presupuestos.json'
+
+# Parámetros de generar_datos para cada tamaño de dataset
+TAMANOS = {
+    'pequeno': {'autores': 20, 'libros_por_autor': 5, 'resenas_por_libro': 10},
+    'mediano': {'autores': 200, 'libros_por_autor': 5, 'resenas_por_libro': 20},
+    'grande': {'autores': 1000, 'libros_por_autor': 10, 'resenas_por_libro': 30},
+}
+
+
+def endpoints(ids):
+    """
+    Retorna {nombre: url} con todas las rutas del router y las vistas HTML.
+    `ids` contiene un autor, un libro y una reseña existentes del dataset.
+    """
+    autor, libro, resena = ids['autor'], ids['libro'], ids['resena']
+    return {
+        # /api/authors/
+        'authors-list': '/api/authors/',
+        'authors-retrieve': f'/api/authors/{autor}/',
+        'authors-libros': f'/api/authors/{autor}/libros/',
+        'authors-search': '/api/authors/?search=garcia',
+        'authors-ordering': '/api/authors/?ordering=-nacionalidad',
+        'authors-filter': '/api/authors/?nacionalidad=chilena',
+        'authors-stats': f'/api/authors/{autor}/stats/',
+        'authors-rango': '/api/authors/?ordering=-rating_promedio&cantidad_libros_min=3',
+        # /api/books/
+        'books-list': '/api/books/',
+        'books-retrieve': f'/api/books/{libro}/',
+        'books-rating_promedio': f'/api/books/{libro}/rating_promedio/',
+        'books-por_autor': f'/api/books/por_autor/?autor_id={autor}',
+        'books-search': '/api/books/?search=casa',
+        'books-ordering': '/api/books/?ordering=-publication_year',
+        'books-filter': f'/api/books/?author={autor}',
+        'books-cursor': '/api/books/?ordering=-fecha_publicacion&cursor=',
+        'books-fields': '/api/books/?fields=id,titulo,author_name',
+        'books-expand': '/api/books/?omit=recent_reviews&expand=autor',
+        'books-top': '/api/books/top/',
+        'books-trending': '/api/books/trending/?decada=1990',
+        # /api/reviews/
+        'reviews-list': '/api/reviews/',
+        'reviews-retrieve': f'/api/reviews/{resena}/',
+        'reviews-search': '/api/reviews/?search=recomendable',
+        'reviews-ordering': '/api/reviews/?ordering=-rating',
+        'reviews-filter': f'/api/reviews/?libro={libro}&rating_min=4',
+        'reviews-cursor': '/api/reviews/?ordering=-fecha&cursor=',
+        'reviews-expand': '/api/reviews/?fields=id,calificacion,libro.titulo,libro.author_name',
+        # /api/stats/ (tablas de resumen)
+        'stats-list': '/api/stats/',
+        'stats-months': '/api/stats/months/?desde=2020-01',
+        # Vistas HTML (views.py)
+        'html-lista_libros': '/libros/',
+        'html-detalle_libro': f'/libros/{libro}/',
+        'html-lista_autores': '/autores/',
+    }
+
+
+class Command(BaseCommand):
+    """
+    Benchmark de todos los endpoints con presupuestos de consultas y latencia.
+
+    Crea una base de datos temporal, la siembra con generar_datos para cada
+    tamaño pedido y mide cada endpoint: consultas SQL, tiempo en la base de
+    datos, tiempo fuera de ella (serialización/render) y percentiles de la
+    latencia. El cache de respuestas se desactiva durante la medición.
+
+    Falla (código de salida distinto de 0) si algún endpoint supera:
+    - su presupuesto de consultas, que es el mismo para todos los tamaños
+      (si la cantidad de consultas crece con los datos hay un N+1), o
+    - su latencia p95 de referencia para ese tamaño, multiplicada por la
+      tolerancia y sumando el margen en ms definidos en el archivo.
+
+    Los presupuestos están en biblioteca/benchmark_presupuestos.json.
+
+    Uso:
+        python manage.py benchmark_endpoints
+        python manage.py benchmark_endpoints --tamano pequeno --tamano grande
+        python manage.py benchmark_endpoints --actualizar   # guarda la latencia medida como referencia
+    """
+    help = 'Mide consultas y latencia de los endpoints y los compara con los presupuestos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano', action='append', dest='tamanos', choices=list(TAMANOS),
+                            help='Tamaño de dataset (se puede repetir). Por defecto: pequeno y mediano')
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help='Medir solo estos endpoints (se puede repetir)')
+        parser.add_argument('--presupuestos', default=str(PRESUPUESTOS), help='Archivo de presupuestos')
+        parser.add_argument('--actualizar', action='store_true',
+                            help='Guarda los resultados como nuevos presupuestos en lugar de compararlos')
+
+    def handle(self, *args, **options):
+        tamanos = options['tamanos'] or ['pequeno', 'mediano']
+        ruta = Path(options['presupuestos'])
+        presupuestos = json.loads(ruta.read_text(encoding='utf-8')) if ruta.exists() else {
+            'tolerancia': 1.5, 'margen_ms': 5, 'endpoints': {}
+        }
+
+        resultados = {}
+        with base_de_datos_temporal(), override_settings(
+            BIBLIOTECA_CACHE_API={'ACTIVO': False, 'CACHE': 'default', 'TIMEOUT': 0},
+            BIBLIOTECA_LIMITES={**settings.BIBLIOTECA_LIMITES, 'ACTIVO': False},
+            BIBLIOTECA_CACHE_HTML={**settings.BIBLIOTECA_CACHE_HTML, 'ACTIVO': False},
+        ):
+            for tamano in tamanos:
+                resultados[tamano] = self.medir_tamano(tamano, options)
+
+        if options['actualizar']:
+            self.actualizar(presupuestos, resultados)
+            ruta.write_text(json.dumps(presupuestos, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f'✓ Presupuestos guardados en {ruta}'))
+            return
+
+        fallas = self.comparar(presupuestos, resultados)
+        if fallas:
+            for falla in fallas:
+                self.stderr.write(f'  ✗ {falla}')
+            raise CommandError(f'{len(fallas)} endpoints superaron su presupuesto')
+        self.stdout.write(self.style.SUCCESS('✓ Todos los endpoints dentro del presupuesto'))
+
+    def medir_tamano(self, tamano, options):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Dataset {tamano}: {TAMANOS[tamano]}'))
+        call_command('generar_datos', limpiar=True, semilla=42, stdout=io.StringIO(), **TAMANOS[tamano])
+        # El libro con más reseñas es el peor caso para retrieve y detalle
+        libro = Libro.objects.order_by('-cantidad_resenas', 'pk').first()
+        ids = {
+            'autor': libro.autor_id,
+            'libro': libro.pk,
+            'resena': Resena.objects.filter(libro=libro).values_list('pk', flat=True).first(),
+        }
+        self.stdout.write(
+            f'{Autor.objects.count()} autores, {Libro.objects.count()} libros, {Resena.objects.count()} reseñas'
+        )
+        self.stdout.write(f"{'endpoint':24} {'status':>6} {'sql':>4} {'db ms':>8} {'resto ms':>9} "
+                          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+
+        client = Client(HTTP_ACCEPT='application/json')
+        resultados = {}
+        for nombre, url in endpoints(ids).items():
+            if options['endpoints'] and nombre not in options['endpoints']:
+                continue
+            extra = {'HTTP_ACCEPT': 'text/html'} if nombre.startswith('html-') else {}
+            r = medir(client, url, repeticiones=options['repeticiones'], **extra)
+            resultados[nombre] = r
+            self.stdout.write(
+                f"{nombre:24} {r['status']:>6} {r['consultas']:>4} {r['db_ms']:>8.2f} {r['fuera_db_ms']:>9.2f} "
+                f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}"
+            )
+        return resultados
+
+    def comparar(self, presupuestos, resultados):
+        tolerancia = presupuestos['tolerancia']
+        margen = presupuestos['margen_ms']
+        fallas = []
+        for tamano, medidos in resultados.items():
+            for nombre, r in medidos.items():
+                presupuesto = presupuestos['endpoints'].get(nombre)
+                if presupuesto is None:
+                    fallas.append(f'{nombre}: no tiene presupuesto (ejecutar con --actualizar)')
+                    continue
+                if r['status'] != 200:
+                    fallas.append(f'{nombre} [{tamano}]: status {r["status"]}')
+                if r['consultas'] > presupuesto['consultas']:
+                    fallas.append(
+                        f'{nombre} [{tamano}]: {r["consultas"]} consultas (presupuesto {presupuesto["consultas"]})'
+                    )
+                referencia = presupuesto.get('p95_ms', {}).get(tamano)
+                if referencia is not None and r['p95_ms'] > referencia * tolerancia + margen:
+                    fallas.append(
+                        f'{nombre} [{tamano}]: p95 {r["p95_ms"]:.2f} ms '
+                        f'(referencia {referencia:.2f} ms x{tolerancia} + {margen} ms)'
+                    )
+        return fallas
+
+    def actualizar(self, presupuestos, resultados):
+        consultas = {}
+        for tamano, medidos in resultados.items():
+            for nombre, r in medidos.items():
+                presupuesto = presupuestos['endpoints'].setdefault(nombre, {'p95_ms': {}})
+                presupuesto['p95_ms'][tamano] = round(r['p95_ms'], 2)
+                consultas[nombre] = max(consultas.get(nombre, 0), r['consultas'])
+        for nombre, cantidad in consultas.items():
+            presupuestos['endpoints'][nombre]['consultas'] = cantidad
@@ -0,0 +1,86 @@
+import io
+import json
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from biblioteca.benchmark import base_de_datos_temporal, medir
+from biblioteca.lectura_rapida import orjson
+from biblioteca.management.commands.benchmark_endpoints import TAMANOS
+
+
+# Páginas grandes de list, donde pesa la serialización por fila
+ENDPOINTS = {
+    'books-500': '/api/books/?page_size=500',
+    'books-500-sin-resenas': '/api/books/?page_size=500&omit=recent_reviews',
+    'books-500-fields': '/api/books/?page_size=500&fields=id,titulo,author_name,year',
+    'authors-500': '/api/authors/?page_size=500',
+    'reviews-500': '/api/reviews/?page_size=500',
+    'reviews-500-cursor': '/api/reviews/?page_size=500&ordering=-fecha&cursor=',
+}
+
+
+class Command(BaseCommand):
+    """
+    Mide las filas por segundo de list con y sin la lectura rápida.
+
+    Pide páginas de 500 filas de cada ViewSet con BIBLIOTECA_LECTURA_RAPIDA
+    desactivada (serializadores de DRF + JSONRenderer) y activada (values()
+    + orjson si está instalado), sobre una base de datos temporal sembrada
+    con generar_datos, sin el cache de respuestas ni la instrumentación.
+    Las filas por segundo se calculan con la latencia mediana (p50); también
+    se reporta el tiempo fuera de la base de datos, que es lo que la lectura
+    rápida reduce.
+
+    Uso:
+        python manage.py benchmark_lectura_rapida
+        python manage.py benchmark_lectura_rapida --tamano grande --repeticiones 50
+    """
+    help = 'Compara las filas por segundo de list con y sin la lectura rápida'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano', choices=list(TAMANOS), default='mediano')
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help='Medir solo estos endpoints (se puede repetir)')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor que 0.')
+
+        with base_de_datos_temporal(), override_settings(
+            BIBLIOTECA_CACHE_API={'ACTIVO': False, 'CACHE': 'default', 'TIMEOUT': 0},
+            BIBLIOTECA_LIMITES={**settings.BIBLIOTECA_LIMITES, 'ACTIVO': False},
+            BIBLIOTECA_INSTRUMENTACION={
+                'ACTIVO': False, 'MUESTREO': 0.0, 'CABECERA': False, 'LENTA_MS': 0, 'REPETICIONES_N1': 0,
+            },
+        ):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"Dataset {options['tamano']}: {TAMANOS[options['tamano']]}"
+                f" (JSON: {'orjson' if orjson is not None else 'json, orjson no está instalado'})"
+            ))
+            call_command('generar_datos', limpiar=True, semilla=42, stdout=io.StringIO(),
+                         **TAMANOS[options['tamano']])
+
+            client = Client(HTTP_ACCEPT='application/json')
+            self.stdout.write(
+                f"{'endpoint':22} {'filas':>5} | {'DRF p50':>8} {'resto':>7} {'filas/s':>8} | "
+                f"{'rápida p50':>10} {'resto':>7} {'filas/s':>8} | {'ganancia':>8}"
+            )
+            for nombre, url in ENDPOINTS.items():
+                if options['endpoints'] and nombre not in options['endpoints']:
+                    continue
+                filas = len(json.loads(client.get(url).content)['results'])
+                medidas = {}
+                for activo in (False, True):
+                    with override_settings(BIBLIOTECA_LECTURA_RAPIDA={'ACTIVO': activo}):
+                        medidas[activo] = medir(client, url, repeticiones=options['repeticiones'])
+                drf, rapida = medidas[False], medidas[True]
+                self.stdout.write(
+                    f"{nombre:22} {filas:>5} | {drf['p50_ms']:>8.2f} {drf['fuera_db_ms']:>7.2f} "
+                    f"{filas / drf['p50_ms'] * 1000:>8.0f} | {rapida['p50_ms']:>10.2f} "
+                    f"{rapida['fuera_db_ms']:>7.2f} {filas / rapida['p50_ms'] * 1000:>8.0f} | "
+                    f"{drf['p50_ms'] / rapida['p50_ms']:>7.2f}x"
+                )
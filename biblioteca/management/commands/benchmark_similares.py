@@ -0,0 +1,119 @@
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from biblioteca import similares
+
+
+SILABAS = ['ma', 'ri', 'so', 'le', 'ca', 'ti', 'no', 'ra', 'pe', 'lu', 'da', 'go', 'fe', 'vi', 'ba', 'mo', 'tu', 'la', 'se', 'gri']
+
+
+class Command(BaseCommand):
+    """
+    Mide el índice de libros similares con un catálogo sintético, sin usar
+    la base de datos (por defecto 1.000.000 de libros).
+
+    Los textos usan un vocabulario de --vocabulario palabras con frecuencias
+    de Zipf, como un texto real: pocas palabras muy frecuentes y muchas
+    raras. Se mide:
+    - la construcción del índice (tiempo y tamaño en disco),
+    - la primera consulta de un proceso (abrir los segmentos con mmap),
+    - las consultas (vector del libro + producto punto + top-k, sin leer
+      las filas de la respuesta de la base),
+    - las actualizaciones incrementales y las consultas con segmentos
+      incrementales.
+
+    Uso:
+        python manage.py benchmark_similares
+        python manage.py benchmark_similares --libros 100000 --consultas 500
+    """
+    help = 'Mide la construcción y las consultas del índice de libros similares'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--libros', type=int, default=1_000_000)
+        parser.add_argument('--palabras', type=int, default=45, help='Palabras del resumen de cada libro')
+        parser.add_argument('--vocabulario', type=int, default=50_000)
+        parser.add_argument('--consultas', type=int, default=200)
+        parser.add_argument('--actualizaciones', type=int, default=20)
+        parser.add_argument('--limite', type=int, default=10)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--directorio', help='Directorio del índice (por defecto uno temporal)')
+
+    def handle(self, *args, **options):
+        np = similares.np
+        if np is None:
+            raise CommandError('El índice de libros similares requiere numpy (pip install numpy).')
+        self.rng = np.random.default_rng(options['semilla'])
+        self.vocabulario = np.array([self.palabra(numero) for numero in range(options['vocabulario'])])
+        consultas = set(self.rng.choice(options['libros'], options['consultas'], replace=False).tolist())
+        textos = {}
+
+        def documentos():
+            for pk, titulo, resumen in self.catalogo(options['libros'], options['palabras']):
+                if pk in consultas:
+                    textos[pk] = (titulo, resumen)
+                yield pk, titulo, resumen
+
+        with tempfile.TemporaryDirectory() as temporal:
+            indice = similares.IndiceSimilares(Path(options['directorio'] or temporal))
+
+            inicio = time.perf_counter()
+            indice.reconstruir(documentos())
+            segundos = time.perf_counter() - inicio
+            tamano = sum(ruta.stat().st_size for ruta in indice.directorio.rglob('*.npy'))
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{options["libros"]} libros'))
+            self.stdout.write(f'  construcción: {segundos:.1f} s, {tamano / 2 ** 20:.0f} MB en disco')
+
+            inicio = time.perf_counter()
+            estado = indice.estado()
+            self.stdout.write(f'  apertura (mmap): {(time.perf_counter() - inicio) * 1000:.1f} ms')
+            self.medir('consultas', estado, textos, options['limite'])
+
+            if not options['actualizaciones']:
+                return
+            inicio_actualizaciones = options['libros'] + 1
+            tiempos = []
+            for pk, titulo, resumen in self.catalogo(options['actualizaciones'], options['palabras']):
+                inicio = time.perf_counter()
+                indice.actualizar([(inicio_actualizaciones + pk, titulo, resumen)], borrados=[pk])
+                tiempos.append(time.perf_counter() - inicio)
+            self.stdout.write(
+                f'  actualización de un libro: p50 {statistics.median(tiempos) * 1000:.1f} ms, '
+                f'max {max(tiempos) * 1000:.1f} ms ({len(indice.estado().segmentos) - 1} segmentos incrementales)'
+            )
+            self.medir('consultas con segmentos incrementales', indice.estado(), textos, options['limite'])
+
+    def palabra(self, numero):
+        """Palabra del vocabulario: el número escrito en base len(SILABAS) con sílabas"""
+        silabas = []
+        while True:
+            numero, resto = divmod(numero, len(SILABAS))
+            silabas.append(SILABAS[resto])
+            if not numero:
+                break
+        return ''.join(silabas) + 'n'
+
+    def catalogo(self, cantidad, palabras):
+        """(id, titulo, resumen) de `cantidad` libros sintéticos, en bloques de 10.000"""
+        for desde in range(0, cantidad, 10_000):
+            hasta = min(desde + 10_000, cantidad)
+            indices = (self.rng.zipf(1.15, size=(hasta - desde, palabras + 4)) - 1) % len(self.vocabulario)
+            for pk, fila in enumerate(self.vocabulario[indices].tolist(), start=desde + 1):
+                yield pk, ' '.join(fila[:4]), ' '.join(fila[4:])
+
+    def medir(self, titulo, estado, textos, limite):
+        tiempos = []
+        for pk, (titulo_libro, resumen) in textos.items():
+            inicio = time.perf_counter()
+            columnas, pesos = estado.vector(titulo_libro, resumen, similares.config()['TERMINOS_CONSULTA'])
+            estado.buscar(columnas, pesos, 2 * limite, excluir=pk)
+            tiempos.append(time.perf_counter() - inicio)
+        tiempos.sort()
+        percentil = lambda p: tiempos[min(int(len(tiempos) * p), len(tiempos) - 1)] * 1000  # noqa: E731
+        self.stdout.write(
+            f'  {titulo}: p50 {percentil(0.5):.2f} ms, p95 {percentil(0.95):.2f} ms, '
+            f'p99 {percentil(0.99):.2f} ms, max {tiempos[-1] * 1000:.2f} ms ({len(tiempos)} consultas)'
+        )
@@ -0,0 +1,41 @@
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from biblioteca.replicas import datos_de_replica
+
+
+class Command(BaseCommand):
+    """
+    Muestra el retraso de cada réplica de lectura y si el router la usaría.
+
+    El retraso es el tiempo desde el último latido que recibió la réplica
+    (ver sincronizar_replica). Una réplica sin latido, que no se puede leer
+    o con un retraso mayor que RETRASO_MAXIMO queda excluida y sus lecturas
+    van al primario.
+
+    Uso:
+        python manage.py estado_replicas
+    """
+    help = 'Muestra el retraso de las réplicas de lectura'
+
+    def handle(self, *args, **options):
+        config = settings.BIBLIOTECA_REPLICAS
+        if not config['ACTIVO']:
+            self.stdout.write(self.style.WARNING('Réplicas desactivadas (BIBLIOTECA_REPLICAS["ACTIVO"])'))
+        for alias in config['ALIAS']:
+            datos = datos_de_replica(alias, forzar=True)
+            if datos is None:
+                self.stdout.write(self.style.ERROR(f'{alias}: excluida (sin latido o no disponible)'))
+                continue
+            atraso = max(time.time() - datos, 0.0)
+            datos = datetime.fromtimestamp(datos, timezone.utc)
+            linea = f'{alias}: datos hasta {datos:%Y-%m-%d %H:%M:%S} UTC, retraso {atraso:.1f} s'
+            if atraso <= config['RETRASO_MAXIMO']:
+                self.stdout.write(self.style.SUCCESS(f'{linea} (en uso)'))
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f"{linea} (excluida: máximo {config['RETRASO_MAXIMO']} s)"
+                ))
@@ -0,0 +1,186 @@
+import io
+import logging
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.test import Client, override_settings
+
+from biblioteca.benchmark import base_de_datos_temporal, percentil
+from biblioteca.management.commands.benchmark_endpoints import TAMANOS
+from biblioteca.models import Libro, Resena
+
+
+# Configuración de DATABASES['default'] de cada perfil: 'django' es la de
+# fábrica (journal DELETE, una conexión por petición, transacciones
+# DEFERRED); 'produccion' es la de settings.py
+PERFIL_DJANGO = {'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}
+
+
+def lecturas(libros):
+    return [
+        '/api/books/', '/api/authors/', '/api/reviews/',
+        *(f'/api/books/{libro}/' for libro in libros[:5]),
+        *(f'/api/reviews/?libro={libro}' for libro in libros[:5]),
+    ]
+
+
+def trabajar(segundos, escrituras, semilla, libros):
+    """
+    Un worker (proceso): hasta que pasan `segundos` pide lecturas de la API
+    y, con probabilidad `escrituras`, crea una reseña con POST /api/reviews/.
+    Cuenta los errores "database is locked" en lugar de propagarlos.
+    """
+    # Los bloqueos se cuentan: no se registra el traceback de cada uno
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    azar = random.Random(semilla)
+    urls = lecturas(libros)
+    client = Client(HTTP_ACCEPT='application/json')
+    resultado = {'lecturas': [], 'escrituras': [], 'bloqueos': 0, 'errores': 0}
+    fin = time.perf_counter() + segundos
+    try:
+        while time.perf_counter() < fin:
+            escribe = azar.random() < escrituras
+            inicio = time.perf_counter()
+            try:
+                if escribe:
+                    response = client.post('/api/reviews/', {
+                        'libro': azar.choice(libros), 'texto': 'Reseña de la prueba de estrés',
+                        'calificacion': azar.randint(1, 5),
+                    }, content_type='application/json')
+                else:
+                    response = client.get(azar.choice(urls))
+            except OperationalError as error:
+                if 'locked' not in str(error):
+                    raise
+                resultado['bloqueos'] += 1
+                continue
+            if response.status_code != (201 if escribe else 200):
+                resultado['errores'] += 1
+                continue
+            resultado['escrituras' if escribe else 'lecturas'].append(time.perf_counter() - inicio)
+    finally:
+        connections.close_all()
+    return resultado
+
+
+def _p95(latencias):
+    return f'{percentil(latencias, 95) * 1000:>8.1f}' if latencias else f"{'-':>8}"
+
+
+class Command(BaseCommand):
+    """
+    Prueba de estrés de lecturas y escrituras concurrentes sobre SQLite.
+
+    Simula N workers de gunicorn con N procesos que piden lecturas de la API
+    y crean reseñas (POST /api/reviews/) durante unos segundos, sobre una
+    base de datos temporal en disco sembrada con generar_datos, con el
+    perfil de SQLite de fábrica de Django y con el de settings.py (WAL,
+    pragmas, conexiones persistentes y BEGIN IMMEDIATE). Reporta peticiones
+    por segundo, latencias p95, errores "database is locked" y verifica que
+    cada escritura respondida con 201 quedó guardada.
+    Termina con error si el perfil de settings.py tiene errores de bloqueo.
+
+    Uso:
+        python manage.py estres_sqlite
+        python manage.py estres_sqlite --workers 16 --segundos 10 --escrituras 0.5
+    """
+    help = 'Compara lecturas y escrituras concurrentes con el SQLite de fábrica y el perfil de producción'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano', choices=list(TAMANOS), default='pequeno')
+        parser.add_argument('--workers', type=int, default=8, help='Procesos concurrentes')
+        parser.add_argument('--segundos', type=float, default=5.0, help='Duración de cada perfil')
+        parser.add_argument('--escrituras', type=float, default=0.3,
+                            help='Fracción de peticiones que crean una reseña (0.0 a 1.0)')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['segundos'] <= 0 or not 0 <= options['escrituras'] <= 1:
+            raise CommandError('--workers y --segundos deben ser mayores que 0 y --escrituras estar entre 0 y 1.')
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise CommandError('La prueba de estrés necesita crear procesos con fork.')
+
+        with tempfile.TemporaryDirectory() as directorio, base_de_datos_temporal(
+            archivo=os.path.join(directorio, 'estres.sqlite3')
+        ), override_settings(
+            BIBLIOTECA_CACHE_API={'ACTIVO': False, 'CACHE': 'default', 'TIMEOUT': 0},
+            BIBLIOTECA_LIMITES={**settings.BIBLIOTECA_LIMITES, 'ACTIVO': False},
+            BIBLIOTECA_INSTRUMENTACION={
+                'ACTIVO': False, 'MUESTREO': 0.0, 'CABECERA': False, 'LENTA_MS': 0, 'REPETICIONES_N1': 0,
+            },
+            BIBLIOTECA_REPLICAS={'ACTIVO': False, 'ALIAS': [], 'APPS': [], 'RETRASO_MAXIMO': 0,
+                                 'VERIFICACION': 0, 'COOKIE': 'biblioteca_escritura'},
+        ):
+            call_command('generar_datos', limpiar=True, semilla=42, stdout=io.StringIO(),
+                         **TAMANOS[options['tamano']])
+            libros = list(Libro.objects.order_by('pk').values_list('pk', flat=True))
+            conexion = connections['default']
+            produccion = {clave: conexion.settings_dict[clave] for clave in PERFIL_DJANGO}
+            archivo = conexion.settings_dict['NAME']
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{options['workers']} workers, {options['segundos']:g} s por perfil, "
+                f"{options['escrituras']:.0%} escrituras, dataset {options['tamano']}"
+            ))
+            self.stdout.write(
+                f"{'perfil':10} {'journal':>7} | {'req/s':>7} {'lect/s':>7} {'escr/s':>7} | "
+                f"{'p95 lect':>8} {'p95 escr':>8} | {'bloqueos':>8} {'errores':>7}"
+            )
+            resultados = {}
+            for nombre, perfil in (('django', PERFIL_DJANGO), ('produccion', produccion)):
+                conexion.settings_dict.update(perfil)
+                connections.close_all()
+                if nombre == 'django':
+                    # El modo WAL queda guardado en el archivo: se vuelve al de fábrica
+                    with sqlite3.connect(archivo) as directa:
+                        directa.execute('PRAGMA journal_mode=DELETE')
+                    directa.close()
+                resultados[nombre] = self.ejecutar(nombre, archivo, libros, options)
+            conexion.settings_dict.update(produccion)
+            connections.close_all()
+
+        django, perfil = resultados['django'], resultados['produccion']
+        if django['rps']:
+            self.stdout.write(f"Throughput del perfil de producción: {perfil['rps'] / django['rps']:.2f}x")
+        if perfil['bloqueos']:
+            raise CommandError(f"{perfil['bloqueos']} errores \"database is locked\" con el perfil de producción.")
+
+    def ejecutar(self, nombre, archivo, libros, options):
+        antes = Resena.objects.count()
+        with sqlite3.connect(archivo) as directa:
+            journal = directa.execute('PRAGMA journal_mode').fetchone()[0]
+        directa.close()
+        connections.close_all()
+
+        contexto = multiprocessing.get_context('fork')
+        argumentos = [
+            (options['segundos'], options['escrituras'], semilla, libros)
+            for semilla in range(options['workers'])
+        ]
+        with contexto.Pool(options['workers']) as pool:
+            partes = pool.starmap(trabajar, argumentos)
+
+        leidas = [latencia for parte in partes for latencia in parte['lecturas']]
+        escritas = [latencia for parte in partes for latencia in parte['escrituras']]
+        bloqueos = sum(parte['bloqueos'] for parte in partes)
+        errores = sum(parte['errores'] for parte in partes)
+        guardadas = Resena.objects.count() - antes
+        connections.close_all()
+        if guardadas != len(escritas):
+            raise CommandError(f'{nombre}: {len(escritas)} reseñas creadas con 201 y {guardadas} guardadas.')
+
+        segundos = options['segundos']
+        resultado = {'rps': (len(leidas) + len(escritas)) / segundos, 'bloqueos': bloqueos}
+        self.stdout.write(
+            f"{nombre:10} {journal:>7} | {resultado['rps']:>7.1f} {len(leidas) / segundos:>7.1f} "
+            f"{len(escritas) / segundos:>7.1f} | {_p95(leidas)} {_p95(escritas)} | "
+            f"{bloqueos:>8} {errores:>7}"
+        )
+        return resultado
@@ -0,0 +1,226 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from biblioteca.models import Autor, Libro, Resena
+
+
+NOMBRES = [
+    'Gabriel', 'Isabel', 'Mario', 'Julio', 'Laura', 'Jorge', 'Elena', 'Carlos', 'Rosa',
+    'Miguel', 'Ana', 'Pablo', 'Lucía', 'Octavio', 'Clara', 'Rubén', 'Teresa', 'Juan',
+]
+APELLIDOS = [
+    'García', 'Allende', 'Vargas', 'Cortázar', 'Esquivel', 'Borges', 'Poniatowska',
+    'Fuentes', 'Castellanos', 'Benedetti', 'Mistral', 'Neruda', 'Rulfo', 'Paz', 'Darío',
+    'Onetti', 'Storni', 'Bolaño', 'Piñera', 'Sábato',
+]
+NACIONALIDADES = [
+    'Argentina', 'Chilena', 'Colombiana', 'Mexicana', 'Peruana', 'Uruguaya', 'Española',
+    'Cubana', 'Venezolana', 'Ecuatoriana', 'Boliviana', 'Paraguaya',
+]
+# (sustantivo, género) para concordar artículos y adjetivos
+SUSTANTIVOS = [
+    ('casa', 'f'), ('ciudad', 'f'), ('memoria', 'f'), ('sombra', 'f'), ('río', 'm'),
+    ('noche', 'f'), ('familia', 'f'), ('guerra', 'f'), ('viento', 'm'), ('silencio', 'm'),
+    ('jardín', 'm'), ('espejo', 'm'), ('laberinto', 'm'), ('isla', 'f'), ('carta', 'f'),
+    ('tiempo', 'm'), ('muerte', 'f'), ('amor', 'm'), ('soledad', 'f'), ('montaña', 'f'),
+    ('frontera', 'f'), ('pueblo', 'm'), ('lluvia', 'f'), ('fuego', 'm'),
+]
+# (masculino, femenino)
+ADJETIVOS = [
+    ('perdido', 'perdida'), ('eterno', 'eterna'), ('secreto', 'secreta'), ('lejano', 'lejana'),
+    ('oscuro', 'oscura'), ('dorado', 'dorada'), ('vacío', 'vacía'), ('antiguo', 'antigua'),
+    ('invisible', 'invisible'), ('último', 'última'), ('breve', 'breve'), ('infinito', 'infinita'),
+    ('callado', 'callada'), ('salvaje', 'salvaje'),
+]
+VERBOS = [
+    'narra', 'explora', 'recorre', 'describe', 'retrata', 'reconstruye', 'cuestiona',
+    'imagina', 'revela', 'acompaña',
+]
+OPINIONES = [
+    'Una lectura fascinante', 'Me atrapó desde la primera página', 'Algo lenta al principio',
+    'Los personajes están muy bien construidos', 'La prosa es exquisita', 'No terminó de convencerme',
+    'Un final inolvidable', 'Muy recomendable', 'Una obra compleja pero valiosa',
+    'La estructura es original', 'Demasiado larga para mi gusto', 'Una joya de la literatura',
+]
+
+
+class Command(BaseCommand):
+    """
+    Genera un catálogo sintético para pruebas de carga.
+
+    A diferencia de poblar_datos.py (4 autores, 6 libros, 9 reseñas creados
+    uno por uno), este comando genera la cantidad de datos que se pida:
+
+    - La cantidad de libros por autor y de reseñas por libro sigue una
+      distribución sesgada (Pareto): pocos autores y libros concentran la
+      mayoría, con la media indicada en los parámetros.
+    - Usa un generador aleatorio con semilla, así dos ejecuciones con los
+      mismos parámetros generan los mismos datos.
+    - Escribe con bulk_create en bloques, cada bloque en su propia transacción.
+    - Los textos cumplen los validadores de los modelos (validar_nombre_no_vacio,
+      validar_resumen_minimo, validar_calificacion y el rango de rating).
+
+    Uso:
+        python manage.py generar_datos --autores 1000 --libros-por-autor 10 --resenas-por-libro 50
+        python manage.py generar_datos --autores 20000 --libros-por-autor 25 --resenas-por-libro 20 --semilla 7
+    """
+    help = 'Genera autores, libros y reseñas sintéticos para pruebas de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--autores', type=int, default=100, help='Cantidad de autores')
+        parser.add_argument('--libros-por-autor', type=float, default=5, help='Media de libros por autor')
+        parser.add_argument('--resenas-por-libro', type=float, default=10, help='Media de reseñas por libro')
+        parser.add_argument('--sesgo', type=float, default=1.5,
+                            help='Parámetro alfa de la distribución de Pareto (menor = más sesgo)')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador aleatorio')
+        parser.add_argument('--bloque', type=int, default=5000, help='Filas por bulk_create/transacción')
+        parser.add_argument('--limpiar', action='store_true', help='Elimina los datos existentes antes de generar')
+
+    def handle(self, *args, **options):
+        if options['autores'] < 1 or options['bloque'] < 1:
+            raise CommandError('--autores y --bloque deben ser mayores que 0.')
+        if options['sesgo'] <= 0:
+            raise CommandError('--sesgo debe ser mayor que 0.')
+
+        self.rng = random.Random(options['semilla'])
+        self.bloque = options['bloque']
+        inicio = time.perf_counter()
+
+        if options['limpiar']:
+            self.stdout.write('Eliminando datos existentes...')
+            with transaction.atomic():
+                Resena.objects.all().delete()
+                Libro.objects.all().delete()
+                Autor.objects.all().delete()
+
+        autor_ids = self.crear_autores(options['autores'])
+        libros_por_autor = self.repartir(
+            len(autor_ids), options['libros_por_autor'], options['sesgo'], minimo=1
+        )
+        libro_ids = self.crear_libros(autor_ids, libros_por_autor)
+        resenas_por_libro = self.repartir(len(libro_ids), options['resenas_por_libro'], options['sesgo'])
+        total_resenas = self.crear_resenas(libro_ids, resenas_por_libro)
+
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Generados {len(autor_ids)} autores, {len(libro_ids)} libros y '
+            f'{total_resenas} reseñas en {segundos:.1f} s'
+        ))
+
+    def repartir(self, cantidad, media, alfa, minimo=0):
+        """
+        Reparte cantidad * media elementos entre `cantidad` grupos con pesos de
+        Pareto. Retorna la lista de tamaños (suma exacta, cada uno >= minimo).
+        """
+        total = round(cantidad * media)
+        libres = max(total - minimo * cantidad, 0)
+        pesos = [self.rng.paretovariate(alfa) for _ in range(cantidad)]
+        suma = sum(pesos)
+        tamanos = [int(libres * peso / suma) for peso in pesos]
+        # Los elementos que se pierden al redondear se asignan a grupos al azar
+        for indice in self.rng.choices(range(cantidad), k=libres - sum(tamanos)):
+            tamanos[indice] += 1
+        return [tamano + minimo for tamano in tamanos]
+
+    def guardar(self, modelo, objetos):
+        """Inserta los objetos en una transacción y retorna sus ids"""
+        with transaction.atomic():
+            creados = modelo.objects.bulk_create(objetos)
+        return [objeto.pk for objeto in creados]
+
+    def crear_autores(self, cantidad):
+        self.stdout.write(f'Creando {cantidad} autores...')
+        rng = self.rng
+        ids = []
+        pendientes = []
+        for _ in range(cantidad):
+            pendientes.append(Autor(
+                nombre=f'{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}',
+                nacionalidad=rng.choice(NACIONALIDADES),
+            ))
+            if len(pendientes) >= self.bloque:
+                ids += self.guardar(Autor, pendientes)
+                pendientes = []
+        if pendientes:
+            ids += self.guardar(Autor, pendientes)
+        return ids
+
+    def frase(self, articulos=('el', 'la')):
+        """Retorna un sustantivo con artículo y adjetivo concordados, por ejemplo 'la casa dorada'"""
+        sustantivo, genero = self.rng.choice(SUSTANTIVOS)
+        masculino, femenino = self.rng.choice(ADJETIVOS)
+        if genero == 'm':
+            return f'{articulos[0]} {sustantivo} {masculino}'
+        return f'{articulos[1]} {sustantivo} {femenino}'
+
+    def titulo(self):
+        return self.frase().capitalize()
+
+    def resumen(self, titulo):
+        rng = self.rng
+        # Siempre supera los 50 caracteres que exige validar_resumen_minimo
+        return (
+            f'{titulo} {rng.choice(VERBOS)} la historia de {self.frase(("un", "una"))} '
+            f'y de {self.frase(("un", "una"))}, a lo largo de {rng.randint(2, 9)} '
+            f'generaciones marcadas por {self.frase()}.'
+        )
+
+    def crear_libros(self, autor_ids, libros_por_autor):
+        total = sum(libros_por_autor)
+        self.stdout.write(f'Creando {total} libros...')
+        rng = self.rng
+        ids = []
+        pendientes = []
+        for autor_id, cantidad in zip(autor_ids, libros_por_autor):
+            for _ in range(cantidad):
+                titulo = self.titulo()
+                pendientes.append(Libro(
+                    titulo=titulo,
+                    autor_id=autor_id,
+                    fecha_publicacion=datetime.date(rng.randint(1900, 2024), rng.randint(1, 12), rng.randint(1, 28)),
+                    resumen=self.resumen(titulo),
+                ))
+                if len(pendientes) >= self.bloque:
+                    ids += self.guardar(Libro, pendientes)
+                    pendientes = []
+        if pendientes:
+            ids += self.guardar(Libro, pendientes)
+        return ids
+
+    def crear_resenas(self, libro_ids, resenas_por_libro):
+        total = sum(resenas_por_libro)
+        self.stdout.write(f'Creando {total} reseñas...')
+        rng = self.rng
+        ahora = timezone.now()
+        # Las calificaciones altas son más frecuentes, como en las reseñas reales
+        calificaciones = rng.choices([1, 2, 3, 4, 5], weights=[5, 8, 17, 35, 35], k=1024)
+        creadas = 0
+        pendientes = []
+        for libro_id, cantidad in zip(libro_ids, resenas_por_libro):
+            for _ in range(cantidad):
+                calificacion = calificaciones[rng.getrandbits(10)]
+                rating = None
+                if rng.random() < 0.9:
+                    rating = round(min(5.0, max(0.0, calificacion + rng.uniform(-0.8, 0.3))), 1)
+                pendientes.append(Resena(
+                    libro_id=libro_id,
+                    texto=f'{rng.choice(OPINIONES)}. {rng.choice(OPINIONES)}.',
+                    calificacion=calificacion,
+                    rating=rating,
+                    fecha=ahora - datetime.timedelta(seconds=rng.randint(0, 3 * 365 * 24 * 3600)),
+                ))
+                if len(pendientes) >= self.bloque:
+                    # Resena.objects.bulk_create también actualiza las estadísticas
+                    # de los libros del bloque en la misma transacción
+                    creadas += len(self.guardar(Resena, pendientes))
+                    pendientes = []
+                    if creadas % (self.bloque * 20) == 0:
+                        self.stdout.write(f'  {creadas}/{total} reseñas')
+        if pendientes:
+            creadas += len(self.guardar(Resena, pendientes))
+        return creadas
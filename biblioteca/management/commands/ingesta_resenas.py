@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from biblioteca import ingesta
+
+
+class Command(BaseCommand):
+    """
+    Muestra el estado de la ingesta diferida de reseñas: pendientes en el
+    spool y latencia de los últimos lotes (lo mismo que /api/reviews/ingesta/).
+
+    Con --vaciar aplica antes todas las entradas del spool en este proceso.
+    Sirve para reprocesar el spool después de una caída sin esperar a que
+    el servidor atienda una petición, o para vaciarlo antes de desactivar
+    la ingesta. Las entradas que ya se habían aplicado se saltan.
+
+    Uso:
+        python manage.py ingesta_resenas
+        python manage.py ingesta_resenas --vaciar
+    """
+    help = 'Muestra las métricas de la ingesta diferida de reseñas y opcionalmente vacía el spool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vaciar', action='store_true', help='Aplicar las reseñas pendientes del spool')
+        parser.add_argument('--database', default=None, help='Alias de la base de datos (por defecto la de escritura)')
+
+    def handle(self, *args, **options):
+        if options['vaciar']:
+            creadas = ingesta.vaciar(using=options['database'])
+            self.stdout.write(self.style.SUCCESS(f'✓ {creadas} reseñas creadas desde el spool'))
+        self.stdout.write(json.dumps(ingesta.estado(), indent=2, ensure_ascii=False))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from biblioteca import views  # noqa: F401 (registra las páginas cacheadas)
+from biblioteca.api_urls import router
+from biblioteca.cache_api import obtener_metricas
+from biblioteca.cache_html import PAGINAS_CACHEADAS
+
+
+class Command(BaseCommand):
+    """
+    Muestra los aciertos y fallos del cache de respuestas de la API y del
+    cache de páginas HTML.
+
+    Uso:
+        python manage.py metricas_cache
+    """
+    help = 'Muestra aciertos (hit) y fallos (miss) del cache de respuestas por ViewSet y página HTML'
+
+    def handle(self, *args, **options):
+        nombres = [
+            basename for _, viewset, basename in router.registry
+            if getattr(viewset, 'cache_respuestas', False)
+        ] + PAGINAS_CACHEADAS
+        for nombre, metricas in obtener_metricas(nombres).items():
+            total = metricas['hit'] + metricas['miss']
+            porcentaje = metricas['hit'] * 100 / total if total else 0
+            self.stdout.write(
+                f"{nombre:20} hit={metricas['hit']:<8} miss={metricas['miss']:<8} acierto={porcentaje:.1f}%"
+            )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from biblioteca.models import Libro
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye las estadísticas de reseñas almacenadas en Libro.
+
+    Uso:
+        python manage.py recalcular_estadisticas
+        python manage.py recalcular_estadisticas --libro 1 --libro 2
+    """
+    help = 'Recalcula la cantidad de reseñas, sumas y promedios almacenados en cada libro'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--libro',
+            action='append',
+            type=int,
+            dest='libros',
+            help='ID de un libro a recalcular (se puede repetir). Por defecto se recalculan todos.'
+        )
+
+    def handle(self, *args, **options):
+        libros = Libro.objects.all()
+        if options['libros']:
+            libros = libros.filter(pk__in=options['libros'])
+
+        with transaction.atomic():
+            actualizados = libros.recalcular_estadisticas()
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Estadísticas recalculadas para {actualizados} libros'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from biblioteca.models import Libro, ParametrosRanking
+
+
+class Command(BaseCommand):
+    """
+    Actualiza los parámetros de los rankings (/api/books/top/ y
+    /api/books/trending/) y vuelve a puntuar todos los libros.
+
+    Cada escritura de reseñas ya puntúa sus libros; este comando sirve para:
+    - llevar la media a priori del puntaje bayesiano a la media actual de
+      los ratings del catálogo,
+    - aplicar los cambios de BIBLIOTECA_RANKING (PESO_PRIOR, VIDA_MEDIA_DIAS),
+    - mover la época de la tendencia a la fecha actual. Los valores
+      guardados son relativos a la época y crecen con el tiempo; conviene
+      ejecutarlo periódicamente (por ejemplo, una vez por semana).
+
+    Uso:
+        python manage.py recalcular_ranking
+    """
+    help = 'Actualiza los parámetros de los rankings de libros y vuelve a puntuarlos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de la base de datos')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        with transaction.atomic(using=using):
+            parametros, _ = ParametrosRanking.objects.using(using).update_or_create(
+                pk=1, defaults=ParametrosRanking.valores_iniciales(using=using)
+            )
+            cantidad = Libro.objects.using(using).actualizar_ranking(parametros)
+
+        self.stdout.write(
+            f'media {parametros.media:.3f}, peso {parametros.peso:g}, '
+            f'vida media {parametros.vida_media_dias:g} días, época {parametros.epoca:%Y-%m-%d %H:%M}'
+        )
+        self.stdout.write(self.style.SUCCESS(f'✓ {cantidad} libros puntuados'))
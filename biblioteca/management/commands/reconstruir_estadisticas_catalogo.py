@@ -0,0 +1,59 @@
+import math
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from biblioteca.estadisticas import TABLAS
+
+
+def iguales(a, b):
+    return len(a) == len(b) and all(math.isclose(x, y, abs_tol=1e-6) for x, y in zip(a, b))
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye las tablas de resumen de /api/stats/ (libros por año,
+    autores y libros por nacionalidad, reseñas por mes y calificación).
+
+    Los triggers las mantienen al día; este comando sirve para repararlas
+    o para cargarlas después de importar datos con SQL. Con --verificar
+    solo compara las tablas con un recálculo completo (sin guardarlo) y
+    termina con error si alguna fila no coincide.
+
+    Uso:
+        python manage.py reconstruir_estadisticas_catalogo
+        python manage.py reconstruir_estadisticas_catalogo --verificar
+    """
+    help = 'Reconstruye las tablas de resumen de las estadísticas del catálogo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de la base de datos')
+        parser.add_argument('--verificar', action='store_true',
+                            help='Comparar con un recálculo completo sin modificar las tablas')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if connections[using].vendor != 'sqlite':
+            raise CommandError('La reconstrucción usa funciones de SQLite (strftime).')
+
+        diferencias = 0
+        with transaction.atomic(using=using):
+            for tabla in TABLAS:
+                antes = tabla.leer(using=using)
+                cantidad = tabla.reconstruir(using=using)
+                despues = tabla.leer(using=using)
+                distintas = sum(
+                    1 for clave in antes.keys() | despues.keys()
+                    if clave not in antes or clave not in despues or not iguales(antes[clave], despues[clave])
+                )
+                diferencias += distintas
+                self.stdout.write(f'{tabla.tabla}: {cantidad} filas, {distintas} distintas de las guardadas')
+            if options['verificar']:
+                transaction.set_rollback(True, using=using)
+
+        if options['verificar']:
+            if diferencias:
+                raise CommandError(f'{diferencias} filas de las tablas de resumen no coinciden con el catálogo.')
+            self.stdout.write(self.style.SUCCESS('✓ Las tablas de resumen coinciden con el catálogo'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ Estadísticas del catálogo reconstruidas'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from biblioteca.busqueda import INDICES
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye los índices de búsqueda FTS5 de libros y reseñas.
+
+    Los triggers mantienen los índices al día; este comando sirve para
+    repararlos o para volver a cargarlos después de importar datos con SQL.
+
+    Uso:
+        python manage.py reconstruir_indice_busqueda
+    """
+    help = 'Reconstruye los índices de búsqueda de texto completo (SQLite FTS5)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de la base de datos')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if connections[using].vendor != 'sqlite':
+            raise CommandError('Los índices FTS5 solo están disponibles en SQLite.')
+
+        with transaction.atomic(using=using):
+            for modelo, indice in INDICES.items():
+                filas = indice.reconstruir(using=using)
+                self.stdout.write(f'{indice.tabla} ({modelo._meta.verbose_name_plural}): {filas} filas indexadas')
+
+        self.stdout.write(self.style.SUCCESS('✓ Índices de búsqueda reconstruidos'))
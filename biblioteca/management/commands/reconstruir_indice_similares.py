@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from biblioteca import similares
+from biblioteca.models import Libro
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye el índice de libros similares (/api/books/{id}/similar/)
+    con todos los libros de la base.
+
+    Guardar o eliminar un libro ya lo actualiza en el índice; este comando
+    sirve para crearlo, para recalcular el IDF con el catálogo actual (los
+    libros agregados después usan el de la última reconstrucción), para
+    aplicar cambios de BIBLIOTECA_SIMILARES y después de cargas masivas
+    (bulk_create, generar_datos), que no envían señales.
+
+    Uso:
+        python manage.py reconstruir_indice_similares
+    """
+    help = 'Reconstruye el índice TF-IDF de libros similares'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de la base de datos')
+        parser.add_argument('--bloque', type=int, default=5000, help='Libros leídos por consulta')
+
+    def handle(self, *args, **options):
+        if similares.np is None:
+            raise CommandError('El índice de libros similares requiere numpy (pip install numpy).')
+
+        inicio = time.perf_counter()
+        libros = (
+            Libro.objects.using(options['database']).order_by('pk')
+            .values_list('id', 'titulo', 'resumen').iterator(chunk_size=options['bloque'])
+        )
+        indice = similares.get_indice()
+        cantidad = indice.reconstruir(libros)
+        segundos = time.perf_counter() - inicio
+
+        tamano = sum(ruta.stat().st_size for ruta in indice.directorio.rglob('*.npy'))
+        self.stdout.write(f'{indice.directorio}: {tamano / 2 ** 20:.1f} MB')
+        self.stdout.write(self.style.SUCCESS(f'✓ {cantidad} libros indexados en {segundos:.1f} s'))
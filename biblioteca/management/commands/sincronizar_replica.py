@@ -0,0 +1,94 @@
+import sqlite3
+import time
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from biblioteca.models import LatidoReplica
+
+
+def archivo_sqlite(alias):
+    """Ruta del archivo de una base SQLite, también si NAME es una URI (file:...?mode=ro)"""
+    datos = settings.DATABASES[alias]
+    if datos['ENGINE'] != 'django.db.backends.sqlite3':
+        return None
+    nombre = str(datos['NAME'])
+    if nombre.startswith('file:'):
+        return url2pathname(unquote(urlparse(nombre).path))
+    return nombre
+
+
+class Command(BaseCommand):
+    """
+    Escribe el latido de las réplicas en el primario y, para las réplicas
+    SQLite locales, copia el primario en su archivo.
+
+    Con SQLite no hay replicación: la réplica local (DATABASES['replica'])
+    es una copia de db.sqlite3 hecha con la API de backup de SQLite, que
+    permite copiar mientras la base está en uso. Cada copia lleva el latido
+    escrito justo antes, así que la réplica sabe hasta cuándo están sus
+    datos. Con --intervalo se repite hasta interrumpirlo (Ctrl+C); un
+    intervalo mayor que RETRASO_MAXIMO simula una réplica atrasada.
+
+    Con una replicación real (PostgreSQL, MySQL) se usa --solo-latido
+    periódicamente (cron): la base replica el latido junto con los datos.
+
+    Uso:
+        python manage.py sincronizar_replica
+        python manage.py sincronizar_replica --intervalo 2
+        python manage.py sincronizar_replica --solo-latido --intervalo 1
+    """
+    help = 'Copia el primario en las réplicas SQLite locales y escribe el latido para medir su retraso'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', action='append', dest='aliases',
+                            help='Sincronizar solo estas réplicas (se puede repetir)')
+        parser.add_argument('--intervalo', type=float, default=None,
+                            help='Repetir cada tantos segundos hasta interrumpir')
+        parser.add_argument('--solo-latido', action='store_true',
+                            help='Solo escribe el latido en el primario (replicación real)')
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.BIBLIOTECA_REPLICAS['ALIAS']
+        desconocidos = [alias for alias in aliases if alias not in settings.DATABASES]
+        if desconocidos:
+            raise CommandError(f"Alias sin configurar en DATABASES: {', '.join(desconocidos)}")
+        if not options['solo_latido']:
+            for alias in aliases:
+                if archivo_sqlite(alias) is None:
+                    raise CommandError(f'{alias} no es SQLite: usar --solo-latido con una replicación real.')
+
+        if options['intervalo'] is None:
+            self.sincronizar(aliases, options['solo_latido'])
+            return
+        try:
+            while True:
+                self.sincronizar(aliases, options['solo_latido'])
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            self.stdout.write('Sincronización detenida.')
+
+    def sincronizar(self, aliases, solo_latido):
+        fecha = LatidoReplica.latir(using=DEFAULT_DB_ALIAS)
+        if solo_latido:
+            self.stdout.write(f'Latido {fecha:%H:%M:%S.%f}'[:-3])
+            return
+
+        primario = connections[DEFAULT_DB_ALIAS]
+        primario.ensure_connection()
+        for alias in aliases:
+            inicio = time.perf_counter()
+            destino = sqlite3.connect(archivo_sqlite(alias))
+            try:
+                primario.connection.backup(destino)
+            finally:
+                destino.close()
+            # La réplica cambió: la próxima conexión la vuelve a abrir
+            connections[alias].close()
+            self.stdout.write(
+                f'{alias}: copiada con el latido {fecha:%H:%M:%S} '
+                f'en {(time.perf_counter() - inicio) * 1000:.1f} ms'
+            )
@@ -0,0 +1,136 @@
+import asyncio
+import io
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+
+from biblioteca.benchmark import base_de_datos_temporal
+from biblioteca.models import Autor, LatidoReplica, Libro, Resena
+
+
+# Rutas de list relativas a /api/ (y a /api/async/), con los filtros,
+# ordenamientos, paginaciones y selecciones de campos que usa la lectura rápida
+URLS = [
+    'books/', 'books/?page=3', 'books/?page_size=500', 'books/?page=999',
+    'books/?search=casa', 'books/?autor=2', 'books/?year=2001',
+    'books/?ordering=-publication_year&author=3', 'books/?ordering=-rating_promedio',
+    'books/?cursor=', 'books/?ordering=titulo&cursor=',
+    'books/?fields=id,titulo,author_name', 'books/?omit=recent_reviews',
+    'books/?fields=id,recent_reviews.texto,recent_reviews.fecha', 'books/?expand=autor',
+    'authors/', 'authors/?page_size=500', 'authors/?search=garcia',
+    'authors/?ordering=-rating_promedio&cantidad_libros_min=3',
+    'authors/?fields=id,nombre', 'authors/?fields=rating_promedio,primer_anio',
+    'reviews/', 'reviews/?page_size=500', 'reviews/?libro=4&rating_min=3',
+    'reviews/?search=recomendable', 'reviews/?cursor=&ordering=-rating',
+    'reviews/?fields=id,fecha', 'reviews/?expand=libro',
+]
+
+SIN_CACHE = {'ACTIVO': False, 'CACHE': 'default', 'TIMEOUT': 0}
+
+
+def respuestas(urls, activo):
+    """
+    Retorna ({(camino, url): (status, contenido)} de las vistas WSGI y async,
+    cantidad de respuestas que leyeron de una réplica).
+
+    Las réplicas y los límites quedan activos como en settings: la réplica
+    de prueba es un espejo de la base temporal (TEST MIRROR) y el latido
+    recién escrito la pone en uso. Con VERIFICACION 0 cada petición vuelve a
+    medir su retraso, también antes de las vistas async (que no pueden
+    consultar la base desde el event loop). La cubeta de fichas se agranda
+    para que ninguna petición reciba un 429.
+    """
+    resultado = {}
+    desde_replica = 0
+    LatidoReplica.latir()
+    with override_settings(
+        BIBLIOTECA_LECTURA_RAPIDA={'ACTIVO': activo}, BIBLIOTECA_CACHE_API=SIN_CACHE,
+        BIBLIOTECA_LIMITES={**settings.BIBLIOTECA_LIMITES, 'CAPACIDAD': 10 ** 6},
+        BIBLIOTECA_REPLICAS={**settings.BIBLIOTECA_REPLICAS, 'VERIFICACION': 0},
+    ):
+        client = Client(HTTP_ACCEPT='application/json')
+        for url in urls:
+            response = client.get(f'/api/{url}')
+            resultado['wsgi', url] = (response.status_code, response.content)
+            desde_replica += response.has_header('X-Replica')
+
+        async def leer_async():
+            nonlocal desde_replica
+            client = AsyncClient(HTTP_ACCEPT='application/json')
+            for url in urls:
+                response = await client.get(f'/api/async/{url}')
+                # Los enlaces next/previous de las vistas async apuntan a /api/async/
+                resultado['async', url] = (response.status_code, response.content.replace(b'/api/async/', b'/api/'))
+                desde_replica += response.has_header('X-Replica')
+
+        asyncio.run(leer_async())
+    return resultado, desde_replica
+
+
+class Command(BaseCommand):
+    """
+    Verifica que la lectura rápida (BIBLIOTECA_LECTURA_RAPIDA) responde
+    exactamente lo mismo que los serializadores.
+
+    Sobre una base de datos temporal sembrada con generar_datos (más algunos
+    registros con textos difíciles y un rating que json y orjson escriben
+    distinto) pide cada URL de list con la lectura rápida desactivada y
+    activada, en los ViewSets y en las vistas async, y compara el status y
+    el contenido byte a byte, con las réplicas y los límites activos como en
+    settings (ver respuestas).
+    Termina con error si alguna respuesta difiere.
+
+    Uso:
+        python manage.py verificar_lectura_rapida
+        python manage.py verificar_lectura_rapida --autores 100 --url 'books/?page_size=50'
+    """
+    help = 'Verifica que la lectura rápida de list responde igual que los serializadores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--autores', type=int, default=30)
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--url', action='append', dest='urls',
+                            help='Verificar solo estas rutas relativas a /api/ (se puede repetir)')
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or URLS
+        with base_de_datos_temporal():
+            call_command('generar_datos', autores=options['autores'], semilla=options['semilla'],
+                         stdout=io.StringIO())
+            self.agregar_textos_dificiles()
+            originales, _ = respuestas(urls, activo=False)
+            rapidas, desde_replica = respuestas(urls, activo=True)
+
+        diferentes = 0
+        for (camino, url), (status, contenido) in rapidas.items():
+            esperado = originales['wsgi', url]
+            if (status, contenido) == esperado:
+                continue
+            diferentes += 1
+            posicion = next(
+                (i for i, (a, b) in enumerate(zip(esperado[1], contenido)) if a != b),
+                min(len(esperado[1]), len(contenido)),
+            )
+            self.stdout.write(self.style.ERROR(f'{camino} /api/{url}: status {esperado[0]} -> {status}'))
+            self.stdout.write(f'  esperado: {esperado[1][max(0, posicion - 60):posicion + 60]!r}')
+            self.stdout.write(f'  obtenido: {contenido[max(0, posicion - 60):posicion + 60]!r}')
+
+        if diferentes:
+            raise CommandError(f'{diferentes} de {len(rapidas)} respuestas difieren.')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(rapidas)} respuestas idénticas ({len(urls)} URLs, WSGI y async; '
+            f'{desde_replica} leídas de una réplica).'
+        ))
+
+    def agregar_textos_dificiles(self):
+        """Registros con textos y valores que los codificadores JSON escriben distinto si no se cuida"""
+        autor = Autor.objects.create(nombre='José "Pepe" Ñúñez \U0001f4da', nacionalidad='Perú\u2028Chile')
+        libro = Libro.objects.create(
+            titulo='Casa </script>\u2029fin', autor=autor, fecha_publicacion='1999-12-31',
+            resumen='Línea\ncon\ttabulación, \\barra\\ y \x7f control',
+        )
+        # Un rating como 0.00001 se escribe 1e-05 con json y 0.00001 con orjson
+        Resena.objects.create(libro=libro, texto='Recomendable \U0001f44d "con comillas"', calificacion=5, rating=0.00001)
+        Resena.objects.create(libro=libro, texto='', calificacion=1, rating=None)
@@ -0,0 +1,167 @@
+import io
+import re
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from biblioteca.benchmark import base_de_datos_temporal
+from biblioteca.models import Autor, Libro, Resena
+
+
+# Rutas de los ViewSets relativas a /api/ con las formas de consulta más
+# usadas, y las páginas HTML (rutas que empiezan con /): {autor}, {libro}
+# y {resena} se reemplazan por ids existentes
+CASOS = [
+    'books/', 'books/?autor={autor}', 'books/?author={autor}&ordering=-fecha_publicacion',
+    'books/?year=2001', 'books/?ordering=-publication_year', 'books/?ordering=titulo',
+    'books/?cursor=', 'books/?ordering=titulo&cursor=', 'books/{libro}/',
+    'books/por_autor/?autor_id={autor}', 'books/?search=casa',
+    'books/top/', 'books/trending/?nacionalidad=colombiana', 'books/top/?decada=1990',
+    'authors/', 'authors/{autor}/', 'authors/{autor}/libros/', 'authors/?ordering=-rating_promedio',
+    'reviews/', 'reviews/?libro={libro}', 'reviews/?libro={libro}&ordering=-fecha',
+    'reviews/?libro={libro}&rating_min=3', 'reviews/?ordering=-rating',
+    'reviews/?rating_min=4&ordering=-rating', 'reviews/?rating_min=4&rating_max=4.5',
+    'reviews/?ordering=-fecha&cursor=', 'reviews/{resena}/', 'reviews/?search=recomendable',
+    '/libros/?page=2', '/libros/?autor={autor}', '/libros/{libro}/?page=2', '/autores/?page=2',
+]
+
+# Problemas que ningún índice evita en algunos casos, con el motivo
+PERMITIDOS = {
+    'books/?search=casa': {
+        'ordenamiento': 'ordena por relevancia (bm25) las coincidencias de la búsqueda',
+    },
+    'reviews/?search=recomendable': {
+        'ordenamiento': 'ordena por relevancia (bm25) las coincidencias de la búsqueda',
+    },
+    'reviews/?rating_min=4&rating_max=4.5': {
+        'ordenamiento': 'resena_rating_idx acota el rango y se ordenan por fecha solo las reseñas que lo cumplen',
+    },
+    'books/top/?decada=1990': {
+        'ordenamiento': 'libro_fecha_idx acota la década y se ordenan por puntaje solo sus libros',
+    },
+    'authors/?ordering=-rating_promedio': {
+        'recorrido': 'la estadística se calcula con GROUP BY para todos los autores',
+        'ordenamiento': 'se ordena por la estadística calculada',
+    },
+}
+
+SIN_CACHE = {'ACTIVO': False, 'CACHE': 'default', 'TIMEOUT': 0}
+
+# "SCAN tabla" sin índice. No cuentan los recorridos de subconsultas y
+# co-rutinas ("SCAN (subquery-1)", "SCAN qualify"), de tablas virtuales
+# (FTS5) ni "SCAN tabla USING [COVERING] INDEX", que recorre un índice en orden.
+RECORRIDO_COMPLETO = re.compile(r'SCAN (?!\(|qualify$|subquery$)(\S+)$')
+
+
+def plan(sql):
+    """Retorna las filas de EXPLAIN QUERY PLAN como (id, padre, detalle)"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [(fila[0], fila[1], fila[3]) for fila in cursor.fetchall()]
+
+
+def problemas(filas):
+    """
+    Retorna los recorridos completos y los ordenamientos del plan como
+    (tipo, detalle), con tipo 'recorrido' u 'ordenamiento'.
+
+    El ordenamiento del resultado de una ventana filtrada ("SCAN qualify" en
+    el mismo nivel, la precarga con slice de las reseñas recientes) no cuenta:
+    ordena como mucho N filas por libro de la página.
+    """
+    encontrados = []
+    for _, padre, detalle in filas:
+        if RECORRIDO_COMPLETO.match(detalle):
+            encontrados.append(('recorrido', detalle))
+        elif 'TEMP B-TREE' in detalle:
+            ventana = any(p == padre and d == 'SCAN qualify' for _, p, d in filas)
+            if not ventana:
+                encontrados.append(('ordenamiento', detalle))
+    return encontrados
+
+
+class Command(BaseCommand):
+    """
+    Verifica con EXPLAIN QUERY PLAN que las consultas de los ViewSets y de
+    las páginas HTML usan índices: ninguna recorre una tabla completa ni ordena con un B-tree
+    temporal (USE TEMP B-TREE FOR ORDER BY / GROUP BY).
+
+    Sobre una base de datos temporal sembrada con generar_datos pide cada
+    URL de CASOS, con la lectura rápida desactivada y activada (las consultas
+    cambian), captura todas sus consultas y analiza sus planes. PERMITIDOS
+    lista, con su motivo, lo que ningún índice evita en algunos casos.
+    Termina con error si algún plan no cumple.
+
+    Uso:
+        python manage.py verificar_planes_consultas
+        python manage.py verificar_planes_consultas --url 'reviews/?libro=1' -v 2
+    """
+    help = 'Verifica que las consultas de la API y las páginas HTML no recorren tablas completas ni ordenan sin índice'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--autores', type=int, default=30)
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--url', action='append', dest='urls',
+                            help='Verificar solo estas rutas relativas a /api/ o absolutas (se puede repetir)')
+
+    def handle(self, *args, **options):
+        casos = options['urls'] or CASOS
+        detallado = options['verbosity'] > 1
+        fallas = 0
+        consultas = 0
+        with base_de_datos_temporal(), override_settings(
+            BIBLIOTECA_CACHE_API=SIN_CACHE,
+            BIBLIOTECA_LIMITES={**settings.BIBLIOTECA_LIMITES, 'ACTIVO': False},
+            BIBLIOTECA_CACHE_HTML={**settings.BIBLIOTECA_CACHE_HTML, 'ACTIVO': False},
+            BIBLIOTECA_REPLICAS={**settings.BIBLIOTECA_REPLICAS, 'ACTIVO': False},
+        ):
+            call_command('generar_datos', autores=options['autores'], semilla=options['semilla'],
+                         stdout=io.StringIO())
+            ids = {
+                'autor': Autor.objects.order_by('pk').values_list('pk', flat=True).first(),
+                'libro': Libro.objects.order_by('pk').values_list('pk', flat=True).first(),
+                'resena': Resena.objects.order_by('pk').values_list('pk', flat=True).first(),
+            }
+            client = Client(HTTP_ACCEPT='application/json')
+            for plantilla in casos:
+                permitidos = PERMITIDOS.get(plantilla, {})
+                url = plantilla.format(**ids)
+                if not url.startswith('/'):
+                    url = f'/api/{url}'
+                for activo in (False, True):
+                    with override_settings(BIBLIOTECA_LECTURA_RAPIDA={'ACTIVO': activo}), \
+                            CaptureQueriesContext(connection) as capturadas:
+                        response = client.get(url)
+                    if response.status_code != 200:
+                        raise CommandError(f'{url}: status {response.status_code}')
+                    for consulta in capturadas.captured_queries:
+                        if not consulta['sql'].startswith('SELECT'):
+                            continue
+                        consultas += 1
+                        filas = plan(consulta['sql'])
+                        encontrados = [
+                            (tipo, detalle) for tipo, detalle in problemas(filas)
+                            if tipo not in permitidos
+                        ]
+                        if encontrados:
+                            fallas += 1
+                        if encontrados or detallado:
+                            self.informar(url, activo, consulta['sql'], filas, encontrados)
+
+        if fallas:
+            raise CommandError(f'{fallas} de {consultas} consultas sin índice adecuado.')
+        self.stdout.write(self.style.SUCCESS(
+            f'{consultas} consultas usan índices ({len(casos)} URLs, con y sin lectura rápida).'
+        ))
+
+    def informar(self, url, activo, sql, filas, encontrados):
+        camino = 'rápida' if activo else 'DRF'
+        estilo = self.style.ERROR if encontrados else self.style.SUCCESS
+        self.stdout.write(estilo(f"{url} ({camino}): {'; '.join(d for _, d in encontrados) or 'ok'}"))
+        self.stdout.write(f'  {sql[:300]}')
+        for _, _, detalle in filas:
+            self.stdout.write(f'    {detalle}')
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:00
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def calcular_estadisticas(apps, schema_editor):
+    """Rellena las estadísticas de los libros existentes a partir de sus reseñas"""
+    Libro = apps.get_model('biblioteca', 'Libro')
+    Resena = apps.get_model('biblioteca', 'Resena')
+    resenas = Resena.objects.filter(libro=OuterRef('pk')).order_by().values('libro')
+    con_rating = resenas.filter(rating__isnull=False)
+
+    def agregado(qs, expresion, output_field):
+        return Subquery(qs.annotate(valor=expresion).values('valor'), output_field=output_field)
+
+    Libro.objects.update(
+        cantidad_resenas=Coalesce(agregado(resenas, Count('pk'), models.IntegerField()), 0),
+        calificacion_suma=Coalesce(agregado(resenas, Sum('calificacion'), models.IntegerField()), 0),
+        rating_cantidad=Coalesce(agregado(con_rating, Count('pk'), models.IntegerField()), 0),
+        rating_suma=Coalesce(agregado(con_rating, Sum('rating'), models.FloatField()), 0.0),
+        rating_promedio=agregado(con_rating, Avg('rating'), models.FloatField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblioteca', '0002_resena_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='libro',
+            name='calificacion_suma',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Suma de las calificaciones de las reseñas'),
+        ),
+        migrations.AddField(
+            model_name='libro',
+            name='cantidad_resenas',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Cantidad total de reseñas del libro'),
+        ),
+        migrations.AddField(
+            model_name='libro',
+            name='rating_cantidad',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Cantidad de reseñas con rating'),
+        ),
+        migrations.AddField(
+            model_name='libro',
+            name='rating_promedio',
+            field=models.FloatField(blank=True, editable=False, help_text='Rating promedio de las reseñas (null si no hay ratings)', null=True),
+        ),
+        migrations.AddField(
+            model_name='libro',
+            name='rating_suma',
+            field=models.FloatField(default=0.0, editable=False, help_text='Suma de los ratings de las reseñas'),
+        ),
+        migrations.RunPython(calcular_estadisticas, migrations.RunPython.noop),
+    ]
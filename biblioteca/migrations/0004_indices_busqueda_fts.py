@@ -0,0 +1,112 @@
+# Índices de búsqueda de texto completo (SQLite FTS5) para libros y reseñas
+
+from django.db import migrations
+
+
+TOKENIZADOR = "tokenize = 'unicode61 remove_diacritics 2'"
+
+CREAR = [
+    # Tablas virtuales FTS5. El rowid de cada fila es el id del libro o de la reseña.
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS biblioteca_libro_fts
+    USING fts5(titulo, resumen, autor_nombre, {TOKENIZADOR})
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS biblioteca_resena_fts
+    USING fts5(texto, libro_titulo, {TOKENIZADOR})
+    """,
+    # Libros: alta, modificación de los campos indexados y baja
+    """
+    CREATE TRIGGER IF NOT EXISTS biblioteca_libro_fts_ai AFTER INSERT ON biblioteca_libro BEGIN
+        INSERT INTO biblioteca_libro_fts(rowid, titulo, resumen, autor_nombre)
+        SELECT new.id, new.titulo, new.resumen, nombre FROM biblioteca_autor WHERE id = new.autor_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS biblioteca_libro_fts_au
+    AFTER UPDATE OF titulo, resumen, autor_id ON biblioteca_libro BEGIN
+        DELETE FROM biblioteca_libro_fts WHERE rowid = old.id;
+        INSERT INTO biblioteca_libro_fts(rowid, titulo, resumen, autor_nombre)
+        SELECT new.id, new.titulo, new.resumen, nombre FROM biblioteca_autor WHERE id = new.autor_id;
+        UPDATE biblioteca_resena_fts SET libro_titulo = new.titulo
+        WHERE new.titulo IS NOT old.titulo
+          AND rowid IN (SELECT id FROM biblioteca_resena WHERE libro_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS biblioteca_libro_fts_ad AFTER DELETE ON biblioteca_libro BEGIN
+        DELETE FROM biblioteca_libro_fts WHERE rowid = old.id;
+    END
+    """,
+    # Autores: el nombre está desnormalizado en el índice de libros
+    """
+    CREATE TRIGGER IF NOT EXISTS biblioteca_autor_fts_au AFTER UPDATE OF nombre ON biblioteca_autor BEGIN
+        UPDATE biblioteca_libro_fts SET autor_nombre = new.nombre
+        WHERE rowid IN (SELECT id FROM biblioteca_libro WHERE autor_id = new.id);
+    END
+    """,
+    # Reseñas: alta, modificación de los campos indexados y baja
+    """
+    CREATE TRIGGER IF NOT EXISTS biblioteca_resena_fts_ai AFTER INSERT ON biblioteca_resena BEGIN
+        INSERT INTO biblioteca_resena_fts(rowid, texto, libro_titulo)
+        SELECT new.id, new.texto, titulo FROM biblioteca_libro WHERE id = new.libro_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS biblioteca_resena_fts_au
+    AFTER UPDATE OF texto, libro_id ON biblioteca_resena BEGIN
+        DELETE FROM biblioteca_resena_fts WHERE rowid = old.id;
+        INSERT INTO biblioteca_resena_fts(rowid, texto, libro_titulo)
+        SELECT new.id, new.texto, titulo FROM biblioteca_libro WHERE id = new.libro_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS biblioteca_resena_fts_ad AFTER DELETE ON biblioteca_resena BEGIN
+        DELETE FROM biblioteca_resena_fts WHERE rowid = old.id;
+    END
+    """,
+    # Carga inicial con los datos existentes
+    """
+    INSERT INTO biblioteca_libro_fts(rowid, titulo, resumen, autor_nombre)
+    SELECT l.id, l.titulo, l.resumen, a.nombre
+    FROM biblioteca_libro l JOIN biblioteca_autor a ON a.id = l.autor_id
+    """,
+    """
+    INSERT INTO biblioteca_resena_fts(rowid, texto, libro_titulo)
+    SELECT r.id, r.texto, l.titulo
+    FROM biblioteca_resena r JOIN biblioteca_libro l ON l.id = r.libro_id
+    """,
+]
+
+ELIMINAR = [
+    "DROP TRIGGER IF EXISTS biblioteca_libro_fts_ai",
+    "DROP TRIGGER IF EXISTS biblioteca_libro_fts_au",
+    "DROP TRIGGER IF EXISTS biblioteca_libro_fts_ad",
+    "DROP TRIGGER IF EXISTS biblioteca_autor_fts_au",
+    "DROP TRIGGER IF EXISTS biblioteca_resena_fts_ai",
+    "DROP TRIGGER IF EXISTS biblioteca_resena_fts_au",
+    "DROP TRIGGER IF EXISTS biblioteca_resena_fts_ad",
+    "DROP TABLE IF EXISTS biblioteca_libro_fts",
+    "DROP TABLE IF EXISTS biblioteca_resena_fts",
+]
+
+
+def ejecutar(sentencias):
+    def operacion(apps, schema_editor):
+        # FTS5 solo existe en SQLite; en otros motores la búsqueda usa SearchFilter
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in sentencias:
+            schema_editor.execute(sql)
+    return operacion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblioteca', '0003_libro_estadisticas_resenas'),
+    ]
+
+    operations = [
+        migrations.RunPython(ejecutar(CREAR), ejecutar(ELIMINAR)),
+    ]
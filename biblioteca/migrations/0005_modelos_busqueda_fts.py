@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:10
+
+import biblioteca.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Función de ranking de cada índice: bm25 con un peso por columna, en el orden
+# de las columnas de la tabla virtual. Queda guardada en la configuración de
+# FTS5 y se usa en la columna oculta `rank`.
+RANKING = {
+    'biblioteca_libro_fts': 'bm25(10.0, 1.0, 5.0)',  # titulo, resumen, autor_nombre
+    'biblioteca_resena_fts': 'bm25(1.0, 5.0)',       # texto, libro_titulo
+}
+
+
+def configurar_ranking(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for tabla, funcion in RANKING.items():
+        schema_editor.execute(f"INSERT INTO {tabla}({tabla}, rank) VALUES ('rank', %s)", (funcion,))
+
+
+def restaurar_ranking(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for tabla in RANKING:
+        schema_editor.execute(f"INSERT INTO {tabla}({tabla}, rank) VALUES ('rank', 'bm25()')")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblioteca', '0004_indices_busqueda_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibroBusqueda',
+            fields=[
+                ('libro', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='busqueda', serialize=False, to='biblioteca.libro')),
+                ('consulta', biblioteca.models.CampoFTS(db_column='biblioteca_libro_fts')),
+                ('rank', models.FloatField(db_column='rank')),
+            ],
+            options={
+                'db_table': 'biblioteca_libro_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ResenaBusqueda',
+            fields=[
+                ('resena', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='busqueda', serialize=False, to='biblioteca.resena')),
+                ('consulta', biblioteca.models.CampoFTS(db_column='biblioteca_resena_fts')),
+                ('rank', models.FloatField(db_column='rank')),
+            ],
+            options={
+                'db_table': 'biblioteca_resena_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(configurar_ranking, restaurar_ranking),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblioteca', '0005_modelos_busqueda_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatidoReplica',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(help_text='Hora del último latido escrito en el primario')),
+            ],
+            options={
+                'verbose_name': 'Latido de réplica',
+                'verbose_name_plural': 'Latidos de réplica',
+            },
+        ),
+    ]
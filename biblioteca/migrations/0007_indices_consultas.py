@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Índices de las ForeignKey creados en 0001. Los reemplazan los índices
+# compuestos que empiezan por la misma columna (libro_autor_*, resena_libro_fecha_idx).
+INDICES_FK = {
+    'biblioteca_libro_autor_id_c1df5079': ('biblioteca_libro', 'autor_id'),
+    'biblioteca_resena_libro_id_0cb5dc93': ('biblioteca_resena', 'libro_id'),
+}
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblioteca', '0006_latido_replica'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='autor',
+            index=models.Index(fields=['nombre'], name='autor_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libro',
+            index=models.Index(fields=['titulo'], name='libro_titulo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libro',
+            index=models.Index(fields=['fecha_publicacion'], name='libro_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libro',
+            index=models.Index(fields=['autor', 'titulo'], name='libro_autor_titulo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libro',
+            index=models.Index(fields=['autor', 'fecha_publicacion'], name='libro_autor_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resena',
+            index=models.Index(fields=['fecha'], name='resena_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resena',
+            index=models.Index(fields=['libro', '-fecha', '-id'], name='resena_libro_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resena',
+            index=models.Index(fields=['rating'], name='resena_rating_idx'),
+        ),
+        # AlterField(db_index=False) reconstruiría las tablas en SQLite y
+        # eliminaría los triggers de búsqueda de 0004: solo se cambia el
+        # estado y los índices de las ForeignKey se eliminan con SQL
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='libro',
+                    name='autor',
+                    field=models.ForeignKey(db_index=False, help_text='Autor del libro', on_delete=django.db.models.deletion.CASCADE, related_name='libros', to='biblioteca.autor'),
+                ),
+                migrations.AlterField(
+                    model_name='resena',
+                    name='libro',
+                    field=models.ForeignKey(db_index=False, help_text='Libro al que pertenece la reseña', on_delete=django.db.models.deletion.CASCADE, related_name='resenas', to='biblioteca.libro'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    sql=f'DROP INDEX IF EXISTS "{nombre}"',
+                    reverse_sql=f'CREATE INDEX IF NOT EXISTS "{nombre}" ON "{tabla}" ("{columna}")',
+                )
+                for nombre, (tabla, columna) in INDICES_FK.items()
+            ],
+        ),
+    ]
@@ -0,0 +1,228 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:39
+
+from django.db import migrations, models
+
+
+# Claves de los grupos a partir de las filas (fecha_publicacion y fecha se
+# guardan como texto ISO; fecha en UTC)
+ANIO = "CAST(strftime('%Y', {fila}.fecha_publicacion) AS INTEGER)"
+NACIONALIDAD = "(SELECT nacionalidad FROM biblioteca_autor WHERE id = {fila}.autor_id)"
+MES = "strftime('%Y-%m', {fila}.fecha)"
+
+
+def sumar_libro(fila):
+    return f"""
+        INSERT INTO biblioteca_estadisticaanio(anio, cantidad_libros)
+        VALUES ({ANIO.format(fila=fila)}, 1)
+        ON CONFLICT(anio) DO UPDATE SET cantidad_libros = cantidad_libros + 1;
+        INSERT INTO biblioteca_estadisticanacionalidad(nacionalidad, cantidad_autores, cantidad_libros)
+        SELECT nacionalidad, 0, 1 FROM biblioteca_autor WHERE id = {fila}.autor_id
+        ON CONFLICT(nacionalidad) DO UPDATE SET cantidad_libros = cantidad_libros + 1;
+    """
+
+
+# Los contadores no bajan de 0 (PositiveIntegerField tiene un CHECK): si la
+# tabla de resumen se desincronizó, una escritura del catálogo no debe fallar
+# por eso; reconstruir_estadisticas_catalogo la corrige. Los grupos que
+# quedan vacíos se eliminan.
+def restar_libro(fila):
+    return f"""
+        UPDATE biblioteca_estadisticaanio SET cantidad_libros = max(cantidad_libros - 1, 0)
+        WHERE anio = {ANIO.format(fila=fila)};
+        DELETE FROM biblioteca_estadisticaanio
+        WHERE anio = {ANIO.format(fila=fila)} AND cantidad_libros = 0;
+        UPDATE biblioteca_estadisticanacionalidad SET cantidad_libros = max(cantidad_libros - 1, 0)
+        WHERE nacionalidad = {NACIONALIDAD.format(fila=fila)};
+        DELETE FROM biblioteca_estadisticanacionalidad
+        WHERE nacionalidad = {NACIONALIDAD.format(fila=fila)} AND cantidad_autores = 0 AND cantidad_libros = 0;
+    """
+
+
+def sumar_resena(fila):
+    return f"""
+        INSERT INTO biblioteca_estadisticames(mes, calificacion, cantidad_resenas, rating_cantidad, rating_suma)
+        VALUES ({MES.format(fila=fila)}, {fila}.calificacion, 1, {fila}.rating IS NOT NULL, coalesce({fila}.rating, 0.0))
+        ON CONFLICT(mes, calificacion) DO UPDATE SET
+            cantidad_resenas = cantidad_resenas + 1,
+            rating_cantidad = rating_cantidad + excluded.rating_cantidad,
+            rating_suma = rating_suma + excluded.rating_suma;
+    """
+
+
+def restar_resena(fila):
+    return f"""
+        UPDATE biblioteca_estadisticames SET
+            cantidad_resenas = max(cantidad_resenas - 1, 0),
+            rating_cantidad = max(rating_cantidad - ({fila}.rating IS NOT NULL), 0),
+            rating_suma = rating_suma - coalesce({fila}.rating, 0.0)
+        WHERE mes = {MES.format(fila=fila)} AND calificacion = {fila}.calificacion;
+        DELETE FROM biblioteca_estadisticames
+        WHERE mes = {MES.format(fila=fila)} AND calificacion = {fila}.calificacion AND cantidad_resenas = 0;
+    """
+
+
+CREAR = [
+    # Libros: año de publicación y nacionalidad del autor
+    f"""
+    CREATE TRIGGER IF NOT EXISTS biblioteca_libro_estadisticas_ai AFTER INSERT ON biblioteca_libro BEGIN
+        {sumar_libro('new')}
+    END
+    """,
+    # Django escribe todas las columnas en save(): solo cuenta si cambió el grupo.
+    # No se activa con las columnas de estadísticas de reseñas (recalcular_estadisticas)
+    f"""
+    CREATE TRIGGER IF NOT EXISTS biblioteca_libro_estadisticas_au
+    AFTER UPDATE OF fecha_publicacion, autor_id ON biblioteca_libro
+    WHEN old.fecha_publicacion IS NOT new.fecha_publicacion OR old.autor_id IS NOT new.autor_id BEGIN
+        {restar_libro('old')}
+        {sumar_libro('new')}
+    END
+    """,
+    # En una baja en cascada Django elimina los libros antes que su autor
+    f"""
+    CREATE TRIGGER IF NOT EXISTS biblioteca_libro_estadisticas_ad AFTER DELETE ON biblioteca_libro BEGIN
+        {restar_libro('old')}
+    END
+    """,
+    # Autores: un autor que cambia de nacionalidad se lleva sus libros
+    """
+    CREATE TRIGGER IF NOT EXISTS biblioteca_autor_estadisticas_ai AFTER INSERT ON biblioteca_autor BEGIN
+        INSERT INTO biblioteca_estadisticanacionalidad(nacionalidad, cantidad_autores, cantidad_libros)
+        VALUES (new.nacionalidad, 1, 0)
+        ON CONFLICT(nacionalidad) DO UPDATE SET cantidad_autores = cantidad_autores + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS biblioteca_autor_estadisticas_au
+    AFTER UPDATE OF nacionalidad ON biblioteca_autor
+    WHEN old.nacionalidad IS NOT new.nacionalidad BEGIN
+        UPDATE biblioteca_estadisticanacionalidad SET
+            cantidad_autores = max(cantidad_autores - 1, 0),
+            cantidad_libros = max(cantidad_libros - (SELECT COUNT(*) FROM biblioteca_libro WHERE autor_id = new.id), 0)
+        WHERE nacionalidad = old.nacionalidad;
+        DELETE FROM biblioteca_estadisticanacionalidad
+        WHERE nacionalidad = old.nacionalidad AND cantidad_autores = 0 AND cantidad_libros = 0;
+        INSERT INTO biblioteca_estadisticanacionalidad(nacionalidad, cantidad_autores, cantidad_libros)
+        SELECT new.nacionalidad, 1, COUNT(*) FROM biblioteca_libro WHERE autor_id = new.id
+        ON CONFLICT(nacionalidad) DO UPDATE SET
+            cantidad_autores = cantidad_autores + 1,
+            cantidad_libros = cantidad_libros + excluded.cantidad_libros;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS biblioteca_autor_estadisticas_ad AFTER DELETE ON biblioteca_autor BEGIN
+        UPDATE biblioteca_estadisticanacionalidad SET cantidad_autores = max(cantidad_autores - 1, 0)
+        WHERE nacionalidad = old.nacionalidad;
+        DELETE FROM biblioteca_estadisticanacionalidad
+        WHERE nacionalidad = old.nacionalidad AND cantidad_autores = 0 AND cantidad_libros = 0;
+    END
+    """,
+    # Reseñas: mes y calificación
+    f"""
+    CREATE TRIGGER IF NOT EXISTS biblioteca_resena_estadisticas_ai AFTER INSERT ON biblioteca_resena BEGIN
+        {sumar_resena('new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS biblioteca_resena_estadisticas_au
+    AFTER UPDATE OF fecha, calificacion, rating ON biblioteca_resena
+    WHEN old.fecha IS NOT new.fecha OR old.calificacion IS NOT new.calificacion
+        OR old.rating IS NOT new.rating BEGIN
+        {restar_resena('old')}
+        {sumar_resena('new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS biblioteca_resena_estadisticas_ad AFTER DELETE ON biblioteca_resena BEGIN
+        {restar_resena('old')}
+    END
+    """,
+    # Carga inicial con los datos existentes
+    """
+    INSERT INTO biblioteca_estadisticaanio(anio, cantidad_libros)
+    SELECT CAST(strftime('%Y', fecha_publicacion) AS INTEGER), COUNT(*)
+    FROM biblioteca_libro GROUP BY 1
+    """,
+    """
+    INSERT INTO biblioteca_estadisticanacionalidad(nacionalidad, cantidad_autores, cantidad_libros)
+    SELECT a.nacionalidad, COUNT(*), SUM((SELECT COUNT(*) FROM biblioteca_libro l WHERE l.autor_id = a.id))
+    FROM biblioteca_autor a GROUP BY a.nacionalidad
+    """,
+    """
+    INSERT INTO biblioteca_estadisticames(mes, calificacion, cantidad_resenas, rating_cantidad, rating_suma)
+    SELECT strftime('%Y-%m', fecha), calificacion, COUNT(*), COUNT(rating), coalesce(SUM(rating), 0.0)
+    FROM biblioteca_resena GROUP BY 1, 2
+    """,
+]
+
+ELIMINAR = [
+    f"DROP TRIGGER IF EXISTS biblioteca_{tabla}_estadisticas_{evento}"
+    for tabla in ('libro', 'autor', 'resena')
+    for evento in ('ai', 'au', 'ad')
+]
+
+
+def ejecutar(sentencias):
+    def operacion(apps, schema_editor):
+        # Los triggers usan la sintaxis de SQLite; en otros motores las tablas
+        # se llenan con reconstruir_estadisticas_catalogo
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in sentencias:
+            # Sin parámetros: los % de strftime no son marcadores
+            schema_editor.execute(sql, params=None)
+    return operacion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblioteca', '0007_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaAnio',
+            fields=[
+                ('anio', models.IntegerField(help_text='Año de publicación', primary_key=True, serialize=False)),
+                ('cantidad_libros', models.PositiveIntegerField(default=0, help_text='Libros publicados ese año')),
+            ],
+            options={
+                'verbose_name': 'Estadística por año',
+                'verbose_name_plural': 'Estadísticas por año',
+                'ordering': ['anio'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EstadisticaNacionalidad',
+            fields=[
+                ('nacionalidad', models.CharField(help_text='Nacionalidad de los autores', max_length=50, primary_key=True, serialize=False)),
+                ('cantidad_autores', models.PositiveIntegerField(default=0, help_text='Autores de esa nacionalidad')),
+                ('cantidad_libros', models.PositiveIntegerField(default=0, help_text='Libros de autores de esa nacionalidad')),
+            ],
+            options={
+                'verbose_name': 'Estadística por nacionalidad',
+                'verbose_name_plural': 'Estadísticas por nacionalidad',
+                'ordering': ['nacionalidad'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EstadisticaMes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.CharField(help_text='Mes de la reseña (AAAA-MM, UTC)', max_length=7)),
+                ('calificacion', models.IntegerField(help_text='Calificación del 1 al 5')),
+                ('cantidad_resenas', models.PositiveIntegerField(default=0, help_text='Reseñas con esa calificación en el mes')),
+                ('rating_cantidad', models.PositiveIntegerField(default=0, help_text='Cuántas de ellas tienen rating')),
+                ('rating_suma', models.FloatField(default=0.0, help_text='Suma de sus ratings')),
+            ],
+            options={
+                'verbose_name': 'Estadística por mes',
+                'verbose_name_plural': 'Estadísticas por mes',
+                'ordering': ['mes', 'calificacion'],
+                'constraints': [models.UniqueConstraint(fields=('mes', 'calificacion'), name='estadistica_mes_unica')],
+            },
+        ),
+        # Después de CreateModel (al revertir se eliminan antes que las tablas)
+        migrations.RunPython(ejecutar(CREAR), ejecutar(ELIMINAR)),
+    ]
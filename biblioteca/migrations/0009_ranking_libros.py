@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:05
+
+import math
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Exp, Least
+from django.utils import timezone
+
+from biblioteca.models import DiaJuliano
+
+
+# Libro tiene triggers (FTS5 de 0004 y estadísticas de 0008): AddField de una
+# columna NOT NULL con default reconstruye la tabla en SQLite y los perdería,
+# así que la columna se agrega con ALTER TABLE ADD COLUMN
+def agregar_columna(nombre):
+    return migrations.SeparateDatabaseAndState(
+        state_operations=[
+            migrations.AddField(
+                model_name='libro',
+                name=nombre,
+                field=models.FloatField(default=0.0, editable=False, help_text=AYUDA[nombre]),
+            ),
+        ],
+        database_operations=[
+            migrations.RunSQL(
+                f'ALTER TABLE biblioteca_libro ADD COLUMN {nombre} real NOT NULL DEFAULT 0.0',
+                f'ALTER TABLE biblioteca_libro DROP COLUMN {nombre}',
+            ),
+        ],
+    )
+
+
+AYUDA = {
+    'puntaje_bayesiano': 'Rating promedio bayesiano (ponderado por la cantidad de ratings)',
+    'tendencia': 'Actividad de reseñas con decaimiento exponencial, relativa a la época del ranking',
+}
+
+
+def puntuar_libros(apps, schema_editor):
+    """
+    Crea la fila de parámetros y calcula los puntajes de los libros
+    existentes (las mismas fórmulas que LibroQuerySet.actualizar_ranking)
+    """
+    Libro = apps.get_model('biblioteca', 'Libro')
+    Resena = apps.get_model('biblioteca', 'Resena')
+    ParametrosRanking = apps.get_model('biblioteca', 'ParametrosRanking')
+    configuracion = settings.BIBLIOTECA_RANKING
+
+    totales = Libro.objects.aggregate(suma=Sum('rating_suma'), cantidad=Sum('rating_cantidad'))
+    parametros = ParametrosRanking.objects.create(
+        pk=1,
+        media=totales['suma'] / totales['cantidad'] if totales['cantidad'] else configuracion['MEDIA_INICIAL'],
+        peso=configuracion['PESO_PRIOR'],
+        vida_media_dias=configuracion['VIDA_MEDIA_DIAS'],
+        epoca=timezone.now(),
+    )
+
+    resenas = Resena.objects.filter(libro=OuterRef('pk')).order_by().values('libro')
+    dias = DiaJuliano('fecha') - Value(DiaJuliano.desde(parametros.epoca))
+    peso = Exp(Least(dias * Value(math.log(2) / parametros.vida_media_dias), Value(700.0)))
+    Libro.objects.update(
+        puntaje_bayesiano=ExpressionWrapper(
+            (Value(parametros.peso * parametros.media) + F('rating_suma'))
+            / (Value(parametros.peso) + F('rating_cantidad')),
+            output_field=models.FloatField(),
+        ),
+        tendencia=Coalesce(
+            Subquery(resenas.annotate(valor=Sum(peso)).values('valor'), output_field=models.FloatField()),
+            0.0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblioteca', '0008_estadisticas_catalogo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParametrosRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('media', models.FloatField(help_text='Rating promedio del catálogo (valor a priori del puntaje bayesiano)')),
+                ('peso', models.FloatField(help_text='Cantidad de ratings que vale la media a priori')),
+                ('vida_media_dias', models.FloatField(help_text='Días en que una reseña pierde la mitad de su peso en la tendencia')),
+                ('epoca', models.DateTimeField(help_text='Fecha de referencia de Libro.tendencia')),
+            ],
+            options={
+                'verbose_name': 'Parámetros del ranking',
+                'verbose_name_plural': 'Parámetros del ranking',
+            },
+        ),
+        agregar_columna('puntaje_bayesiano'),
+        agregar_columna('tendencia'),
+        migrations.AddIndex(
+            model_name='libro',
+            index=models.Index(fields=['puntaje_bayesiano'], name='libro_puntaje_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libro',
+            index=models.Index(fields=['tendencia'], name='libro_tendencia_idx'),
+        ),
+        migrations.RunPython(puntuar_libros, migrations.RunPython.noop),
+    ]
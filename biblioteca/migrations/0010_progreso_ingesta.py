@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('biblioteca', '0009_ranking_libros'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgresoIngesta',
+            fields=[
+                ('spool', models.CharField(help_text='Identificador del archivo de spool', max_length=36, primary_key=True, serialize=False)),
+                ('ultimo_id', models.BigIntegerField(default=0, help_text='Última entrada del spool aplicada')),
+                ('fecha', models.DateTimeField(auto_now=True, help_text='Fecha del último lote aplicado')),
+            ],
+            options={
+                'verbose_name': 'Progreso de ingesta',
+                'verbose_name_plural': 'Progreso de ingesta',
+            },
+        ),
+    ]
@@ -1,8 +1,18 @@
-from django.db import models
+import math
+
+from django.conf import settings
+from django.db import models, router, transaction
+from django.db.models import (
+    Avg, Count, ExpressionWrapper, F, FloatField, Func, IntegerField, Max, Min, OuterRef, Subquery, Sum, Value,
+    Window,
+)
+from django.db.models.functions import Coalesce, Exp, ExtractYear, Least, NullIf, RowNumber
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
+from .signals import resenas_modificadas
+
 
 def validar_nombre_no_vacio(value):
     """Validador personalizado: el nombre no puede estar vacío o contener solo espacios"""
@@ -22,6 +32,68 @@ def validar_calificacion(value):
         raise ValidationError('La calificación debe estar entre 1 y 5.')
 
 
+# Campos que agrega AutorQuerySet.con_estadisticas()
+ESTADISTICAS_AUTOR = (
+    'cantidad_libros', 'cantidad_resenas', 'resenas_con_rating',
+    'rating_promedio', 'primer_anio', 'ultimo_anio',
+)
+
+
+class AutorQuerySet(models.QuerySet):
+    """QuerySet de Autor con las estadísticas de sus libros y reseñas"""
+
+    def con_estadisticas(self, *campos, por_fila=False):
+        """
+        Anota las estadísticas de cada autor con una sola consulta agregada
+        (JOIN con libros y GROUP BY autor):
+
+        - cantidad_libros, primer_anio y ultimo_anio (de publicación)
+        - cantidad_resenas y resenas_con_rating, sumando las columnas de
+          estadísticas almacenadas en Libro (no se recorren las reseñas)
+        - rating_promedio: promedio de todas las reseñas con rating del autor,
+          ponderado por libro (suma de ratings / cantidad de ratings)
+
+        Las anotaciones se pueden usar en filter() (HAVING) y order_by().
+
+        Con `campos` solo se anotan esas estadísticas (por defecto todas,
+        ver ESTADISTICAS_AUTOR); las que el queryset ya tiene no se repiten.
+
+        Con por_fila=True cada estadística es una subconsulta correlacionada
+        sobre libro_autor_fecha_idx en vez de un GROUP BY. SQLite solo la
+        evalúa para las filas que devuelve, así que una página ordenada por
+        un índice (nombre) no agrega todos los autores. Sirve para mostrar las
+        estadísticas, no para filtrar ni ordenar por ellas.
+        """
+        if por_fila:
+            libros = Libro.objects.filter(autor=OuterRef('pk')).order_by().values('autor')
+            expresiones = {
+                campo: Subquery(libros.annotate(valor=expresion).values('valor'))
+                for campo, expresion in expresiones_estadisticas('').items()
+            }
+            # Sin libros la subconsulta no tiene filas (NULL); el GROUP BY da 0
+            for campo in ('cantidad_libros', 'cantidad_resenas', 'resenas_con_rating'):
+                expresiones[campo] = Coalesce(expresiones[campo], 0)
+        else:
+            expresiones = expresiones_estadisticas('libros__')
+        return self.annotate(**{
+            campo: expresiones[campo]
+            for campo in campos or ESTADISTICAS_AUTOR
+            if campo not in self.query.annotations
+        })
+
+
+def expresiones_estadisticas(prefijo):
+    """Agregados de AutorQuerySet.con_estadisticas() sobre los libros en `prefijo`"""
+    return {
+        'cantidad_libros': Count(f'{prefijo}id'),
+        'cantidad_resenas': Coalesce(Sum(f'{prefijo}cantidad_resenas'), 0),
+        'resenas_con_rating': Coalesce(Sum(f'{prefijo}rating_cantidad'), 0),
+        'rating_promedio': Sum(f'{prefijo}rating_suma') / NullIf(Sum(f'{prefijo}rating_cantidad'), 0),
+        'primer_anio': Min(ExtractYear(f'{prefijo}fecha_publicacion')),
+        'ultimo_anio': Max(ExtractYear(f'{prefijo}fecha_publicacion')),
+    }
+
+
 class Autor(models.Model):
     nombre = models.CharField(
         max_length=100,
@@ -30,21 +102,128 @@ class Autor(models.Model):
     )
     nacionalidad = models.CharField(max_length=50, help_text="Nacionalidad del autor")
     
+    objects = AutorQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Autor"
         verbose_name_plural = "Autores"
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['nombre'], name='autor_nombre_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre} ({self.nacionalidad})"
 
 
+class DiaJuliano(Func):
+    """Fecha como día juliano (días con decimales desde el 24/11/-4713, UTC), para restar fechas en SQL"""
+    function = 'julianday'
+    output_field = FloatField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='(EXTRACT(EPOCH FROM %(expressions)s) / 86400.0 + 2440587.5)',
+            **extra_context,
+        )
+
+    @staticmethod
+    def desde(fecha):
+        """El mismo valor calculado en Python para un datetime con zona horaria"""
+        return fecha.timestamp() / 86400 + 2440587.5
+
+
+class LibroQuerySet(models.QuerySet):
+    """QuerySet de Libro con el recálculo de las estadísticas de reseñas"""
+
+    def con_resenas_recientes(self, cantidad=None, queryset=None):
+        """
+        Precarga las N reseñas más recientes de cada libro en `resenas_recientes`.
+
+        Usa un Prefetch con slice, que Django resuelve con una sola consulta
+        por página: ROW_NUMBER() OVER (PARTITION BY libro_id ORDER BY fecha DESC)
+        filtrado a <= N. Así no se cargan todas las reseñas en memoria.
+        `queryset` permite restringir las columnas de las reseñas (only()).
+        """
+        if cantidad is None:
+            cantidad = settings.BIBLIOTECA_RESENAS_RECIENTES
+        if queryset is None:
+            queryset = Resena.objects.all()
+        resenas = queryset.order_by('-fecha', '-pk')[:cantidad]
+        return self.prefetch_related(
+            models.Prefetch('resenas', queryset=resenas, to_attr='resenas_recientes')
+        )
+
+    def recalcular_estadisticas(self):
+        """
+        Recalcula las columnas de estadísticas a partir de la tabla Resena.
+
+        Se ejecuta como un único UPDATE con subconsultas correlacionadas,
+        por lo que sirve tanto para un libro como para todo el catálogo.
+        Después actualiza los puntajes de los rankings (actualizar_ranking).
+        """
+        resenas = Resena.objects.filter(libro=OuterRef('pk')).order_by().values('libro')
+        con_rating = resenas.filter(rating__isnull=False)
+
+        def agregado(qs, expresion, output_field):
+            return Subquery(qs.annotate(valor=expresion).values('valor'), output_field=output_field)
+
+        filas = self.update(
+            cantidad_resenas=Coalesce(agregado(resenas, Count('pk'), IntegerField()), 0),
+            calificacion_suma=Coalesce(agregado(resenas, Sum('calificacion'), IntegerField()), 0),
+            rating_cantidad=Coalesce(agregado(con_rating, Count('pk'), IntegerField()), 0),
+            rating_suma=Coalesce(agregado(con_rating, Sum('rating'), FloatField()), 0.0),
+            rating_promedio=agregado(con_rating, Avg('rating'), FloatField()),
+        )
+        self.actualizar_ranking()
+        return filas
+
+    def actualizar_ranking(self, parametros=None):
+        """
+        Recalcula los puntajes de los rankings (/api/books/top/ y
+        /api/books/trending/) con un único UPDATE, como recalcular_estadisticas.
+
+        ═══ EXPLICACIÓN ═══
+        - puntaje_bayesiano: (peso * media + suma de ratings) / (peso + ratings).
+          Cada libro empieza con `peso` ratings "virtuales" iguales a la media
+          del catálogo; con pocos ratings el puntaje queda cerca de la media y
+          con muchos se acerca a su propio promedio.
+        - tendencia: cada reseña suma 2^((fecha - época) / vida media). Es una
+          ventana deslizante con decaimiento exponencial: una reseña pierde la
+          mitad de su peso cada `vida_media_dias`. Como todos los libros
+          decaen al mismo ritmo el orden no cambia con el paso del tiempo y el
+          valor guardado, relativo a la época, sirve para ordenar por índice
+          (el valor actual es tendencia * 2^(-(ahora - época) / vida media)).
+          El exponente se limita a 700 para no desbordar el float.
+        """
+        if parametros is None:
+            # La fila de parámetros se lee de la base en la que se escribe
+            parametros = ParametrosRanking.actuales(using=self._db or router.db_for_write(self.model))
+        resenas = Resena.objects.filter(libro=OuterRef('pk')).order_by().values('libro')
+        dias = DiaJuliano('fecha') - Value(DiaJuliano.desde(parametros.epoca))
+        peso = Exp(Least(dias * Value(math.log(2) / parametros.vida_media_dias), Value(700.0)))
+        return self.update(
+            puntaje_bayesiano=ExpressionWrapper(
+                (Value(parametros.peso * parametros.media) + F('rating_suma'))
+                / (Value(parametros.peso) + F('rating_cantidad')),
+                output_field=FloatField(),
+            ),
+            tendencia=Coalesce(
+                Subquery(resenas.annotate(valor=Sum(peso)).values('valor'), output_field=FloatField()),
+                0.0,
+            ),
+        )
+
+
 class Libro(models.Model):
     titulo = models.CharField(max_length=200, help_text="Título del libro")
     autor = models.ForeignKey(
         Autor,
         on_delete=models.CASCADE,
         related_name='libros',
+        # Los índices compuestos de Meta.indexes empiezan por autor y cubren el del FK
+        db_index=False,
         help_text="Autor del libro"
     )
     fecha_publicacion = models.DateField(help_text="Fecha de publicación del libro")
@@ -52,6 +231,55 @@ class Libro(models.Model):
         validators=[validar_resumen_minimo],
         help_text="Resumen del libro (mínimo 50 caracteres)"
     )
+    # Estadísticas de reseñas almacenadas. Se mantienen en la misma transacción
+    # que cada escritura de Resena (ver Resena.save/delete y ResenaQuerySet).
+    cantidad_resenas = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Cantidad total de reseñas del libro"
+    )
+    calificacion_suma = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Suma de las calificaciones de las reseñas"
+    )
+    rating_cantidad = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Cantidad de reseñas con rating"
+    )
+    rating_suma = models.FloatField(
+        default=0.0,
+        editable=False,
+        help_text="Suma de los ratings de las reseñas"
+    )
+    rating_promedio = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Rating promedio de las reseñas (null si no hay ratings)"
+    )
+    # Puntajes de los rankings, se actualizan junto con las estadísticas de
+    # reseñas (ver LibroQuerySet.actualizar_ranking y ParametrosRanking)
+    puntaje_bayesiano = models.FloatField(
+        default=0.0,
+        editable=False,
+        help_text="Rating promedio bayesiano (ponderado por la cantidad de ratings)"
+    )
+    tendencia = models.FloatField(
+        default=0.0,
+        editable=False,
+        help_text="Actividad de reseñas con decaimiento exponencial, relativa a la época del ranking"
+    )
+    
+    objects = LibroQuerySet.as_manager()
+
+    # Columnas que solo escriben los UPDATE de LibroQuerySet: save() no las
+    # incluye al actualizar un libro existente
+    CAMPOS_CALCULADOS = (
+        'cantidad_resenas', 'calificacion_suma', 'rating_cantidad', 'rating_suma', 'rating_promedio',
+        'puntaje_bayesiano', 'tendencia',
+    )
     
     @property
     def year(self):
@@ -62,9 +290,120 @@ class Libro(models.Model):
         verbose_name = "Libro"
         verbose_name_plural = "Libros"
         ordering = ['titulo']
+        # Ascendentes: para -fecha_publicacion con el desempate -pk SQLite
+        # recorre el índice al revés (el rowid va implícito al final)
+        indexes = [
+            models.Index(fields=['titulo'], name='libro_titulo_idx'),
+            models.Index(fields=['fecha_publicacion'], name='libro_fecha_idx'),
+            models.Index(fields=['autor', 'titulo'], name='libro_autor_titulo_idx'),
+            models.Index(fields=['autor', 'fecha_publicacion'], name='libro_autor_fecha_idx'),
+            models.Index(fields=['puntaje_bayesiano'], name='libro_puntaje_idx'),
+            models.Index(fields=['tendencia'], name='libro_tendencia_idx'),
+        ]
     
     def __str__(self):
         return f"{self.titulo} - {self.autor.nombre}"
+    
+    def save(self, *args, **kwargs):
+        """
+        Guarda el libro sin pisar las columnas calculadas.
+
+        Una instancia cargada antes de que se escribiera una reseña (el admin,
+        un PUT de la API, cualquier objeto en memoria) tiene valores viejos en
+        CAMPOS_CALCULADOS; al actualizar solo se escriben los demás campos.
+        """
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.CAMPOS_CALCULADOS
+            ]
+        super().save(*args, **kwargs)
+    
+    @property
+    def calificacion_promedio(self):
+        """Retorna el promedio de calificaciones a partir de las columnas almacenadas"""
+        if not self.cantidad_resenas:
+            return None
+        return self.calificacion_suma / self.cantidad_resenas
+
+
+class ResenaQuerySet(models.QuerySet):
+    """
+    QuerySet de Resena que mantiene las estadísticas de Libro en las
+    operaciones masivas (bulk_create, bulk_update, update y delete), que no
+    pasan por Resena.save() ni Resena.delete().
+    """
+
+    def _libro_ids(self):
+        return set(self.order_by().values_list('libro_id', flat=True).distinct())
+
+    def recientes_por_libro(self, libro_ids, cantidad=None):
+        """
+        Las N reseñas más recientes de cada libro de `libro_ids`, ordenadas por
+        libro y de la más reciente a la más antigua. Usa el mismo ROW_NUMBER()
+        que LibroQuerySet.con_resenas_recientes(), pero se puede leer con values().
+        """
+        if cantidad is None:
+            cantidad = settings.BIBLIOTECA_RESENAS_RECIENTES
+        # La ventana va en una subconsulta: Django no admite values() sobre
+        # un queryset filtrado por una ventana
+        recientes = Resena.objects.filter(libro_id__in=libro_ids).annotate(
+            posicion=Window(RowNumber(), partition_by=F('libro_id'), order_by=[F('fecha').desc(), F('pk').desc()])
+        ).filter(posicion__lte=cantidad).values('pk')
+        # Repetir libro_id__in permite recorrer resena_libro_fecha_idx en orden
+        # en vez de ordenar las filas elegidas
+        return self.filter(libro_id__in=libro_ids, pk__in=recientes).order_by('libro_id', '-fecha', '-pk')
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            creados = super().bulk_create(objs, *args, **kwargs)
+            registrar_cambio_resenas({obj.libro_id for obj in objs}, using=self.db)
+        return creados
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            libro_ids = {obj.libro_id for obj in objs}
+            if 'libro' in fields:
+                libro_ids |= Resena.objects.filter(pk__in=[obj.pk for obj in objs])._libro_ids()
+            filas = super().bulk_update(objs, fields, *args, **kwargs)
+            registrar_cambio_resenas(libro_ids, using=self.db)
+        return filas
+
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db):
+            libro_ids = self._libro_ids()
+            filas = super().update(**kwargs)
+            if 'libro' in kwargs or 'libro_id' in kwargs:
+                nuevo = kwargs.get('libro_id', kwargs.get('libro'))
+                libro_ids.add(getattr(nuevo, 'pk', nuevo))
+            registrar_cambio_resenas(libro_ids, using=self.db)
+        return filas
+
+    update.alters_data = True
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            libro_ids = self._libro_ids()
+            resultado = super().delete()
+            registrar_cambio_resenas(libro_ids, using=self.db)
+        return resultado
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+def registrar_cambio_resenas(libro_ids, using=None):
+    """
+    Recalcula las estadísticas almacenadas de los libros indicados y envía
+    la señal resenas_modificadas. Se llama dentro de la transacción de la
+    escritura de reseñas.
+    """
+    libro_ids = {pk for pk in libro_ids if pk is not None}
+    if libro_ids:
+        Libro.objects.using(using).filter(pk__in=libro_ids).recalcular_estadisticas()
+        resenas_modificadas.send(sender=Resena, libro_ids=libro_ids, using=using)
 
 
 class Resena(models.Model):
@@ -72,6 +411,8 @@ class Resena(models.Model):
         Libro,
         on_delete=models.CASCADE,
         related_name='resenas',
+        # resena_libro_fecha_idx empieza por libro y cubre el índice del FK
+        db_index=False,
         help_text="Libro al que pertenece la reseña"
     )
     texto = models.TextField(help_text="Texto de la reseña")
@@ -90,11 +431,241 @@ class Resena(models.Model):
         help_text="Fecha de la reseña"
     )
     
+    objects = ResenaQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Reseña"
         verbose_name_plural = "Reseñas"
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['fecha'], name='resena_fecha_idx'),
+            models.Index(fields=['libro', '-fecha', '-id'], name='resena_libro_fecha_idx'),
+            models.Index(fields=['rating'], name='resena_rating_idx'),
+        ]
     
     def __str__(self):
         return f"Reseña de {self.libro.titulo} - {self.calificacion}/5"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Recordar el libro original para recalcular ambos si la reseña cambia de libro
+        instancia._libro_id_original = instancia.__dict__.get('libro_id')
+        return instancia
+    
+    def save(self, *args, **kwargs):
+        """Guarda la reseña y actualiza las estadísticas del libro en la misma transacción"""
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            registrar_cambio_resenas(
+                {self.libro_id, getattr(self, '_libro_id_original', None)},
+                using=self._state.db
+            )
+        self._libro_id_original = self.libro_id
+    
+    def delete(self, *args, **kwargs):
+        """Elimina la reseña y actualiza las estadísticas del libro en la misma transacción"""
+        with transaction.atomic(using=kwargs.get('using')):
+            resultado = super().delete(*args, **kwargs)
+            registrar_cambio_resenas({self.libro_id}, using=self._state.db)
+        return resultado
+
+
+
+# ═══════════════════════════════════════════════════════════════
+# ESTADÍSTICAS DEL CATÁLOGO (tablas de resumen)
+# ═══════════════════════════════════════════════════════════════
+# Una fila por año, nacionalidad o mes con los totales del catálogo. Los
+# triggers de la migración 0008 las actualizan en cada INSERT, UPDATE y
+# DELETE de libros, autores y reseñas (también en las operaciones masivas y
+# las bajas en cascada), así /api/stats/ lee una fila por grupo en lugar de
+# agregar todas las filas. reconstruir_estadisticas_catalogo las recalcula.
+
+class EstadisticaAnio(models.Model):
+    anio = models.IntegerField(primary_key=True, help_text="Año de publicación")
+    cantidad_libros = models.PositiveIntegerField(default=0, help_text="Libros publicados ese año")
+
+    class Meta:
+        verbose_name = "Estadística por año"
+        verbose_name_plural = "Estadísticas por año"
+        ordering = ['anio']
+
+
+class EstadisticaNacionalidad(models.Model):
+    nacionalidad = models.CharField(max_length=50, primary_key=True, help_text="Nacionalidad de los autores")
+    cantidad_autores = models.PositiveIntegerField(default=0, help_text="Autores de esa nacionalidad")
+    cantidad_libros = models.PositiveIntegerField(default=0, help_text="Libros de autores de esa nacionalidad")
+
+    class Meta:
+        verbose_name = "Estadística por nacionalidad"
+        verbose_name_plural = "Estadísticas por nacionalidad"
+        ordering = ['nacionalidad']
+
+
+class EstadisticaMes(models.Model):
+    """
+    Reseñas por mes (UTC) y calificación: el volumen de un mes suma sus
+    cinco filas y la distribución de calificaciones suma las de cada mes.
+    """
+    mes = models.CharField(max_length=7, help_text="Mes de la reseña (AAAA-MM, UTC)")
+    calificacion = models.IntegerField(help_text="Calificación del 1 al 5")
+    cantidad_resenas = models.PositiveIntegerField(default=0, help_text="Reseñas con esa calificación en el mes")
+    rating_cantidad = models.PositiveIntegerField(default=0, help_text="Cuántas de ellas tienen rating")
+    rating_suma = models.FloatField(default=0.0, help_text="Suma de sus ratings")
+
+    class Meta:
+        verbose_name = "Estadística por mes"
+        verbose_name_plural = "Estadísticas por mes"
+        ordering = ['mes', 'calificacion']
+        constraints = [
+            # Los triggers insertan con ON CONFLICT (mes, calificacion)
+            models.UniqueConstraint(fields=['mes', 'calificacion'], name='estadistica_mes_unica'),
+        ]
+
+
+# ═══════════════════════════════════════════════════════════════
+# RANKINGS DE LIBROS
+# ═══════════════════════════════════════════════════════════════
+
+class ParametrosRanking(models.Model):
+    """
+    Fila única con los parámetros con que se calcularon Libro.puntaje_bayesiano
+    y Libro.tendencia. Cada escritura de reseñas puntúa sus libros con estos
+    valores; recalcular_ranking los actualiza (media del catálogo, época) y
+    vuelve a puntuar todos los libros para que sigan siendo comparables.
+    """
+    media = models.FloatField(help_text="Rating promedio del catálogo (valor a priori del puntaje bayesiano)")
+    peso = models.FloatField(help_text="Cantidad de ratings que vale la media a priori")
+    vida_media_dias = models.FloatField(help_text="Días en que una reseña pierde la mitad de su peso en la tendencia")
+    epoca = models.DateTimeField(help_text="Fecha de referencia de Libro.tendencia")
+
+    class Meta:
+        verbose_name = "Parámetros del ranking"
+        verbose_name_plural = "Parámetros del ranking"
+
+    @classmethod
+    def valores_iniciales(cls, using='default'):
+        """Media de los ratings guardados y los valores de BIBLIOTECA_RANKING"""
+        configuracion = settings.BIBLIOTECA_RANKING
+        totales = Libro.objects.using(using).aggregate(suma=Sum('rating_suma'), cantidad=Sum('rating_cantidad'))
+        return {
+            'media': totales['suma'] / totales['cantidad'] if totales['cantidad'] else configuracion['MEDIA_INICIAL'],
+            'peso': configuracion['PESO_PRIOR'],
+            'vida_media_dias': configuracion['VIDA_MEDIA_DIAS'],
+            'epoca': timezone.now(),
+        }
+
+    @classmethod
+    def actuales(cls, using=None):
+        """La fila de parámetros; si no existe se crea con valores_iniciales()"""
+        parametros = cls.objects.db_manager(using).filter(pk=1).first()
+        if parametros is None:
+            using = using or router.db_for_write(cls)
+            parametros, _ = cls.objects.using(using).get_or_create(
+                pk=1, defaults=cls.valores_iniciales(using=using)
+            )
+        return parametros
+
+    def factor_tendencia(self, ahora=None):
+        """Multiplicador que lleva Libro.tendencia (relativa a la época) al momento actual"""
+        dias = ((ahora or timezone.now()) - self.epoca).total_seconds() / 86400
+        return 2 ** (-dias / self.vida_media_dias)
+
+
+# ═══════════════════════════════════════════════════════════════
+# INGESTA DIFERIDA DE RESEÑAS
+# ═══════════════════════════════════════════════════════════════
+
+class ProgresoIngesta(models.Model):
+    """
+    Última entrada del spool de reseñas (ver ingesta.py) aplicada a esta base.
+    Se actualiza en la misma transacción que inserta cada lote: si el proceso
+    se cae entre el commit y el borrado de las entradas del spool, al
+    reprocesarlas se saltan las que ya se aplicaron.
+    """
+    spool = models.CharField(max_length=36, primary_key=True, help_text="Identificador del archivo de spool")
+    ultimo_id = models.BigIntegerField(default=0, help_text="Última entrada del spool aplicada")
+    fecha = models.DateTimeField(auto_now=True, help_text="Fecha del último lote aplicado")
+
+    class Meta:
+        verbose_name = "Progreso de ingesta"
+        verbose_name_plural = "Progreso de ingesta"
+
+
+# ═══════════════════════════════════════════════════════════════
+# ÍNDICES DE BÚSQUEDA (SQLite FTS5)
+# ═══════════════════════════════════════════════════════════════
+# Modelos no administrados que mapean las tablas virtuales FTS5 creadas en
+# la migración 0004. Django no crea ni modifica estas tablas: los triggers
+# de la base de datos las mantienen. Sirven para que la búsqueda se haga con
+# un JOIN (ver busqueda.py) en lugar de una subconsulta por fila.
+
+class CampoFTS(models.TextField):
+    """Columna oculta de una tabla FTS5 que tiene el mismo nombre que la tabla"""
+
+
+@CampoFTS.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class LibroBusqueda(models.Model):
+    libro = models.OneToOneField(
+        Libro,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='busqueda'
+    )
+    consulta = CampoFTS(db_column='biblioteca_libro_fts')
+    # bm25 con los pesos configurados en la tabla (menor = más relevante)
+    rank = models.FloatField(db_column='rank')
+
+    class Meta:
+        managed = False
+        db_table = 'biblioteca_libro_fts'
+
+
+class ResenaBusqueda(models.Model):
+    resena = models.OneToOneField(
+        Resena,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='busqueda'
+    )
+    consulta = CampoFTS(db_column='biblioteca_resena_fts')
+    rank = models.FloatField(db_column='rank')
+
+    class Meta:
+        managed = False
+        db_table = 'biblioteca_resena_fts'
+
+
+# ═══════════════════════════════════════════════════════════════
+# RÉPLICAS DE LECTURA
+# ═══════════════════════════════════════════════════════════════
+
+class LatidoReplica(models.Model):
+    """
+    Fila única con la hora en que se escribió en el primario. Se replica con
+    los demás datos: la fecha que tiene una réplica indica hasta cuándo están
+    sus datos y con eso se mide su retraso (ver replicas.py).
+    """
+    fecha = models.DateTimeField(help_text="Hora del último latido escrito en el primario")
+
+    class Meta:
+        verbose_name = "Latido de réplica"
+        verbose_name_plural = "Latidos de réplica"
 
+    @classmethod
+    def latir(cls, using='default'):
+        """Escribe el latido en la base `using` (el primario) y retorna la fecha"""
+        fecha = timezone.now()
+        cls.objects.using(using).update_or_create(pk=1, defaults={'fecha': fecha})
+        return fecha
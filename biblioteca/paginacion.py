@@ -0,0 +1,292 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import InvalidPage
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class PaginacionKeyset(BasePagination):
+    """
+    Paginación por cursor (keyset) para colecciones grandes.
+
+    ═══════════════════════════════════════════════════════════════
+    KEYSET PAGINATION - EXPLICACIÓN:
+    ═══════════════════════════════════════════════════════════════
+    En lugar de COUNT(*) + OFFSET, cada página se obtiene con una
+    condición sobre la clave de ordenamiento de la última fila vista:
+
+        WHERE (fecha, id) < (:fecha, :id) ORDER BY fecha DESC, id DESC
+
+    El costo de una página no depende de su profundidad. El cursor es
+    opaco (base64 de JSON) y contiene los valores de la clave de
+    ordenamiento más el id, que se agrega como desempate.
+
+    El ordenamiento se toma del queryset ya filtrado, así que respeta
+    ?ordering= (OrderingFilter) y el orden por relevancia de la búsqueda.
+    ═══════════════════════════════════════════════════════════════
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._paginar(list(self._consulta_pagina(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Versión async de paginate_queryset (ver api_async.py)"""
+        consulta = self._consulta_pagina(queryset, request, view)
+        return self._paginar([fila async for fila in consulta.aiterator(chunk_size=self.page_size + 1)])
+
+    def _consulta_pagina(self, queryset, request, view):
+        """Retorna el queryset de la página: ordenado por la clave, filtrado por el cursor y limitado"""
+        self.request = request
+        self.ordenamiento = self.get_ordenamiento(queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        self.reverso = bool(self.cursor and self.cursor['r'])
+        direcciones = [desc != self.reverso for _, desc in self.ordenamiento]
+        queryset = queryset.order_by(*[
+            self._expresion_orden(queryset.model, campo, desc)
+            for (campo, _), desc in zip(self.ordenamiento, direcciones)
+        ])
+        if self.cursor:
+            queryset = queryset.filter(self._condicion(queryset.model, self.cursor['v'], direcciones))
+        return queryset[:self.page_size + 1]
+
+    def _paginar(self, filas):
+        hay_mas = len(filas) > self.page_size
+        filas = filas[:self.page_size]
+
+        if self.reverso:
+            filas.reverse()
+            self.hay_anterior, self.hay_siguiente = hay_mas, True
+        else:
+            self.hay_anterior, self.hay_siguiente = self.cursor is not None, hay_mas
+        self.filas = filas
+        return filas
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.hay_siguiente or not self.filas:
+            return None
+        return self._link(self.filas[-1], reverso=False)
+
+    def get_previous_link(self):
+        if not self.hay_anterior or not self.filas:
+            return None
+        return self._link(self.filas[0], reverso=True)
+
+    def get_ordenamiento(self, queryset, view):
+        """
+        Retorna la clave de ordenamiento como lista de (campo, descendente).
+
+        Usa el order_by del queryset (ya aplicado por OrderingFilter o por la
+        búsqueda), o view.ordering / Meta.ordering si el queryset no tiene, y
+        agrega siempre el pk como desempate para que la clave sea única.
+        """
+        campos = [c for c in queryset.query.order_by if isinstance(c, str)]
+        if not campos:
+            campos = list(getattr(view, 'ordering', None) or queryset.model._meta.ordering or [])
+        ordenamiento = []
+        for campo in campos:
+            desc = campo.startswith('-')
+            nombre = campo.lstrip('-')
+            if nombre == 'id':
+                nombre = 'pk'
+            ordenamiento.append((nombre, desc))
+            if nombre == 'pk':
+                break
+        else:
+            desc = ordenamiento[0][1] if ordenamiento else False
+            ordenamiento.append(('pk', desc))
+        return ordenamiento
+
+    def decode_cursor(self, request):
+        valor = request.query_params.get(self.cursor_query_param)
+        if not valor:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(valor.encode('ascii')))
+            valido = (
+                cursor['o'] == self._firma()
+                and isinstance(cursor['v'], list)
+                and len(cursor['v']) == len(self.ordenamiento)
+            )
+        except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+            valido = False
+        if not valido:
+            raise NotFound('Cursor inválido.')
+        return cursor
+
+    def encode_cursor(self, valores, reverso):
+        datos = {'o': self._firma(), 'v': [self._a_json(v) for v in valores], 'r': reverso}
+        codificado = json.dumps(datos, separators=(',', ':')).encode('utf-8')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, base64.urlsafe_b64encode(codificado).decode('ascii'))
+
+    def _firma(self):
+        return [('-' if desc else '') + campo for campo, desc in self.ordenamiento]
+
+    def _link(self, fila, reverso):
+        valores = [self._valor(fila, campo) for campo, _ in self.ordenamiento]
+        return self.encode_cursor(valores, reverso)
+
+    @staticmethod
+    def _valor(fila, campo):
+        if isinstance(fila, dict):
+            # Filas de values() (lectura rápida, ver lectura_rapida.py)
+            return fila[campo]
+        valor = fila
+        for parte in campo.split('__'):
+            valor = getattr(valor, parte)
+        return valor
+
+    @staticmethod
+    def _a_json(valor):
+        # Se conserva la precisión completa (microsegundos) de las fechas
+        if isinstance(valor, (datetime.date, datetime.datetime, datetime.time)):
+            return valor.isoformat()
+        if isinstance(valor, decimal.Decimal):
+            return str(valor)
+        return valor
+
+    @staticmethod
+    def _es_nullable(modelo, campo):
+        try:
+            return modelo._meta.get_field(campo).null
+        except FieldDoesNotExist:
+            return False
+
+    def _expresion_orden(self, modelo, campo, desc):
+        # Los NULL se ubican siempre "antes" en sentido ascendente, igual que
+        # SQLite, para que la condición del cursor sea la misma en cualquier motor
+        if self._es_nullable(modelo, campo):
+            return F(campo).desc(nulls_last=True) if desc else F(campo).asc(nulls_first=True)
+        return F(campo).desc() if desc else F(campo).asc()
+
+    def _condicion(self, modelo, valores, direcciones):
+        """
+        Construye la condición "fila posterior al cursor" para una clave compuesta:
+
+            (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... (según la dirección de cada campo)
+        """
+        condicion = Q(pk__in=[])
+        iguales = Q()
+        for (campo, _), valor, desc in zip(self.ordenamiento, valores, direcciones):
+            nullable = self._es_nullable(modelo, campo)
+            if valor is None:
+                # En ascendente los NULL van primero, así que después vienen todos los
+                # no nulos; en descendente van al final y después de un NULL no hay nada más
+                posterior = Q(pk__in=[]) if desc else Q(**{f'{campo}__isnull': False})
+                igual = Q(**{f'{campo}__isnull': True})
+            else:
+                posterior = Q(**{f'{campo}__{"lt" if desc else "gt"}': valor})
+                if desc and nullable:
+                    posterior |= Q(**{f'{campo}__isnull': True})
+                igual = Q(**{campo: valor})
+            condicion |= iguales & posterior
+            iguales &= igual
+        return condicion
+
+
+class PaginacionNumerada(PageNumberPagination):
+    """
+    PageNumberPagination (?page=N) con una versión async de paginate_queryset.
+
+    Es la paginación por defecto (DEFAULT_PAGINATION_CLASS). En las vistas
+    async (api_async.py) el COUNT(*) se hace con acount() y la página se lee
+    con aiterator(); las respuestas son iguales a las de la versión sync.
+
+    El tamaño de página se puede pedir con ?page_size= (hasta max_page_size).
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count es un cached_property: se asigna el resultado de
+        # acount() para que Paginator no ejecute el COUNT(*) sincrónico
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+
+        self.page.object_list = [
+            objeto async for objeto in self.page.object_list.aiterator(chunk_size=page_size)
+        ]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+
+class PaginacionCatalogo(PaginacionNumerada):
+    """
+    Paginación de las colecciones de libros y reseñas.
+
+    Por defecto funciona como PageNumberPagination (?page=N, con count), que
+    es la que usa la interfaz Browsable API. Si la petición incluye el
+    parámetro ?cursor= (vacío para la primera página), se usa paginación
+    keyset (PaginacionKeyset), sin COUNT(*) ni OFFSET:
+
+        GET /api/reviews/?ordering=-fecha&cursor=
+        GET /api/reviews/?ordering=-fecha&cursor=eyJvIjpb...
+    """
+    keyset_class = PaginacionKeyset
+
+    def _get_keyset(self, request):
+        if self.keyset_class.cursor_query_param not in request.query_params:
+            return None
+        keyset = self.keyset_class()
+        keyset.page_size = self.get_page_size(request) or keyset.page_size
+        return keyset
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self._get_keyset(request)
+        if self.keyset is not None:
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.keyset = self._get_keyset(request)
+        if self.keyset is not None:
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+        return await super().apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
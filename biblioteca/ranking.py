@@ -0,0 +1,70 @@
+import datetime
+
+from django.db.models.functions import ExtractYear
+
+from .models import Libro, ParametrosRanking
+from .serializers import redondear_promedio
+
+
+# Columnas de cada libro en las respuestas de los rankings
+CAMPOS = {
+    'id': 'id',
+    'titulo': 'titulo',
+    'author_name': 'autor__nombre',
+    'nacionalidad': 'autor__nacionalidad',
+    'publication_year': 'publication_year',
+    'cantidad_resenas': 'cantidad_resenas',
+    'resenas_con_rating': 'rating_cantidad',
+    'rating_promedio': 'rating_promedio',
+}
+
+
+def _libros(orden, nacionalidad=None, decada=None):
+    """
+    Libros ordenados por la columna del ranking (índices libro_puntaje_idx y
+    libro_tendencia_idx, recorridos al revés) con los filtros opcionales:
+    nacionalidad del autor (contiene, como /api/authors/) y década de
+    publicación (1990 = 1990-1999).
+    """
+    libros = Libro.objects.order_by(f'-{orden}', '-pk')
+    if nacionalidad:
+        libros = libros.filter(autor__nacionalidad__icontains=nacionalidad)
+    if decada is not None:
+        libros = libros.filter(
+            fecha_publicacion__gte=datetime.date(decada, 1, 1),
+            fecha_publicacion__lt=datetime.date(decada + 10, 1, 1),
+        )
+    return libros.annotate(publication_year=ExtractYear('fecha_publicacion'))
+
+
+def _filas(libros, columna, limite, campo, valor):
+    """Primeros `limite` libros con su posición y el valor de la columna del ranking en `campo`"""
+    return [
+        {
+            'posicion': posicion,
+            **{nombre: fila[origen] for nombre, origen in CAMPOS.items()},
+            'rating_promedio': redondear_promedio(fila['rating_promedio']),
+            campo: valor(fila[columna]),
+        }
+        for posicion, fila in enumerate(libros.values(*CAMPOS.values(), columna)[:limite], start=1)
+    ]
+
+
+def mejor_valorados(limite, nacionalidad=None, decada=None):
+    """
+    Libros con rating ordenados por puntaje bayesiano: el promedio de sus
+    ratings acercado a la media del catálogo cuando tienen pocos.
+    """
+    libros = _libros('puntaje_bayesiano', nacionalidad, decada).filter(rating_cantidad__gt=0)
+    return _filas(libros, 'puntaje_bayesiano', limite, 'puntaje', lambda puntaje: round(puntaje, 3))
+
+
+def en_tendencia(limite, nacionalidad=None, decada=None):
+    """
+    Libros con reseñas ordenados por tendencia. El valor de la respuesta es
+    la tendencia a la fecha actual: a cuántas reseñas de hoy equivale su
+    actividad reciente.
+    """
+    factor = ParametrosRanking.actuales().factor_tendencia()
+    libros = _libros('tendencia', nacionalidad, decada).filter(tendencia__gt=0)
+    return _filas(libros, 'tendencia', limite, 'tendencia', lambda tendencia: round(tendencia * factor, 3))
@@ -0,0 +1,298 @@
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+logger = logging.getLogger('biblioteca.replicas')
+
+# Métodos que no escriben: solo estas peticiones leen de una réplica
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+
+# Estado de la petición en curso (ver EstadoLectura). Como en instrumentacion.py
+# es una variable de contexto para que también la vean las consultas que el
+# ORM async ejecuta en otro hilo.
+_estado_actual = ContextVar('biblioteca_replicas', default=None)
+
+# {alias: (momento de la medición, fecha de los datos de la réplica o None)}
+# Se mide como mucho una vez cada VERIFICACION segundos por proceso, siempre
+# desde ReplicaLecturaMiddleware (ver medir_replicas): el router solo lee
+# estos valores y nunca consulta la base.
+_mediciones = {}
+# Alias que se estaban usando en la última medición, para registrar solo los
+# cambios (una réplica que nunca se sincronizó no genera advertencias)
+_en_uso = set()
+
+
+def config():
+    return settings.BIBLIOTECA_REPLICAS
+
+
+# ═══════════════════════════════════════════════════════════════
+# RETRASO DE LAS RÉPLICAS
+# ═══════════════════════════════════════════════════════════════
+
+def _medir(alias):
+    from .models import LatidoReplica
+
+    try:
+        fecha = LatidoReplica.objects.using(alias).filter(pk=1).values_list('fecha', flat=True).first()
+    except DatabaseError:
+        # Archivo inexistente, tablas sin migrar o réplica caída
+        fecha = None
+    _mediciones[alias] = (time.monotonic(), fecha.timestamp() if fecha is not None else None)
+
+
+def mediciones_vencidas():
+    """Alias cuya última medición tiene VERIFICACION segundos o más (o que nunca se midieron)"""
+    ahora = time.monotonic()
+    vencidas = []
+    for alias in config()['ALIAS']:
+        medido = _mediciones.get(alias, (None, None))[0]
+        if medido is None or ahora - medido >= config()['VERIFICACION']:
+            vencidas.append(alias)
+    return vencidas
+
+
+def medir_replicas():
+    """
+    Vuelve a leer el latido de las réplicas con la medición vencida. Hace
+    consultas síncronas: las vistas async lo llaman con sync_to_async.
+    """
+    for alias in mediciones_vencidas():
+        _medir(alias)
+
+
+def datos_de_replica(alias, forzar=False):
+    """
+    Retorna hasta cuándo están los datos de la réplica (timestamp del último
+    LatidoReplica que recibió) según la última medición, o None si no se pudo
+    leer, no tiene latido o todavía no se midió. Con `forzar` la mide ahora.
+    """
+    if forzar:
+        _medir(alias)
+    return _mediciones.get(alias, (None, None))[1]
+
+
+def retraso(alias, forzar=False):
+    """Segundos de atraso de la réplica respecto del reloj actual (None si no se pudo medir)"""
+    datos = datos_de_replica(alias, forzar=forzar)
+    return None if datos is None else max(time.time() - datos, 0.0)
+
+
+def replicas_disponibles(desde=None):
+    """
+    Alias de las réplicas que se pueden leer: su retraso no supera
+    RETRASO_MAXIMO y, si se indica `desde` (timestamp de la última escritura
+    del cliente), ya recibieron los datos escritos en ese momento.
+    """
+    maximo = config()['RETRASO_MAXIMO']
+    disponibles = []
+    for alias in config()['ALIAS']:
+        atraso = retraso(alias)
+        usable = atraso is not None and atraso <= maximo
+        if usable != (alias in _en_uso):
+            _registrar_cambio(alias, usable, atraso)
+        if usable and (desde is None or datos_de_replica(alias) >= desde):
+            disponibles.append(alias)
+    return disponibles
+
+
+def _registrar_cambio(alias, usable, atraso):
+    if usable:
+        _en_uso.add(alias)
+        logger.info('Réplica %s en uso (retraso %.1f s)', alias, atraso)
+    else:
+        _en_uso.discard(alias)
+        motivo = 'sin latido o no disponible' if atraso is None else f'retraso {atraso:.1f} s'
+        logger.warning('Réplica %s excluida: %s', alias, motivo)
+
+
+# ═══════════════════════════════════════════════════════════════
+# ESTADO POR PETICIÓN Y ROUTER
+# ═══════════════════════════════════════════════════════════════
+
+class EstadoLectura:
+    """
+    Decide de qué base lee una petición.
+
+    La réplica se elige en la primera lectura (una respuesta cacheada no
+    mide ni elige nada) y se mantiene durante toda la petición, para que
+    todas sus consultas vean los mismos datos. Después de una escritura las
+    lecturas vuelven al primario.
+    """
+
+    def __init__(self, usar_replica, escritura_cliente=None):
+        self.usar_replica = usar_replica
+        self.escritura_cliente = escritura_cliente
+        self.escribio = False
+        self.alias = None
+        # Hasta cuándo están los datos de la réplica elegida (timestamp)
+        self.datos = None
+        self._elegida = False
+
+    def replica(self):
+        """Alias de la réplica de la petición o None si se debe leer del primario"""
+        if not self.usar_replica:
+            return None
+        if not self._elegida:
+            self._elegida = True
+            disponibles = replicas_disponibles(desde=self.escritura_cliente)
+            if disponibles:
+                self.alias = random.choice(disponibles)
+                self.datos = datos_de_replica(self.alias)
+        return self.alias
+
+    def registrar_escritura(self):
+        self.escribio = True
+        self.usar_replica = False
+
+
+def datos_leidos_hasta():
+    """
+    Si la petición en curso leyó de una réplica, retorna hasta cuándo están
+    sus datos (timestamp); None si leyó del primario o fuera de una petición.
+    """
+    estado = _estado_actual.get()
+    return estado.datos if estado is not None else None
+
+
+class ReplicaRouter:
+    """
+    Router de bases de datos: las lecturas de las apps de APPS van a una
+    réplica durante las peticiones que ReplicaLecturaMiddleware marca como
+    de solo lectura; todo lo demás usa el primario ('default').
+
+    - Escrituras: siempre el primario. Una escritura en la petición hace que
+      sus lecturas siguientes también vayan al primario.
+    - Dentro de una transacción (transaction.atomic) se lee del primario.
+    - Fuera de una petición (comandos, shell) no se usa ninguna réplica.
+    - No consulta la base: el retraso de las réplicas lo mide el middleware
+      antes de la vista. Las vistas async resuelven el router en el hilo del
+      event loop, donde una consulta síncrona lanza SynchronousOnlyOperation.
+    - Las réplicas no se migran: reciben el esquema con los datos.
+    """
+
+    def _gestiona(self, model):
+        return model._meta.app_label in config()['APPS']
+
+    def db_for_read(self, model, **hints):
+        estado = _estado_actual.get()
+        if estado is None or not self._gestiona(model):
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return estado.replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        estado = _estado_actual.get()
+        if estado is not None and self._gestiona(model):
+            estado.registrar_escritura()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bases = {DEFAULT_DB_ALIAS, *config()['ALIAS']}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in config()['ALIAS']:
+            return False
+        return None
+
+
+# ═══════════════════════════════════════════════════════════════
+# MIDDLEWARE
+# ═══════════════════════════════════════════════════════════════
+
+class ReplicaLecturaMiddleware:
+    """
+    Envía a una réplica las lecturas de las peticiones GET/HEAD/OPTIONS (API,
+    vistas async y HTML) y mantiene la lectura de las propias escrituras.
+
+    ═══════════════════════════════════════════════════════════════
+    RÉPLICAS DE LECTURA - EXPLICACIÓN:
+    ═══════════════════════════════════════════════════════════════
+    Cada réplica tiene una copia de LatidoReplica, la fila que se escribe
+    en el primario al sincronizar (comando sincronizar_replica). La fecha
+    de esa fila en la réplica dice hasta cuándo están sus datos: si el
+    retraso supera RETRASO_MAXIMO, o no se puede leer, la réplica se deja
+    de usar y las lecturas van al primario hasta que se ponga al día.
+
+    Lectura de las propias escrituras:
+    - En la misma petición: después de escribir se lee del primario.
+    - Entre peticiones: la respuesta a una petición que escribió lleva la
+      cookie COOKIE con la hora de la escritura. Las peticiones siguientes
+      del mismo cliente solo usan una réplica que ya tenga datos de esa hora
+      o posteriores. La cookie dura RETRASO_MAXIMO segundos: pasado ese
+      tiempo toda réplica en uso ya tiene la escritura.
+
+    El latido se vuelve a leer antes de la vista, como mucho una vez cada
+    VERIFICACION segundos y solo en peticiones de lectura; en las vistas
+    async con sync_to_async, fuera del event loop.
+
+    Las respuestas que leyeron de una réplica llevan el encabezado
+    X-Replica: <alias>; retraso=<segundos>.
+    ═══════════════════════════════════════════════════════════════
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._activo():
+            return self.get_response(request)
+        estado, token = self._iniciar(request)
+        if estado.usar_replica:
+            medir_replicas()
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado_actual.reset(token)
+        return self._finalizar(estado, response)
+
+    async def __acall__(self, request):
+        if not self._activo():
+            return await self.get_response(request)
+        estado, token = self._iniciar(request)
+        if estado.usar_replica and mediciones_vencidas():
+            await sync_to_async(medir_replicas)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _estado_actual.reset(token)
+        return self._finalizar(estado, response)
+
+    def _activo(self):
+        return config()['ACTIVO'] and bool(config()['ALIAS'])
+
+    def _iniciar(self, request):
+        try:
+            escritura = float(request.COOKIES.get(config()['COOKIE'], ''))
+        except ValueError:
+            escritura = None
+        estado = EstadoLectura(request.method in METODOS_SEGUROS, escritura_cliente=escritura)
+        return estado, _estado_actual.set(estado)
+
+    def _finalizar(self, estado, response):
+        if estado.escribio:
+            response.set_cookie(
+                config()['COOKIE'], f'{time.time():.3f}', max_age=config()['RETRASO_MAXIMO'],
+                httponly=True, samesite='Lax',
+            )
+        elif estado.alias is not None:
+            atraso = max(time.time() - estado.datos, 0.0)
+            response['X-Replica'] = f'{estado.alias}; retraso={atraso:.2f}'
+        return response
@@ -1,19 +1,64 @@
+from django.conf import settings
 from rest_framework import serializers
-from django.db import models
-from .models import Autor, Libro, Resena
+from .campos_dinamicos import CamposDinamicosMixin
+from .lectura_rapida import AnidadoRapido, FilasRapidas
+from .models import ESTADISTICAS_AUTOR, Autor, Libro, Resena
 
 
-class AutorSerializer(serializers.ModelSerializer):
-    """Serializador para el modelo Autor"""
-    cantidad_libros = serializers.IntegerField(read_only=True, source='libros.count')
+def redondear_promedio(promedio):
+    """Promedio redondeado a 2 decimales, o None si no hay ratings"""
+    return round(promedio, 2) if promedio else None
+
+
+class AutorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """
+    Serializador para el modelo Autor
+    
+    Las estadísticas se leen de las anotaciones de
+    Autor.objects.con_estadisticas() (una sola consulta agregada para toda
+    la página). preparar_queryset() solo anota las estadísticas de los
+    campos seleccionados (?fields=, ver campos_dinamicos.py). Si la
+    instancia no viene anotada (create o update) se calculan con una consulta.
+    """
+    cantidad_libros = serializers.IntegerField(read_only=True)
+    cantidad_resenas = serializers.IntegerField(read_only=True)
+    rating_promedio = serializers.SerializerMethodField()
+    primer_anio = serializers.IntegerField(read_only=True)
+    ultimo_anio = serializers.IntegerField(read_only=True)
+    # Lectura rápida (lectura_rapida.py): rating_promedio desde values()
+    valores_rapidos = {'rating_promedio': ('rating_promedio', redondear_promedio)}
     
     class Meta:
         model = Autor
-        fields = ['id', 'nombre', 'nacionalidad', 'cantidad_libros']
+        fields = [
+            'id', 'nombre', 'nacionalidad', 'cantidad_libros', 'cantidad_resenas',
+            'rating_promedio', 'primer_anio', 'ultimo_anio'
+        ]
+    
+    @classmethod
+    def preparar_queryset(cls, queryset, seleccion, columnas_extra=()):
+        queryset = super().preparar_queryset(queryset, seleccion, columnas_extra)
+        estadisticas = [campo for campo in ESTADISTICAS_AUTOR if campo in seleccion]
+        return queryset.con_estadisticas(*estadisticas) if estadisticas else queryset
+    
+    def to_representation(self, instance):
+        faltantes = [
+            campo for campo in ESTADISTICAS_AUTOR
+            if campo in self.fields and not hasattr(instance, campo)
+        ]
+        if faltantes:
+            estadisticas = Autor.objects.con_estadisticas(*faltantes).values(*faltantes).get(pk=instance.pk)
+            for campo, valor in estadisticas.items():
+                setattr(instance, campo, valor)
+        return super().to_representation(instance)
+    
+    def get_rating_promedio(self, obj):
+        return redondear_promedio(obj.rating_promedio)
 
 
-class ResenaSerializer(serializers.ModelSerializer):
-    """Serializador para el modelo Resena"""
+class ResenaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """Serializador para el modelo Resena (?expand=libro anida el libro)"""
+    expandibles = {'libro': lambda: LibroSerializer}
     
     class Meta:
         model = Resena
@@ -21,7 +66,74 @@ class ResenaSerializer(serializers.ModelSerializer):
         read_only_fields = ['fecha']
 
 
-class LibroSerializer(serializers.ModelSerializer):
+def rating_por_defecto(validated_data):
+    """Retorna el rating a guardar: si no se proporciona, se usa calificacion como base"""
+    rating = validated_data.get('rating')
+    if not rating:
+        return float(validated_data.get('calificacion', 0))
+    return rating
+
+
+class LibroEnLoteField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que resuelve el libro con los libros precargados
+    en context['libros'] en lugar de hacer una consulta por reseña.
+    """
+    
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        libro = self.context['libros'].get(pk)
+        if libro is None:
+            self.fail('does_not_exist', pk_value=data)
+        return libro
+
+
+class ResenaLoteSerializer(ResenaSerializer):
+    """
+    Serializador para validar lotes de reseñas (/api/reviews/bulk/).
+    
+    Aplica las mismas validaciones que ResenaSerializer (validar_calificacion
+    y el rango de rating), pero los libros se cargan una sola vez para todo
+    el lote con validar_lote().
+    """
+    libro = LibroEnLoteField(queryset=Libro.objects.all())
+    
+    @classmethod
+    def validar_lote(cls, items):
+        """
+        Valida una lista de reseñas.
+        
+        Returns:
+            Tupla (validas, errores): validas es una lista de (indice, validated_data)
+            y errores una lista de {'indice': i, 'errores': {...}}
+        """
+        libro_ids = set()
+        for item in items:
+            if isinstance(item, dict):
+                try:
+                    libro_ids.add(int(item.get('libro')))
+                except (TypeError, ValueError):
+                    pass
+        libros = Libro.objects.only('id').in_bulk(libro_ids)
+        
+        # Una sola instancia del serializador valida todos los elementos,
+        # igual que hace ListSerializer internamente
+        serializer = cls(context={'libros': libros})
+        validas, errores = [], []
+        for indice, item in enumerate(items):
+            try:
+                validas.append((indice, serializer.run_validation(item)))
+            except serializers.ValidationError as exc:
+                errores.append({'indice': indice, 'errores': exc.detail})
+        return validas, errores
+
+
+class LibroSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializador para el modelo Libro con campos computados
     
@@ -33,12 +145,30 @@ class LibroSerializer(serializers.ModelSerializer):
     métodos que siguen el patrón get_<nombre_campo>.
     
     En este caso:
-    - recent_reviews: Usa SerializerMethodField para obtener las 5
+    - recent_reviews: Usa SerializerMethodField para obtener las N
       reseñas más recientes del libro mediante el método get_recent_reviews()
-    - rating_promedio: Calcula el promedio de ratings usando el método
-      get_rating_promedio() que agrega los ratings de todas las reseñas
+      (N = BIBLIOTECA_RESENAS_RECIENTES en settings.py)
+    - rating_promedio: Retorna el promedio de ratings usando el método
+      get_rating_promedio(), que lee la columna almacenada en Libro
     ═══════════════════════════════════════════════════════════════
+    
+    Admite ?fields=, ?omit= y ?expand=autor (ver campos_dinamicos.py):
+    las reseñas recientes solo se precargan si se pide recent_reviews y el
+    JOIN con el autor solo se hace si se pide author_name.
     """
+    anidados = {'recent_reviews': lambda: ResenaSerializer}
+    expandibles = {'autor': lambda: AutorSerializer}
+    dependencias = {'author_name': ['autor__nombre'], 'year': ['fecha_publicacion']}
+    # Lectura rápida (lectura_rapida.py): campos calculados desde values()
+    valores_rapidos = {'rating_promedio': ('rating_promedio', redondear_promedio)}
+    anidados_rapidos = {
+        'recent_reviews': lambda seleccion: AnidadoRapido(
+            FilasRapidas(ResenaSerializer, seleccion),
+            consulta=Resena.objects.recientes_por_libro,
+            clave_padre='libro',
+        ),
+    }
+    
     author_name = serializers.ReadOnlyField(source='autor.nombre')
     year = serializers.ReadOnlyField(source='fecha_publicacion.year')
     # SerializerMethodField: Campo computado que se calcula dinámicamente
@@ -54,30 +184,48 @@ class LibroSerializer(serializers.ModelSerializer):
             'recent_reviews', 'rating_promedio'
         ]
     
+    @classmethod
+    def preparar_queryset(cls, queryset, seleccion, columnas_extra=()):
+        queryset = super().preparar_queryset(queryset, seleccion, columnas_extra)
+        if 'recent_reviews' in seleccion:
+            # libro y fecha los usa la consulta con ventana de la precarga
+            resenas = ResenaSerializer.preparar_queryset(
+                Resena.objects.all(), seleccion['recent_reviews'], ('libro', 'fecha')
+            )
+            queryset = queryset.con_resenas_recientes(queryset=resenas)
+        return queryset
+    
     def get_recent_reviews(self, obj):
         """
         Método para SerializerMethodField 'recent_reviews'
         
         Este método se ejecuta automáticamente cuando se serializa un Libro.
-        Retorna las 5 reseñas más recientes del libro, serializadas con
+        Retorna las N reseñas más recientes del libro, serializadas con
         ResenaSerializer.
         
+        Si el queryset se construyó con Libro.objects.con_resenas_recientes(),
+        las reseñas ya vienen precargadas para toda la página en una sola
+        consulta y aquí no se ejecuta ninguna consulta adicional.
+        
         Args:
             obj: Instancia del modelo Libro que se está serializando
         
         Returns:
             Lista de diccionarios con los datos de las reseñas
         """
-        reviews = obj.resenas.all().order_by('-fecha')[:5]
-        return ResenaSerializer(reviews, many=True).data
+        reviews = getattr(obj, 'resenas_recientes', None)
+        if reviews is None:
+            cantidad = settings.BIBLIOTECA_RESENAS_RECIENTES
+            reviews = obj.resenas.all().order_by('-fecha', '-pk')[:cantidad]
+        return ResenaSerializer(reviews, many=True, seleccion=self.subseleccion('recent_reviews')).data
     
     def get_rating_promedio(self, obj):
         """
         Método para SerializerMethodField 'rating_promedio'
         
-        Calcula el rating promedio del libro basado en el campo rating
-        de todas sus reseñas. Usa agregación de Django (Avg) para calcular
-        el promedio de manera eficiente.
+        Retorna el rating promedio almacenado en el libro. La columna se
+        mantiene actualizada en cada escritura de Resena, por lo que leerla
+        no ejecuta consultas adicionales.
         
         Args:
             obj: Instancia del modelo Libro que se está serializando
@@ -85,17 +233,12 @@ class LibroSerializer(serializers.ModelSerializer):
         Returns:
             Float con el promedio redondeado a 2 decimales, o None si no hay reseñas
         """
-        reviews = obj.resenas.exclude(rating__isnull=True)
-        if reviews.exists():
-            promedio = reviews.aggregate(
-                avg_rating=models.Avg('rating')
-            )['avg_rating']
-            return round(promedio, 2) if promedio else None
-        return None
+        return redondear_promedio(obj.rating_promedio)
 
 
 class LibroDetailSerializer(LibroSerializer):
     """Serializador detallado para Libro con autor anidado"""
+    anidados = {**LibroSerializer.anidados, 'autor': lambda: AutorSerializer}
     autor = AutorSerializer(read_only=True)
     
     class Meta(LibroSerializer.Meta):
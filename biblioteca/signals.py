@@ -0,0 +1,9 @@
+from django.dispatch import Signal
+
+
+# Se envía después de cualquier cambio en reseñas (save, delete y las operaciones
+# masivas de ResenaQuerySet), una vez recalculadas las estadísticas de los libros.
+# Argumentos: libro_ids (set con los libros afectados) y using (alias de la base).
+# Las operaciones masivas no envían post_save/post_delete, así que los módulos
+# que dependen de las reseñas deben escuchar esta señal.
+resenas_modificadas = Signal()
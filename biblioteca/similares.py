@@ -0,0 +1,556 @@
+import contextlib
+import functools
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import unicodedata
+import uuid
+import zlib
+from array import array
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.functions import ExtractYear
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Libro
+from .ranking import CAMPOS
+from .serializers import redondear_promedio
+
+try:
+    import numpy as np
+except ImportError:  # Dependencia opcional: sin numpy no hay libros similares
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # Sin fcntl (Windows) solo se excluyen los hilos del proceso
+    fcntl = None
+
+
+logger = logging.getLogger('biblioteca.similares')
+
+
+def config():
+    return settings.BIBLIOTECA_SIMILARES
+
+
+class IndiceNoDisponible(Exception):
+    """No se pueden calcular libros similares (falta numpy o el índice)"""
+
+
+# ═══════════════════════════════════════════════════════════════
+# VECTORIZACIÓN
+# ═══════════════════════════════════════════════════════════════
+# Cada libro es un vector TF-IDF sobre las palabras de su título (repetidas
+# PESO_TITULO veces) y su resumen. Las palabras se pasan a minúsculas y sin
+# tildes, como en el índice FTS5. En lugar de un vocabulario, cada palabra va
+# a la columna crc32(palabra) % DIMENSION (hashing de términos): un libro
+# nuevo nunca agrega columnas y el índice se puede actualizar por partes.
+
+PALABRA = re.compile(r'[^\W\d_]{3,}')
+DIACRITICOS = re.compile(r'[\u0300-\u036f]')
+
+# Palabras vacías del español (sin tildes) de 3 letras o más
+VACIAS = frozenset('''
+    una uno unos unas los las del por para con sin sobre entre desde hasta hacia
+    que como cuando donde quien cual cuyo pero sino aunque porque pues mas
+    este esta esto estos estas ese esa eso esos esas aquel aquella aquello
+    sus nos les mis tus ella ellos ellas usted ustedes nosotros vosotros
+    ser es son fue fueron era eran sido esta estan estaba hay han ha habia
+    muy mucho mucha muchos muchas poco tan tanto todo toda todos todas otro otra
+    otros otras mismo misma cada ante bajo tras durante mediante segun
+    tambien solo ademas despues antes ahora siempre nunca asi aqui alli
+'''.split())
+
+
+def palabras(texto):
+    """Palabras de `texto` en minúsculas, sin tildes ni palabras vacías"""
+    texto = DIACRITICOS.sub('', unicodedata.normalize('NFKD', texto.lower()))
+    return [palabra for palabra in PALABRA.findall(texto) if palabra not in VACIAS]
+
+
+@functools.lru_cache(maxsize=2 ** 16)
+def columna(palabra, dimension):
+    # crc32 y no hash(): tiene que dar lo mismo en todos los procesos
+    return zlib.crc32(palabra.encode('utf-8')) % dimension
+
+
+def frecuencias(titulo, resumen, dimension, peso_titulo):
+    """{columna: frecuencia} de las palabras de un libro"""
+    conteo = {}
+    for palabra in palabras(titulo) * peso_titulo + palabras(resumen):
+        indice = columna(palabra, dimension)
+        conteo[indice] = conteo.get(indice, 0) + 1
+    return conteo
+
+
+def _matriz(documentos, dimension, peso_titulo):
+    """
+    Frecuencias de los documentos [(id, titulo, resumen)] en formato COO:
+    (ids, filas, columnas, frecuencias). Los arreglos se llenan con `array`
+    para no crear una lista de objetos por término.
+    """
+    ids, filas, columnas, conteos = array('q'), array('i'), array('i'), array('f')
+    for fila, (pk, titulo, resumen) in enumerate(documentos):
+        ids.append(pk)
+        conteo = frecuencias(titulo, resumen, dimension, peso_titulo)
+        filas.extend([fila] * len(conteo))
+        columnas.extend(conteo.keys())
+        conteos.extend(conteo.values())
+    return (
+        np.frombuffer(ids, dtype=np.int64), np.frombuffer(filas, dtype=np.int32),
+        np.frombuffer(columnas, dtype=np.int32), np.frombuffer(conteos, dtype=np.float32),
+    )
+
+
+def _idf(columnas, cantidad, dimension, max_df):
+    """
+    IDF suavizado (como scikit-learn) de cada columna. Las columnas que están
+    en más de MAX_DF de los libros valen 0: no distinguen a ningún libro.
+    """
+    df = np.bincount(columnas, minlength=dimension)
+    idf = (np.log((1 + cantidad) / (1 + df)) + 1).astype(np.float32)
+    idf[df > max(max_df * cantidad, 1)] = 0
+    return idf
+
+
+def _ponderar(filas, columnas, conteos, idf, cantidad):
+    """
+    Pesos TF-IDF (tf sublineal: 1 + log tf) normalizados por fila (L2): el
+    producto punto de dos filas es su similitud coseno. Retorna (filas,
+    columnas, pesos) sin los términos de peso 0.
+    """
+    pesos = (1 + np.log(conteos)) * idf[columnas]
+    normas = np.sqrt(np.bincount(filas, weights=np.square(pesos, dtype=np.float64), minlength=cantidad))
+    pesos = np.divide(pesos, normas[filas], out=np.zeros_like(pesos), where=normas[filas] > 0)
+    conservar = pesos > 0
+    return filas[conservar], columnas[conservar], pesos[conservar].astype(np.float32)
+
+
+def _por_termino(ids, filas, columnas, pesos, borrados=()):
+    """
+    Arreglos de un segmento: la matriz ordenada por columna (como CSC, pero
+    solo con las columnas presentes) para leer la lista de libros de cada
+    término de la consulta como un rango contiguo.
+    """
+    orden = np.lexsort((filas, columnas))
+    columnas = columnas[orden]
+    terminos, inicio = np.unique(columnas, return_index=True)
+    return {
+        'ids': np.asarray(ids, dtype=np.int64),
+        'terminos': terminos.astype(np.int32),
+        'inicio': np.append(inicio, len(columnas)).astype(np.int64),
+        'filas': filas[orden].astype(np.int32),
+        'pesos': pesos[orden].astype(np.float32),
+        'borrados': np.unique(np.fromiter(borrados, dtype=np.int64, count=len(borrados))),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+# SEGMENTOS EN DISCO
+# ═══════════════════════════════════════════════════════════════
+
+class Segmento:
+    """
+    Parte del índice: un directorio con un .npy por arreglo, abiertos con
+    mmap. Las páginas se cargan a medida que las consultas las leen y todos
+    los procesos que abren el mismo archivo comparten el cache de páginas
+    del sistema operativo.
+
+    - ids: id del libro de cada fila
+    - terminos, inicio: columnas presentes y dónde empiezan sus filas
+    - filas, pesos: por término, las filas que lo tienen y su peso
+    - borrados: libros eliminados (ocultan sus filas de segmentos anteriores)
+    """
+
+    ARREGLOS = ('ids', 'terminos', 'inicio', 'filas', 'pesos', 'borrados')
+
+    def __init__(self, ruta):
+        self.nombre = ruta.name
+        for nombre in self.ARREGLOS:
+            archivo = ruta / f'{nombre}.npy'
+            # Un arreglo vacío no se puede abrir con mmap
+            vacio = os.path.getsize(archivo) <= 128
+            setattr(self, nombre, np.load(archivo, mmap_mode=None if vacio else 'r'))
+
+    def puntajes(self, columnas, pesos):
+        """
+        Producto punto de cada fila con la consulta (columnas, pesos): se
+        juntan las listas de filas de los términos de la consulta (rangos
+        contiguos, se copian sin índices) y se suman por fila con bincount.
+        Solo se leen las listas de esos términos.
+        """
+        if not len(self.terminos):
+            return np.zeros(len(self.ids))
+        posiciones = np.minimum(np.searchsorted(self.terminos, columnas), len(self.terminos) - 1)
+        presentes = self.terminos[posiciones] == columnas
+        posiciones, pesos = posiciones[presentes], pesos[presentes]
+        rangos = list(zip(self.inicio[posiciones].tolist(), self.inicio[posiciones + 1].tolist(), pesos.tolist()))
+        if not rangos:
+            return np.zeros(len(self.ids))
+        # Un recorrido por término de la consulta (a lo sumo TERMINOS_CONSULTA), no por libro
+        filas = np.concatenate([self.filas[desde:hasta] for desde, hasta, _ in rangos])
+        productos = np.concatenate([self.pesos[desde:hasta] * peso for desde, hasta, peso in rangos])
+        return np.bincount(filas, weights=productos, minlength=len(self.ids))
+
+    def coo(self, conservar=None):
+        """(ids, filas, columnas, pesos) de las filas `conservar` (máscara), renumeradas"""
+        columnas = np.repeat(self.terminos, np.diff(self.inicio))
+        filas, pesos, ids = np.asarray(self.filas), np.asarray(self.pesos), np.asarray(self.ids)
+        if conservar is None:
+            return ids, filas, columnas, pesos
+        en_filas = conservar[filas]
+        nuevas = np.cumsum(conservar) - 1
+        return ids[conservar], nuevas[filas[en_filas]].astype(np.int32), columnas[en_filas], pesos[en_filas]
+
+
+class Estado:
+    """
+    Segmentos del manifiesto cargado, con las filas de cada uno que
+    reemplazó o eliminó un segmento posterior (`ocultas`).
+    """
+
+    def __init__(self, manifiesto, segmentos, idf):
+        self.manifiesto = manifiesto
+        self.segmentos = segmentos
+        self.idf = idf
+        self.ocultas = []
+        vistos = np.empty(0, dtype=np.int64)
+        for posicion in range(len(segmentos) - 1, -1, -1):
+            segmento = segmentos[posicion]
+            self.ocultas.insert(0, np.flatnonzero(np.isin(segmento.ids, vistos)))
+            # La base no oculta nada: no hace falta juntar sus ids
+            if posicion:
+                vistos = np.union1d(vistos, np.concatenate([segmento.ids, segmento.borrados]))
+
+    @property
+    def dimension(self):
+        return self.manifiesto['dimension']
+
+    @property
+    def peso_titulo(self):
+        return self.manifiesto['peso_titulo']
+
+    def vector(self, titulo, resumen, terminos=None):
+        """Vector (columnas, pesos) de un libro con el IDF del índice y sus `terminos` de mayor peso"""
+        conteo = frecuencias(titulo, resumen, self.dimension, self.peso_titulo)
+        columnas = np.fromiter(conteo.keys(), dtype=np.int32, count=len(conteo))
+        conteos = np.fromiter(conteo.values(), dtype=np.float32, count=len(conteo))
+        _, columnas, pesos = _ponderar(np.zeros(len(columnas), dtype=np.int32), columnas, conteos, self.idf, 1)
+        if terminos and len(columnas) > terminos:
+            mayores = np.argpartition(-pesos, terminos - 1)[:terminos]
+            columnas, pesos = columnas[mayores], pesos[mayores]
+        orden = np.argsort(columnas)
+        return columnas[orden], pesos[orden]
+
+    def buscar(self, columnas, pesos, cantidad, excluir=None):
+        """
+        Los `cantidad` libros de mayor similitud con el vector como
+        [(id, similitud)], sin `excluir`. En cada segmento se eligen los
+        mejores con argpartition (sin ordenar todas las filas); se pide uno
+        más porque el libro consultado suele ser el primero.
+        """
+        ids, puntajes = [], []
+        for segmento, ocultas in zip(self.segmentos, self.ocultas):
+            similitud = segmento.puntajes(columnas, pesos)
+            similitud[ocultas] = 0
+            mejores = min(cantidad + 1, len(similitud))
+            if mejores:
+                candidatas = np.argpartition(similitud, len(similitud) - mejores)[-mejores:]
+                candidatas = candidatas[similitud[candidatas] > 0]
+            else:
+                candidatas = np.empty(0, dtype=np.int64)
+            ids.append(np.asarray(segmento.ids)[candidatas])
+            puntajes.append(similitud[candidatas])
+        ids, puntajes = np.concatenate(ids), np.concatenate(puntajes)
+        if excluir is not None:
+            ids, puntajes = ids[ids != excluir], puntajes[ids != excluir]
+        orden = np.lexsort((ids, -puntajes))[:cantidad]
+        return list(zip(ids[orden].tolist(), puntajes[orden].tolist()))
+
+
+class IndiceSimilares:
+    """
+    Índice de libros similares en un directorio:
+
+    - manifiesto.json: parámetros del índice y sus segmentos (uno base y los
+      incrementales en orden). Se reemplaza de forma atómica (os.replace).
+    - base-*/: todos los libros al reconstruir; guarda también el IDF.
+    - delta-*/: los libros creados, editados o eliminados después. Sus
+      vectores usan el IDF de la base. Cuando hay más de SEGMENTOS_MAXIMOS
+      se fusionan en uno.
+
+    Cada proceso mantiene el manifiesto cargado y lo vuelve a leer cuando
+    cambia (os.stat en cada consulta). Las escrituras se serializan con un
+    lock de archivo, así que varios procesos pueden escribir.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = Path(directorio)
+        self._lock = threading.RLock()
+        self._firma = None
+        self._estado = None
+        self._segmentos = {}
+
+    @property
+    def ruta_manifiesto(self):
+        return self.directorio / 'manifiesto.json'
+
+    def existe(self):
+        return self.ruta_manifiesto.exists()
+
+    # ─── Lectura ────────────────────────────────────────────────
+
+    def estado(self):
+        """El Estado del manifiesto actual, o None si el índice no existe"""
+        try:
+            info = os.stat(self.ruta_manifiesto)
+        except FileNotFoundError:
+            return None
+        firma = (info.st_ino, info.st_mtime_ns, info.st_size)
+        if firma == self._firma:
+            return self._estado
+        with self._lock:
+            if firma != self._firma:
+                self._estado = self._cargar()
+                self._firma = firma
+            return self._estado
+
+    def _cargar(self):
+        for intento in range(3):
+            manifiesto = self._leer_manifiesto()
+            try:
+                segmentos = {
+                    nombre: self._segmentos.get(nombre) or Segmento(self.directorio / nombre)
+                    for nombre in manifiesto['segmentos']
+                }
+                idf = np.load(self.directorio / manifiesto['segmentos'][0] / 'idf.npy', mmap_mode='r')
+                break
+            except FileNotFoundError:
+                # Otro proceso reemplazó el manifiesto y eliminó sus segmentos
+                if intento == 2:
+                    raise
+        self._segmentos = segmentos
+        return Estado(manifiesto, list(segmentos.values()), idf)
+
+    def _leer_manifiesto(self):
+        with open(self.ruta_manifiesto, encoding='utf-8') as archivo:
+            return json.load(archivo)
+
+    # ─── Escritura ──────────────────────────────────────────────
+
+    @contextlib.contextmanager
+    def _bloqueo(self):
+        """Excluye a los demás escritores, de este y de otros procesos"""
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.directorio / '.lock', 'a') as archivo:
+            if fcntl is not None:
+                fcntl.flock(archivo, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(archivo, fcntl.LOCK_UN)
+
+    def _preparar(self, prefijo, arreglos):
+        """Escribe los arreglos en un directorio temporal; retorna (nombre, ruta temporal)"""
+        nombre = f'{prefijo}-{uuid.uuid4().hex[:12]}'
+        temporal = self.directorio / f'.{nombre}'
+        temporal.mkdir(parents=True)
+        for clave, valor in arreglos.items():
+            np.save(temporal / f'{clave}.npy', valor)
+        return nombre, temporal
+
+    def _publicar(self, manifiesto, nuevos=()):
+        """
+        Mueve los segmentos `nuevos` (nombre, ruta temporal) a su lugar,
+        reemplaza el manifiesto y elimina los segmentos que ya no usa.
+        Se llama con el lock tomado.
+        """
+        for nombre, temporal in nuevos:
+            os.replace(temporal, self.directorio / nombre)
+        temporal = self.directorio / '.manifiesto.json'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(manifiesto, archivo)
+        os.replace(temporal, self.ruta_manifiesto)
+        for ruta in self.directorio.iterdir():
+            if ruta.is_dir() and not ruta.name.startswith('.') and ruta.name not in manifiesto['segmentos']:
+                shutil.rmtree(ruta, ignore_errors=True)
+
+    def reconstruir(self, documentos):
+        """
+        Construye la base con todos los documentos [(id, titulo, resumen)] y
+        retorna la cantidad de libros. Los segmentos incrementales escritos
+        mientras tanto se conservan; los anteriores quedan incluidos.
+        """
+        dimension = config()['DIMENSION']
+        peso_titulo = config()['PESO_TITULO']
+        anteriores = set(self._leer_manifiesto()['segmentos']) if self.existe() else set()
+
+        ids, filas, columnas, conteos = _matriz(documentos, dimension, peso_titulo)
+        idf = _idf(columnas, len(ids), dimension, config()['MAX_DF'])
+        filas, columnas, pesos = _ponderar(filas, columnas, conteos, idf, len(ids))
+        arreglos = _por_termino(ids, filas, columnas, pesos)
+        arreglos['idf'] = idf
+
+        with self._bloqueo():
+            nombre, temporal = self._preparar('base', arreglos)
+            actual = self._leer_manifiesto()['segmentos'] if self.existe() else []
+            self._publicar({
+                'dimension': dimension,
+                'peso_titulo': peso_titulo,
+                'libros': len(ids),
+                'segmentos': [nombre] + [segmento for segmento in actual if segmento not in anteriores],
+            }, nuevos=[(nombre, temporal)])
+        return len(ids)
+
+    def actualizar(self, documentos, borrados):
+        """
+        Agrega un segmento con los documentos [(id, titulo, resumen)]
+        creados o editados y los ids `borrados`. No hace nada si el índice
+        no existe (hay que construirlo con reconstruir_indice_similares).
+        """
+        with self._bloqueo():
+            estado = self.estado()
+            if estado is None:
+                return False
+            ids, filas, columnas, conteos = _matriz(documentos, estado.dimension, estado.peso_titulo)
+            filas, columnas, pesos = _ponderar(filas, columnas, conteos, estado.idf, len(ids))
+            nuevo = self._preparar('delta', _por_termino(ids, filas, columnas, pesos, borrados))
+            segmentos = estado.manifiesto['segmentos'] + [nuevo[0]]
+            nuevos = [nuevo]
+            if len(segmentos) - 1 > config()['SEGMENTOS_MAXIMOS']:
+                incrementales = estado.segmentos[1:] + [Segmento(nuevo[1])]
+                fusionado = self._preparar('delta', self._fusionar(incrementales))
+                segmentos, nuevos = [segmentos[0], fusionado[0]], [fusionado]
+                shutil.rmtree(nuevo[1], ignore_errors=True)
+            self._publicar({**estado.manifiesto, 'segmentos': segmentos}, nuevos=nuevos)
+            return True
+
+    def _fusionar(self, segmentos):
+        """Un segmento equivalente a `segmentos` (incrementales, en orden)"""
+        partes = []
+        borrados = [segmento.borrados for segmento in segmentos]
+        vistos = np.empty(0, dtype=np.int64)
+        for segmento in reversed(segmentos):
+            conservar = ~np.isin(segmento.ids, vistos)
+            partes.insert(0, segmento.coo(conservar))
+            vistos = np.union1d(vistos, np.concatenate([segmento.ids, segmento.borrados]))
+        desplazamientos = np.cumsum([0] + [len(ids) for ids, *_ in partes])
+        ids, filas, columnas, pesos = (
+            np.concatenate([parte[0] for parte in partes]),
+            np.concatenate([parte[1] + desplazamiento for parte, desplazamiento in zip(partes, desplazamientos)]),
+            np.concatenate([parte[2] for parte in partes]),
+            np.concatenate([parte[3] for parte in partes]),
+        )
+        return _por_termino(ids, filas.astype(np.int32), columnas, pesos, np.concatenate(borrados))
+
+
+_indices = {}
+_indices_lock = threading.Lock()
+
+
+def get_indice():
+    """El IndiceSimilares del directorio configurado (uno por proceso)"""
+    directorio = str(config()['DIRECTORIO'])
+    with _indices_lock:
+        if directorio not in _indices:
+            _indices[directorio] = IndiceSimilares(directorio)
+        return _indices[directorio]
+
+
+def disponible():
+    return np is not None and config()['ACTIVO']
+
+
+# ═══════════════════════════════════════════════════════════════
+# CONSULTA
+# ═══════════════════════════════════════════════════════════════
+
+def similares(libro, limite):
+    """
+    Los `limite` libros más parecidos a `libro` por el texto de su título y
+    resumen, ordenados por similitud coseno. El vector del libro se calcula
+    de su texto actual, así que también sirve para libros que el índice
+    todavía no tiene. Se piden al índice el doble de candidatos: los que ya
+    no existen (eliminados y aún no registrados en el índice) se descartan
+    al leer las filas, en una sola consulta.
+    """
+    if not disponible():
+        raise IndiceNoDisponible('Los libros similares no están disponibles (requieren numpy)')
+    estado = get_indice().estado()
+    if estado is None:
+        raise IndiceNoDisponible(
+            'El índice de libros similares no existe: ejecute python manage.py reconstruir_indice_similares'
+        )
+    columnas, pesos = estado.vector(libro.titulo, libro.resumen, config()['TERMINOS_CONSULTA'])
+    candidatos = estado.buscar(columnas, pesos, 2 * limite, excluir=libro.pk)
+
+    filas = {
+        fila['id']: fila
+        for fila in Libro.objects.filter(pk__in=[pk for pk, _ in candidatos])
+        .annotate(publication_year=ExtractYear('fecha_publicacion'))
+        .values(*CAMPOS.values())
+    }
+    resultado = []
+    for pk, similitud in candidatos:
+        fila = filas.get(pk)
+        if fila is None:
+            continue
+        resultado.append({
+            'posicion': len(resultado) + 1,
+            **{nombre: fila[origen] for nombre, origen in CAMPOS.items()},
+            'rating_promedio': redondear_promedio(fila['rating_promedio']),
+            'similitud': round(similitud, 4),
+        })
+        if len(resultado) == limite:
+            break
+    return resultado
+
+
+# ═══════════════════════════════════════════════════════════════
+# ACTUALIZACIÓN INCREMENTAL
+# ═══════════════════════════════════════════════════════════════
+# Los libros guardados o eliminados se acumulan por conexión y se aplican al
+# confirmar la transacción: un autor eliminado con sus 50 libros escribe un
+# solo segmento. Cada callback de on_commit aplica todos los pendientes (el
+# primero los aplica y los demás no encuentran ninguno). Si la transacción
+# se revierte, sus libros se aplican con la próxima: se vuelven a leer de la
+# base, así que el resultado es el mismo. Las operaciones masivas
+# (bulk_create, update) no envían señales: después de ellas hay que
+# reconstruir el índice.
+
+def actualizar_libros(pks, using):
+    """Lee el texto actual de los libros `pks` y los actualiza en el índice (los que no existen se eliminan)"""
+    documentos = list(Libro.objects.using(using).filter(pk__in=pks).values_list('id', 'titulo', 'resumen'))
+    borrados = set(pks) - {pk for pk, _, _ in documentos}
+    return get_indice().actualizar(documentos, borrados)
+
+
+def _aplicar_pendientes(using):
+    conexion = connections[using]
+    pendientes, conexion.libros_similares = getattr(conexion, 'libros_similares', set()), set()
+    if not pendientes:
+        return
+    try:
+        actualizar_libros(pendientes, using)
+    except Exception:
+        # El cambio ya está confirmado; el índice se corrige al reconstruirlo
+        logger.exception('Similares: error al actualizar %d libros en el índice', len(pendientes))
+
+
+@receiver([post_save, post_delete], sender=Libro, dispatch_uid='similares_libro')
+def registrar_libro(sender, instance, using, **kwargs):
+    if not disponible() or not get_indice().existe():
+        return
+    conexion = connections[using]
+    if not hasattr(conexion, 'libros_similares'):
+        conexion.libros_similares = set()
+    conexion.libros_similares.add(instance.pk)
+    transaction.on_commit(lambda: _aplicar_pendientes(using), using=using)
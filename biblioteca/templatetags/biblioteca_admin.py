@@ -0,0 +1,60 @@
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.utils import formats
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+
+register = template.Library()
+
+
+@register.inclusion_tag('admin/date_hierarchy.html')
+def jerarquia_fechas(cl):
+    """
+    date_hierarchy del admin que toma los años (y los meses de un año) de
+    ModelAdmin.periodos_jerarquia.
+
+    ═══ EXPLICACIÓN ═══
+    En el primer nivel Django calcula MIN y MAX de la fecha y luego los años
+    distintos de todo el queryset: dos recorridos de la tabla completa, con
+    una función de truncado por fila que no usa el índice. Si el changelist
+    no tiene otros filtros ni búsqueda, los años con filas ya están en las
+    tablas de resumen. Con filtros, o en los niveles que periodos_jerarquia
+    no resuelve, se usa la implementación de Django.
+    """
+    campo = cl.date_hierarchy
+    anio = cl.params.get(f'{campo}__year')
+    mes = cl.params.get(f'{campo}__month')
+    otros = [nombre for nombre in cl.get_filters_params() if not nombre.startswith(f'{campo}__')]
+    periodos = None
+    if not (otros or cl.query or mes):
+        try:
+            periodos = cl.model_admin.periodos_jerarquia(int(anio) if anio else None)
+        except ValueError:
+            periodos = None
+    if periodos is None:
+        return date_hierarchy(cl)
+
+    def link(filtros):
+        return cl.get_query_string(filtros, [f'{campo}__'])
+
+    if anio:
+        return {
+            'show': True,
+            'back': {'link': link({}), 'title': _('All dates')},
+            'choices': [
+                {
+                    'link': link({f'{campo}__year': anio, f'{campo}__month': fecha.month}),
+                    'title': capfirst(formats.date_format(fecha, 'YEAR_MONTH_FORMAT')),
+                }
+                for fecha in periodos
+            ],
+        }
+    return {
+        'show': True,
+        'back': None,
+        'choices': [
+            {'link': link({f'{campo}__year': str(fecha.year)}), 'title': str(fecha.year)}
+            for fecha in periodos
+        ],
+    }
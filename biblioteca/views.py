@@ -1,21 +1,90 @@
-from django.shortcuts import render
-from .models import Autor, Libro, Resena
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.shortcuts import get_object_or_404, render
+from django.utils.functional import cached_property
 
+from .cache_html import cache_pagina, contexto_fragmentos, versionar_autores, versionar_libros
+from .models import Autor, Libro
 
+
+class PaginadorConTotal(Paginator):
+    """
+    Paginator con el total de objetos ya conocido (p. ej. la columna
+    almacenada Libro.cantidad_resenas): no ejecuta SELECT COUNT(*).
+    """
+
+    def __init__(self, object_list, per_page, total, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.total = total
+
+    @cached_property
+    def count(self):
+        return self.total
+
+
+def tamano_pagina(pagina):
+    """Objetos por página de las vistas HTML (ver BIBLIOTECA_PAGINAS_HTML)"""
+    return settings.BIBLIOTECA_PAGINAS_HTML[pagina]
+
+
+@cache_pagina('autor', 'libro', 'resena')
 def lista_libros(request):
-    """Vista para mostrar la lista de todos los libros"""
-    libros = Libro.objects.select_related('autor').prefetch_related('resenas').all()
-    return render(request, 'biblioteca/lista_libros.html', {'libros': libros})
+    """
+    Vista para mostrar la lista paginada de libros, opcionalmente de un
+    autor (?autor=<id>).
 
+    Dos consultas por página: el COUNT del Paginator y la página con su
+    autor (JOIN). La cantidad de reseñas es la columna almacenada
+    cantidad_resenas, no un COUNT por libro. Cada tarjeta se cachea como
+    fragmento con la versión del libro y la de su autor (ver cache_html.py).
+    """
+    libros = Libro.objects.select_related('autor').only(
+        'titulo', 'fecha_publicacion', 'cantidad_resenas', 'autor__nombre',
+    ).order_by('titulo', 'pk')
+    autor_id = request.GET.get('autor', '')
+    if autor_id.isdigit():
+        libros = libros.filter(autor_id=autor_id)
+    pagina = Paginator(libros, tamano_pagina('LIBROS')).get_page(request.GET.get('page'))
+    libros = versionar_libros(list(pagina.object_list))
+    return render(request, 'biblioteca/lista_libros.html', {
+        'libros': libros, 'pagina': pagina, 'filtrado': autor_id.isdigit(),
+        **contexto_fragmentos(['autor', 'libro', 'resena']),
+    })
 
+
+@cache_pagina('autor', 'libro', 'resena')
 def detalle_libro(request, libro_id):
-    """Vista para mostrar el detalle de un libro y sus reseñas"""
-    libro = Libro.objects.select_related('autor').prefetch_related('resenas').get(pk=libro_id)
-    return render(request, 'biblioteca/detalle_libro.html', {'libro': libro})
+    """
+    Vista para mostrar el detalle de un libro y sus reseñas paginadas
+    (?page=), de la más reciente a la más antigua.
+
+    Dos consultas: el libro con su autor y la página de reseñas
+    (resena_libro_fecha_idx). El total para paginar es cantidad_resenas.
+    """
+    libro = get_object_or_404(Libro.objects.select_related('autor'), pk=libro_id)
+    resenas = libro.resenas.order_by('-fecha', '-pk')
+    pagina = PaginadorConTotal(
+        resenas, tamano_pagina('RESENAS'), total=libro.cantidad_resenas,
+    ).get_page(request.GET.get('page'))
+    return render(request, 'biblioteca/detalle_libro.html', {
+        'libro': libro, 'resenas': pagina.object_list, 'pagina': pagina,
+    })
 
 
+@cache_pagina('autor', 'libro')
 def lista_autores(request):
-    """Vista para mostrar la lista de todos los autores"""
-    autores = Autor.objects.prefetch_related('libros').all()
-    return render(request, 'biblioteca/lista_autores.html', {'autores': autores})
+    """
+    Vista para mostrar la lista paginada de autores con su cantidad de libros.
 
+    Dos consultas por página: el COUNT del Paginator y la página, con
+    cantidad_libros como subconsulta por fila (solo para los autores de la
+    página). Los títulos de cada autor están en la lista de libros filtrada
+    (?autor=<id>), paginada como cualquier otra. Cada tarjeta se cachea
+    como fragmento con la versión del autor y su cantidad de libros.
+    """
+    autores = Autor.objects.con_estadisticas('cantidad_libros', por_fila=True).order_by('nombre', 'pk')
+    pagina = Paginator(autores, tamano_pagina('AUTORES')).get_page(request.GET.get('page'))
+    autores = versionar_autores(list(pagina.object_list))
+    return render(request, 'biblioteca/lista_autores.html', {
+        'autores': autores, 'pagina': pagina, **contexto_fragmentos(['autor', 'libro']),
+    })
@@ -1,18 +1,90 @@
+import datetime
+import re
+
+from django.conf import settings
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from .models import Autor, Libro, Resena
+from . import estadisticas, ingesta, ranking, similares
+from .busqueda import FTS5SearchFilter
+from .cache_api import CacheRespuestaMixin
+from .campos_dinamicos import CamposDinamicosViewSetMixin
+from .lectura_rapida import LecturaRapidaMixin
+from .limites import ThrottleCosto
+from .models import ESTADISTICAS_AUTOR, Autor, Libro, Resena
+from .paginacion import PaginacionCatalogo
 from .serializers import (
     AutorSerializer,
     LibroSerializer,
     LibroDetailSerializer,
-    ResenaSerializer
+    ResenaLoteSerializer,
+    ResenaSerializer,
+    rating_por_defecto
 )
 
 
-class AutorViewSet(viewsets.ModelViewSet):
+class OrdenamientoIndexadoFilter(OrderingFilter):
+    """
+    OrderingFilter que ordena por una columna indexada en lugar de un campo
+    calculado con el mismo orden (view.ordering_equivalentes).
+
+    Ejemplo: ?ordering=-publication_year ordena por -fecha_publicacion. Los
+    libros quedan igualmente ordenados por año (dentro de un año, por fecha)
+    y SQLite recorre libro_fecha_idx en vez de calcular ExtractYear de todas
+    las filas y ordenarlas.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        equivalentes = getattr(view, 'ordering_equivalentes', {})
+        if not ordering or not equivalentes:
+            return ordering
+        ordenamiento = []
+        for campo in ordering:
+            nombre = campo.lstrip('-')
+            signo = '-' if campo.startswith('-') else ''
+            ordenamiento.append(signo + equivalentes.get(nombre, nombre))
+        return ordenamiento
+
+
+MES = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
+
+def _parametro(request, nombre, convertir, descripcion):
+    """Valor del parámetro de consulta `nombre` pasado por `convertir`, o None si no está"""
+    valor = request.query_params.get(nombre)
+    if valor in (None, ''):
+        return None
+    try:
+        return convertir(valor)
+    except ValueError:
+        raise ValidationError({'error': f'El parámetro {nombre} debe ser {descripcion}'})
+
+
+def _mes(valor):
+    if not MES.match(valor):
+        raise ValueError(valor)
+    return valor
+
+
+def _decada(valor):
+    decada = int(valor)
+    if decada % 10 or not datetime.MINYEAR <= decada <= datetime.MAXYEAR - 10:
+        raise ValueError(valor)
+    return decada
+
+
+def _limite(valor, maximo=None):
+    limite = int(valor)
+    if not 1 <= limite <= (maximo or settings.BIBLIOTECA_RANKING['LIMITE_MAXIMO']):
+        raise ValueError(valor)
+    return limite
+
+
+class AutorViewSet(CamposDinamicosViewSetMixin, CacheRespuestaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar autores.
     
@@ -22,23 +94,80 @@ class AutorViewSet(viewsets.ModelViewSet):
     update: Actualiza un autor completo
     partial_update: Actualiza parcialmente un autor
     destroy: Elimina un autor
+    
+    list y retrieve admiten ?fields= y ?omit= (ver campos_dinamicos.py):
+    solo se calculan las estadísticas que se muestran, se filtran o se
+    usan para ordenar. Ejemplo: /api/authors/?fields=id,nombre no agrupa.
     """
-    queryset = Autor.objects.all()
+    queryset = Autor.objects.con_estadisticas()
     serializer_class = AutorSerializer
     filter_backends = [SearchFilter, OrderingFilter]
     search_fields = ['nombre', 'nacionalidad']
-    ordering_fields = ['nombre', 'nacionalidad']
+    ordering_fields = [
+        'nombre', 'nacionalidad', 'cantidad_libros', 'cantidad_resenas',
+        'rating_promedio', 'primer_anio', 'ultimo_anio'
+    ]  # Ordenar: ?ordering=-cantidad_libros
     ordering = ['nombre']
+    throttle_classes = [ThrottleCosto]  # Ver limites.py
+    # Filtros por rango sobre las estadísticas: ?<campo>_min= y ?<campo>_max=
+    # Ejemplo: /api/authors/?cantidad_libros_min=3&rating_promedio_min=4.5
+    filtros_rango = {
+        'cantidad_libros': int,
+        'cantidad_resenas': int,
+        'rating_promedio': float,
+        'primer_anio': int,
+        'ultimo_anio': int,
+    }
+    # Cache de list/retrieve (ver cache_api.py); las estadísticas dependen
+    # de Libro y de Resena
+    cache_respuestas = True
+    cache_modelos = ('autor', 'libro', 'resena')
     
     def get_queryset(self):
         """Sobrescribe get_queryset para agregar lógica condicional"""
-        queryset = Autor.objects.prefetch_related('libros').all()
+        # Las estadísticas se calculan con una sola consulta agregada
+        # (ver AutorQuerySet.con_estadisticas), sin cargar los libros.
+        # En list y retrieve aquí solo se anotan las que usan los filtros por
+        # rango y el ordenamiento (y en list sin agrupar, las que se muestran);
+        # las demás que se muestran las agrega AutorSerializer.preparar_queryset
+        # según ?fields=
+        queryset = Autor.objects.all()
+        estadisticas = ESTADISTICAS_AUTOR
+        if self.usa_campos_dinamicos():
+            parametros = self.request.query_params
+            ordenamiento = {
+                campo.strip().lstrip('-') for campo in parametros.get('ordering', '').split(',')
+            }
+            estadisticas = [
+                campo for campo in self.filtros_rango
+                if campo in ordenamiento
+                or parametros.get(f'{campo}_min') or parametros.get(f'{campo}_max')
+            ]
+        if estadisticas:
+            queryset = queryset.con_estadisticas(*estadisticas)
+        elif self.action == 'list' and not self.request.query_params.get(SearchFilter.search_param):
+            # Sin agrupar, la página se lee en orden de autor_nombre_idx y las
+            # estadísticas que se muestran se calculan solo para sus filas.
+            # La búsqueda (LIKE) ya recorre todos los autores: ahí se agrupa
+            mostradas = [campo for campo in ESTADISTICAS_AUTOR if campo in self.get_seleccion()]
+            if mostradas:
+                queryset = queryset.con_estadisticas(*mostradas, por_fila=True)
         
         # Filtrar por nacionalidad si se proporciona
         nacionalidad = self.request.query_params.get('nacionalidad', None)
         if nacionalidad:
             queryset = queryset.filter(nacionalidad__icontains=nacionalidad)
         
+        # Filtros por rango (se aplican en HAVING sobre las anotaciones)
+        for campo, tipo in self.filtros_rango.items():
+            for sufijo, lookup in (('min', 'gte'), ('max', 'lte')):
+                valor = self.request.query_params.get(f'{campo}_{sufijo}', None)
+                if valor:
+                    try:
+                        queryset = queryset.filter(**{f'{campo}__{lookup}': tipo(valor)})
+                    except ValueError:
+                        pass
+        
         return queryset
     
     def perform_create(self, serializer):
@@ -49,12 +178,45 @@ class AutorViewSet(viewsets.ModelViewSet):
     def libros(self, request, pk=None):
         """Ruta personalizada: /api/authors/{id}/libros/"""
         autor = self.get_object()
-        libros = autor.libros.all()
+        libros = autor.libros.select_related('autor').con_resenas_recientes()
         serializer = LibroSerializer(libros, many=True)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        """
+        Ruta personalizada: /api/authors/{id}/stats/
+        
+        Retorna las estadísticas del autor calculadas con la misma consulta
+        agregada que el listado (AutorQuerySet.con_estadisticas).
+        
+        Respuesta:
+        {
+            "autor_id": 1,
+            "nombre": "Gabriel García Márquez",
+            "cantidad_libros": 2,
+            "cantidad_resenas": 3,
+            "resenas_con_rating": 3,
+            "rating_promedio": 4.63,
+            "primer_anio": 1967,
+            "ultimo_anio": 1985
+        }
+        """
+        autor = self.get_object()
+        promedio = autor.rating_promedio
+        return Response({
+            'autor_id': autor.id,
+            'nombre': autor.nombre,
+            'cantidad_libros': autor.cantidad_libros,
+            'cantidad_resenas': autor.cantidad_resenas,
+            'resenas_con_rating': autor.resenas_con_rating,
+            'rating_promedio': round(promedio, 2) if promedio else None,
+            'primer_anio': autor.primer_anio,
+            'ultimo_anio': autor.ultimo_anio,
+        })
 
 
-class LibroViewSet(viewsets.ModelViewSet):
+class LibroViewSet(CamposDinamicosViewSetMixin, CacheRespuestaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar libros.
     
@@ -67,8 +229,10 @@ class LibroViewSet(viewsets.ModelViewSet):
          Ejemplo: /api/books/?autor=2
        - También se pueden crear filtros personalizados en get_queryset()
     
-    2. SearchFilter: Permite búsqueda en múltiples campos
-       - search_fields: Define en qué campos buscar
+    2. FTS5SearchFilter: Búsqueda de texto completo (ver busqueda.py)
+       - Usa el índice SQLite FTS5 sobre título, resumen y nombre del autor,
+         ignora tildes y ordena por relevancia (bm25) si no hay ?ordering=
+       - search_fields: Campos usados como respaldo con LIKE en otros motores
        Ejemplo: /api/books/?search=García
     
     3. OrderingFilter: Permite ordenar los resultados
@@ -92,20 +256,46 @@ class LibroViewSet(viewsets.ModelViewSet):
     - next: URL de la siguiente página
     - previous: URL de la página anterior
     - results: Lista de elementos de la página actual
+    
+    Para recorrer colecciones grandes se puede usar paginación por cursor
+    (keyset) agregando ?cursor= (ver paginacion.py). No calcula count y el
+    costo de cada página no crece con la profundidad:
+    - Ejemplo: /api/books/?ordering=-fecha_publicacion&cursor=
+    ═══════════════════════════════════════════════════════════════
+    
+    ═══════════════════════════════════════════════════════════════
+    SPARSE FIELDSETS - EXPLICACIÓN:
+    ═══════════════════════════════════════════════════════════════
+    list y retrieve admiten ?fields=, ?omit= y ?expand= (ver
+    campos_dinamicos.py). Los campos que no se piden no se leen de la
+    base de datos: la consulta usa only(), el JOIN con el autor y la
+    precarga de recent_reviews solo se hacen si se piden esos campos.
+    - Ejemplo: /api/books/?fields=id,titulo,author_name
+    - Ejemplo: /api/books/?omit=recent_reviews,resumen&expand=autor
     ═══════════════════════════════════════════════════════════════
     """
-    queryset = Libro.objects.select_related('autor').prefetch_related('resenas').all()
+    queryset = Libro.objects.select_related('autor').con_resenas_recientes()
     # DjangoFilterBackend: Filtros con django-filter (filterset_fields)
-    # SearchFilter: Búsqueda en múltiples campos (search_fields)
     # OrderingFilter: Ordenamiento dinámico (ordering_fields)
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # FTS5SearchFilter: Búsqueda de texto completo; va al final para poder
+    # ordenar por relevancia cuando no se pide un ordenamiento explícito
+    filter_backends = [DjangoFilterBackend, OrdenamientoIndexadoFilter, FTS5SearchFilter]
     filterset_fields = ['autor']  # Filtro directo: ?autor=2
     search_fields = ['titulo', 'resumen', 'autor__nombre']  # Búsqueda: ?search=García
     # Nota: 'publication_year' se anota en get_queryset() usando ExtractYear para poder ordenar por año
     # Para ordenar por año: ?ordering=-publication_year (descendente) o ?ordering=publication_year (ascendente)
     # También se puede usar: ?ordering=-fecha_publicacion (ordenar por fecha completa)
     ordering_fields = ['titulo', 'fecha_publicacion', 'publication_year']  # Ordenar: ?ordering=-publication_year
+    # El año se ordena por la fecha (índice libro_fecha_idx, ver OrdenamientoIndexadoFilter)
+    ordering_equivalentes = {'publication_year': 'fecha_publicacion'}
     ordering = ['-fecha_publicacion']  # Orden por defecto
+    pagination_class = PaginacionCatalogo  # ?page=N o ?cursor= (keyset)
+    # Cubetas de fichas por cliente: la búsqueda y las páginas profundas cuestan más (limites.py)
+    throttle_classes = [ThrottleCosto]
+    # Cache de list/retrieve: author_name, recent_reviews y rating_promedio
+    # dependen de Autor y Resena
+    cache_respuestas = True
+    cache_modelos = ('autor', 'libro', 'resena')
     
     def get_serializer_class(self):
         """Retorna diferentes serializadores según la acción"""
@@ -122,7 +312,10 @@ class LibroViewSet(viewsets.ModelViewSet):
         """
         from django.db.models.functions import ExtractYear
         
-        queryset = Libro.objects.select_related('autor').prefetch_related('resenas').all()
+        # Las reseñas recientes se precargan con una consulta con ventana por página.
+        # En list y retrieve las precargas las define la selección de campos
+        # (LibroSerializer.preparar_queryset)
+        queryset = Libro.objects.select_related('autor').con_resenas_recientes()
         
         # Anotar el año con un nombre diferente para evitar conflicto con la propiedad @property year del modelo
         queryset = queryset.annotate(publication_year=ExtractYear('fecha_publicacion'))
@@ -160,7 +353,7 @@ class LibroViewSet(viewsets.ModelViewSet):
           URL: /api/books/por_autor/
         - methods=['get']: Métodos HTTP permitidos (get, post, put, etc.)
         
-        Esta ruta calcula el rating promedio de un libro específico
+        Esta ruta retorna el rating promedio de un libro específico
         basado en todas sus reseñas que tengan el campo rating.
         
         Ejemplo de uso:
@@ -177,21 +370,17 @@ class LibroViewSet(viewsets.ModelViewSet):
         ═══════════════════════════════════════════════════════════════
         """
         libro = self.get_object()
-        reviews = libro.resenas.exclude(rating__isnull=True)
-        
-        if reviews.exists():
-            from django.db.models import Avg
-            promedio = reviews.aggregate(avg_rating=Avg('rating'))['avg_rating']
-            promedio = round(promedio, 2) if promedio else None
-        else:
-            promedio = None
+        # Las estadísticas se leen de las columnas almacenadas en Libro,
+        # que se actualizan en cada escritura de Resena
+        promedio = libro.rating_promedio
+        promedio = round(promedio, 2) if promedio else None
         
         return Response({
             'libro_id': libro.id,
             'titulo': libro.titulo,
             'rating_promedio': promedio,
-            'total_resenas': libro.resenas.count(),
-            'resenas_con_rating': reviews.count()
+            'total_resenas': libro.cantidad_resenas,
+            'resenas_con_rating': libro.rating_cantidad
         })
     
     @action(detail=False, methods=['get'])
@@ -212,7 +401,7 @@ class LibroViewSet(viewsets.ModelViewSet):
         """
         autor_id = request.query_params.get('autor_id', None)
         if autor_id:
-            libros = Libro.objects.filter(autor_id=autor_id)
+            libros = Libro.objects.filter(autor_id=autor_id).select_related('autor').con_resenas_recientes()
             serializer = self.get_serializer(libros, many=True)
             return Response(serializer.data)
         return Response(
@@ -220,20 +409,115 @@ class LibroViewSet(viewsets.ModelViewSet):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    def filtros_ranking(self, request):
+        """?limite=, ?nacionalidad= (del autor) y ?decada= (año múltiplo de 10) de top y trending"""
+        limite = _parametro(
+            request, 'limite', _limite,
+            f"un entero entre 1 y {settings.BIBLIOTECA_RANKING['LIMITE_MAXIMO']}",
+        )
+        return {
+            'limite': limite or settings.BIBLIOTECA_RANKING['LIMITE'],
+            'nacionalidad': request.query_params.get('nacionalidad') or None,
+            'decada': _parametro(request, 'decada', _decada, 'un año múltiplo de 10 (ej. 1990)'),
+        }
+
+    @action(detail=False, methods=['get'])
+    def top(self, request):
+        """
+        ═══════════════════════════════════════════════════════════════
+        RANKING DE MEJOR VALORADOS - EXPLICACIÓN:
+        ═══════════════════════════════════════════════════════════════
+        
+        URL: /api/books/top/?nacionalidad=colombiana&decada=1960&limite=10
+        
+        Ordena por puntaje bayesiano: el promedio de los ratings ponderado
+        por su cantidad (un libro con un solo 5.0 no supera a uno con cien
+        ratings de 4.8). El puntaje se guarda en cada libro y se actualiza al
+        escribir sus reseñas (LibroQuerySet.actualizar_ranking), así que la
+        respuesta lee los primeros libros de un índice, sin calcular nada.
+        
+        Respuesta:
+        [{"posicion": 1, "id": 7, "titulo": "...", "author_name": "...",
+          "nacionalidad": "...", "publication_year": 1967, "cantidad_resenas": 40,
+          "resenas_con_rating": 38, "rating_promedio": 4.6, "puntaje": 4.41}, ...]
+        ═══════════════════════════════════════════════════════════════
+        """
+        return Response(ranking.mejor_valorados(**self.filtros_ranking(request)))
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """
+        ═══════════════════════════════════════════════════════════════
+        RANKING DE TENDENCIAS - EXPLICACIÓN:
+        ═══════════════════════════════════════════════════════════════
+        
+        URL: /api/books/trending/?nacionalidad=chilena&decada=1990&limite=10
+        
+        Ordena por actividad reciente de reseñas (Resena.fecha) con una
+        ventana deslizante de decaimiento exponencial: cada reseña pierde la
+        mitad de su peso cada BIBLIOTECA_RANKING['VIDA_MEDIA_DIAS'] días.
+        Como el puntaje top, se guarda en cada libro y se actualiza al
+        escribir sus reseñas. `tendencia` equivale a la cantidad de reseñas
+        de hoy que representa la actividad del libro.
+        
+        Respuesta: igual que /api/books/top/ con "tendencia" en lugar de "puntaje"
+        ═══════════════════════════════════════════════════════════════
+        """
+        return Response(ranking.en_tendencia(**self.filtros_ranking(request)))
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """
+        ═══════════════════════════════════════════════════════════════
+        LIBROS SIMILARES - EXPLICACIÓN:
+        ═══════════════════════════════════════════════════════════════
+        
+        URL: /api/books/{id}/similar/?limite=10
+        
+        Compara el título y el resumen del libro con los de todo el catálogo
+        (similitud coseno de vectores TF-IDF). Los vectores están en un
+        índice en disco que comparten todos los procesos (ver similares.py):
+        la consulta es un producto punto de matrices dispersas con numpy,
+        sin recorrer libros en Python ni consultar la base por candidato.
+        Solo se leen de la base los libros de la respuesta.
+        
+        Respuesta: igual que /api/books/top/ con "similitud" (0 a 1) en
+        lugar de "puntaje". 503 si el índice no está construido.
+        ═══════════════════════════════════════════════════════════════
+        """
+        maximo = settings.BIBLIOTECA_SIMILARES['LIMITE_MAXIMO']
+        limite = _parametro(
+            request, 'limite', lambda valor: _limite(valor, maximo), f'un entero entre 1 y {maximo}'
+        )
+        libro = self.get_object()
+        try:
+            resultado = similares.similares(libro, limite or settings.BIBLIOTECA_SIMILARES['LIMITE'])
+        except similares.IndiceNoDisponible as error:
+            return Response({'error': str(error)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(resultado)
+
 
-class ResenaViewSet(viewsets.ModelViewSet):
+class ResenaViewSet(CamposDinamicosViewSetMixin, CacheRespuestaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar reseñas.
     
     Incluye filtros por libro y calificación.
+    Admite paginación por cursor con ?cursor= (ver paginacion.py) y en
+    list y retrieve ?fields=, ?omit= y ?expand=libro (ver campos_dinamicos.py).
     """
     queryset = Resena.objects.select_related('libro', 'libro__autor').all()
     serializer_class = ResenaSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FTS5SearchFilter]
     filterset_fields = ['libro', 'calificacion']
     search_fields = ['texto', 'libro__titulo']
     ordering_fields = ['fecha', 'calificacion', 'rating']
     ordering = ['-fecha']
+    pagination_class = PaginacionCatalogo
+    throttle_classes = [ThrottleCosto]  # Ver limites.py
+    # Cache de list/retrieve: la búsqueda usa el título del libro y
+    # ?expand=libro incluye el libro con el nombre de su autor
+    cache_respuestas = True
+    cache_modelos = ('autor', 'libro', 'resena')
     
     def get_queryset(self):
         """Sobrescribe get_queryset para agregar filtros dinámicos"""
@@ -257,12 +541,183 @@ class ResenaViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def create(self, request, *args, **kwargs):
+        """
+        Con la ingesta diferida (BIBLIOTECA_INGESTA_RESENAS['ACTIVO']) la
+        reseña se valida igual, se guarda en el spool y se responde 202
+        Accepted sin escribir en la base: un hilo de fondo la inserta en un
+        lote junto con las demás (ver ingesta.py).
+        """
+        if not ingesta.activa():
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(ingesta.encolar(serializer.validated_data), status=status.HTTP_202_ACCEPTED)
+    
     def perform_create(self, serializer):
         """Sobrescribe perform_create para agregar lógica personalizada"""
         # Si no se proporciona rating, usar calificacion como base
-        if not serializer.validated_data.get('rating'):
-            calificacion = serializer.validated_data.get('calificacion', 0)
-            serializer.save(rating=float(calificacion))
-        else:
-            serializer.save()
+        serializer.save(rating=rating_por_defecto(serializer.validated_data))
+    
+    @action(detail=False, methods=['get'], url_path='ingesta')
+    def estado_ingesta(self, request):
+        """
+        Ruta personalizada: /api/reviews/ingesta/
+        
+        Métricas de la ingesta diferida: reseñas pendientes en el spool, espera
+        de la más antigua y latencia de los últimos lotes (percentiles de la
+        duración de cada transacción y de la espera desde la aceptación).
+        """
+        return Response(ingesta.estado())
+    
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Ruta personalizada: /api/reviews/bulk/
+        
+        Crea muchas reseñas en una sola petición. El cuerpo es una lista JSON
+        de reseñas con el mismo formato que POST /api/reviews/.
+        
+        - Se validan como lote: los libros se cargan con una sola consulta y
+          se aplican validar_calificacion y el rango de rating.
+        - Si no se proporciona rating se usa calificacion (igual que perform_create).
+        - Se insertan con bulk_create en bloques dentro de una sola transacción.
+        
+        Modos (?modo=):
+        - atomico (por defecto): si alguna reseña es inválida no se crea ninguna
+          y se responde 400 con los errores de cada elemento.
+        - parcial: se crean las reseñas válidas y se informan los errores del resto.
+        
+        Respuesta:
+        {
+            "creadas": 2,
+            "ids": [10, 11],
+            "errores": [{"indice": 2, "errores": {"calificacion": ["..."]}}]
+        }
+        """
+        config = settings.BIBLIOTECA_RESENAS_LOTE
+        modo = request.query_params.get('modo', 'atomico')
+        if modo not in ('atomico', 'parcial'):
+            return Response(
+                {'error': "El parámetro modo debe ser 'atomico' o 'parcial'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {'error': 'Se esperaba una lista de reseñas'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > config['MAXIMO']:
+            return Response(
+                {'error': f"El lote no puede tener más de {config['MAXIMO']} reseñas"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        validas, errores = ResenaLoteSerializer.validar_lote(items)
+        if errores and modo == 'atomico':
+            return Response(
+                {'creadas': 0, 'ids': [], 'errores': errores},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        resenas = [
+            Resena(**{**datos, 'rating': rating_por_defecto(datos)})
+            for _, datos in validas
+        ]
+        # ResenaQuerySet.bulk_create ya envuelve todo en una transacción y
+        # actualiza las estadísticas de los libros una sola vez
+        creadas = Resena.objects.bulk_create(resenas, batch_size=config['BATCH_SIZE'])
+        return Response(
+            {'creadas': len(creadas), 'ids': [resena.pk for resena in creadas], 'errores': errores},
+            status=status.HTTP_201_CREATED
+        )
+
+
+class EstadisticasViewSet(viewsets.ViewSet):
+    """
+    Estadísticas del catálogo para dashboards (/api/stats/).
+
+    Se leen de las tablas de resumen que mantienen los triggers de la
+    migración 0008 (ver estadisticas.py): cada respuesta lee una fila por
+    año, nacionalidad o mes, no los libros ni las reseñas.
+
+    list: Todas las series y los totales del catálogo
+    years: Libros por año de publicación (?desde=&hasta=, años)
+    nationalities: Autores y libros por nacionalidad
+    months: Reseñas por mes (?desde=&hasta=, AAAA-MM)
+    ratings: Distribución de calificaciones (?desde=&hasta=, AAAA-MM)
+    """
+
+    def rango_anios(self, request):
+        return {
+            nombre: _parametro(request, nombre, int, 'un año (entero)')
+            for nombre in ('desde', 'hasta')
+        }
+
+    def rango_meses(self, request):
+        return {
+            nombre: _parametro(request, nombre, _mes, 'un mes con formato AAAA-MM')
+            for nombre in ('desde', 'hasta')
+        }
 
+    def list(self, request):
+        """
+        Respuesta:
+        {
+            "totales": {"libros": 120, "autores": 30, "resenas": 2400},
+            "years": [...], "nationalities": [...], "months": [...], "ratings": [...]
+        }
+        """
+        anios = estadisticas.por_anio()
+        nacionalidades = estadisticas.por_nacionalidad()
+        calificaciones = estadisticas.distribucion_calificaciones()
+        return Response({
+            'totales': {
+                'libros': sum(fila['cantidad_libros'] for fila in anios),
+                'autores': sum(fila['cantidad_autores'] for fila in nacionalidades),
+                'resenas': sum(fila['cantidad_resenas'] for fila in calificaciones),
+            },
+            'years': anios,
+            'nationalities': nacionalidades,
+            'months': estadisticas.por_mes(),
+            'ratings': calificaciones,
+        })
+
+    @action(detail=False, methods=['get'])
+    def years(self, request):
+        """
+        Ruta personalizada: /api/stats/years/?desde=1990&hasta=2000
+
+        Respuesta: [{"anio": 1967, "cantidad_libros": 3}, ...]
+        """
+        return Response(estadisticas.por_anio(**self.rango_anios(request)))
+
+    @action(detail=False, methods=['get'])
+    def nationalities(self, request):
+        """
+        Ruta personalizada: /api/stats/nationalities/
+
+        Respuesta: [{"nacionalidad": "Colombiana", "cantidad_autores": 2, "cantidad_libros": 5}, ...]
+        """
+        return Response(estadisticas.por_nacionalidad())
+
+    @action(detail=False, methods=['get'])
+    def months(self, request):
+        """
+        Ruta personalizada: /api/stats/months/?desde=2024-01&hasta=2024-12
+
+        Respuesta:
+        [{"mes": "2024-03", "cantidad_resenas": 120, "calificacion_promedio": 3.9,
+          "resenas_con_rating": 118, "rating_promedio": 3.75}, ...]
+        """
+        return Response(estadisticas.por_mes(**self.rango_meses(request)))
+
+    @action(detail=False, methods=['get'])
+    def ratings(self, request):
+        """
+        Ruta personalizada: /api/stats/ratings/?desde=2024-01&hasta=2024-12
+
+        Respuesta: [{"calificacion": 1, "cantidad_resenas": 10}, ..., {"calificacion": 5, ...}]
+        """
+        return Response(estadisticas.distribucion_calificaciones(**self.rango_meses(request)))